@@ -0,0 +1,135 @@
+# ✅ admin.py — Endpoints de administración (cabecera X-Admin-Token) y perfilado bajo demanda
+#
+# Desactivados salvo que ADMIN_TOKEN esté definido. Un solo perfilado a la vez y de duración acotada:
+# se pueden dejar habilitados en producción.
+#   GET /admin/profile?seconds=N          → perfil de todos los hilos del worker durante N segundos
+#   POST /api/recommendation?profile=1    → perfil de esa petición en lugar de su respuesta
+#   GET /admin/memory                     → huella de memoria del catálogo, índices y caché
+
+import asyncio
+import hmac
+import os
+import threading
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from book_recommender_api.app.cache import recommendation_cache
+from book_recommender_api.app.catalog import current_catalog
+from book_recommender_api.app.database import get_database
+from book_recommender_api.app.memory import SOURCE_PROJECTION, TOP_ALLOCATIONS, DocumentStats, memory_report
+from book_recommender_api.app.profiler import DEFAULT_INTERVAL, Profile, SamplingProfiler
+
+router = APIRouter()
+
+ADMIN_HEADER = "X-Admin-Token"
+MAX_PROFILE_SECONDS = 60
+REQUEST_PROFILE_INTERVAL = 0.0005  # Una petición dura milisegundos: muestreo más denso
+PROFILED_PATHS = {"/api/recommendation"}
+PROFILE_FORMATS = "^(speedscope|collapsed)$"
+DOCUMENT_BATCH = 500  # Documentos medidos por cada salto al threadpool en /admin/memory
+
+_profiling = threading.Lock()
+
+
+# 🔹 Autorización: 404 si la administración está desactivada, 403 si el token no coincide
+def check_admin(token: Optional[str]) -> None:
+    expected = os.getenv("ADMIN_TOKEN", "")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Token de administración no válido")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    check_admin(x_admin_token)
+
+
+# 🔹 Perfil como flame graph (speedscope o pilas colapsadas); estadísticas y overhead en cabeceras
+def profile_response(profile: Profile, output: str = "speedscope") -> Response:
+    headers = {"X-Profile-" + key.replace("_", "-").title(): str(value) for key, value in profile.stats().items()}
+    if output == "collapsed":
+        return PlainTextResponse(profile.collapsed(), headers=headers)
+    return JSONResponse(profile.speedscope(), headers=headers)
+
+
+# 🔹 GET /admin/profile — muestrea el worker completo mientras sigue atendiendo peticiones
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(seconds: float = Query(5, gt=0, le=MAX_PROFILE_SECONDS),
+                         interval_ms: float = Query(DEFAULT_INTERVAL * 1000, ge=0.5, le=100),
+                         output: str = Query("speedscope", alias="format", regex=PROFILE_FORMATS)):
+    if not _profiling.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="Ya hay un perfilado en curso")
+    try:
+        with SamplingProfiler(interval_ms / 1000) as profiler:
+            await asyncio.sleep(seconds)
+    finally:
+        _profiling.release()
+    return profile_response(profiler.profile, output)
+
+
+# 🔹 GET /admin/memory — tamaño profundo por estructura; con documents=true, comparación con los JSON de MongoDB
+@router.get("/memory", dependencies=[Depends(require_admin)])
+async def memory_usage(documents: bool = False, top: int = Query(TOP_ALLOCATIONS, ge=1, le=100),
+                       db=Depends(get_database)):
+    document_stats = None
+    if documents:
+        # El cursor se lee por lotes y cada lote se mide en el threadpool: ni la colección entera
+        # en memoria ni deep_sizeof/json.dumps bloqueando el event loop
+        stats = DocumentStats()
+        batch = []
+        async for doc in db["books"].find({}, SOURCE_PROJECTION):
+            batch.append(doc)
+            if len(batch) >= DOCUMENT_BATCH:
+                await run_in_threadpool(stats.extend, batch)
+                batch = []
+        await run_in_threadpool(stats.extend, batch)
+        document_stats = await run_in_threadpool(stats.report)
+    # Recorrer el catálogo completo es CPU: fuera del event loop
+    return await run_in_threadpool(memory_report, current_catalog(), recommendation_cache, document_stats, top)
+
+
+# 🔹 ?profile=1 — perfila una sola petición (solo el hilo del event loop que la atiende)
+class RequestProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["path"] not in PROFILED_PATHS
+                or b"profile=" not in scope.get("query_string", b"")):
+            return await self.app(scope, receive, send)
+        params = parse_qs(scope["query_string"].decode("latin-1"))
+        if params.get("profile", ["0"])[0] not in ("1", "true"):
+            return await self.app(scope, receive, send)
+
+        # Sin ADMIN_TOKEN el perfilado está desactivado: ?profile=1 no cambia la respuesta pública
+        if not os.getenv("ADMIN_TOKEN", ""):
+            return await self.app(scope, receive, send)
+        try:
+            check_admin(Headers(scope=scope).get(ADMIN_HEADER))
+        except HTTPException as e:
+            return await JSONResponse({"detail": e.detail}, status_code=e.status_code)(scope, receive, send)
+        if not _profiling.acquire(blocking=False):
+            return await JSONResponse({"detail": "Ya hay un perfilado en curso"}, status_code=409)(scope, receive, send)
+
+        # La respuesta real se descarta: solo interesa su código de estado
+        status = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        try:
+            with SamplingProfiler(REQUEST_PROFILE_INTERVAL, thread_ids={threading.get_ident()},
+                                  switch_interval=REQUEST_PROFILE_INTERVAL) as profiler:
+                await self.app(scope, receive, capture)
+        finally:
+            _profiling.release()
+
+        output = params.get("profile_format", ["speedscope"])[0]
+        response = profile_response(profiler.profile, "collapsed" if output == "collapsed" else "speedscope")
+        response.headers["X-Profiled-Status"] = str(status[0] if status else 500)
+        await response(scope, receive, send)
@@ -4,8 +4,9 @@ import sys
 import requests
 import streamlit as st
 
-# Ajustar path para importar módulos desde nivel superior
+# Ajustar path para importar módulos desde nivel superior (utils/ y el paquete book_recommender_api)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
 from utils.field_loader import load_field_options
 
@@ -15,6 +16,8 @@ from utils.field_loader import load_field_options
 st.set_page_config(page_title="Recomendador de Libros", layout="centered")
 
 API_URL = st.secrets.get("API_URL", "http://127.0.0.1:8001/api/recommendation")
+FIELD_OPTIONS_URL = st.secrets.get("FIELD_OPTIONS_URL", "http://127.0.0.1:8001/api/field-options")
+FIELD_OPTIONS_TTL = 300  # Segundos entre revalidaciones: Streamlit reejecuta el script en cada interacción
 
 if "history" not in st.session_state:
     st.session_state.history = []
@@ -24,8 +27,13 @@ if "last_payload" not in st.session_state:
 # ---------------------------
 # 🏷️ Cargar opciones
 # ---------------------------
-options = load_field_options()
-st.caption("🧹 Géneros y campos cargados desde archivo auditado (géneros verificados con taxonomía oficial).")
+@st.cache_data(ttl=FIELD_OPTIONS_TTL)
+def cached_field_options(url):
+    # Revalidada con ETag al caducar: la API responde 304 si no hay catálogo nuevo
+    return load_field_options(url)
+
+options = cached_field_options(FIELD_OPTIONS_URL)
+st.caption("🧹 Géneros y campos cargados del catálogo publicado (géneros verificados con taxonomía oficial).")
 st.write("📚 Géneros disponibles:", options["genres"])  # ✅ Mostramos los géneros para verificar que están bien
 
 # ---------------------------
@@ -1,74 +1,292 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-import unicodedata
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+import base64
+import heapq
+import json
+import os
 
-from book_recommender_api.app.models import FullProfile, RecommendationResponse, BookOut
-from book_recommender_api.app.database import get_books_collection
-from book_recommender_api.app.recommender import score_book, generate_explanation
+from book_recommender_api.app.models import (
+    FullProfile, RecommendationResponse, RecommendationsResponse, BookOut,
+    BatchRecommendationRequest, BatchRecommendationsResponse
+)
+from book_recommender_api.app.database import get_database
+from book_recommender_api.app.catalog import CatalogIndex, get_catalog, score_entry
+from book_recommender_api.app.cache import recommendation_cache, profile_fingerprint
+from book_recommender_api.app.metrics import recommendation_candidates, stage_timer
+from book_recommender_api.app.vector_engine import ranked_candidates
+from book_recommender_api.app.responses import (
+    PrecomputedJSONResponse, Scored, book_json, batch_json, recommendation_json, recommendations_json
+)
+from book_recommender_api.app.repository import BOOK_FIELDS, list_books_cursor, rank_in_db, rank_with_pipeline
+from book_recommender_api.app.recommender import (
+    normalize_book, normalize_profile, shares_any_tag, score_normalized, render_explanation
+)
 
 router = APIRouter()
 
+# Motor de puntuación: "python" (bucle sobre candidatos), "numpy" (vectorizado)
+# o "mongo" / "aggregate" (filtro de candidatos o puntuación completa en MongoDB, sin catálogo residente)
+RECOMMENDER_ENGINE = os.getenv("RECOMMENDER_ENGINE", "python")
+DATABASE_ENGINES = {"mongo": rank_in_db, "aggregate": rank_with_pipeline}
 
-# 🔹 Utilidad: normalizar texto
-def normalize(text: str) -> str:
-    if not text:
-        return ""
-    return unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("utf-8").strip()
 
-def normalize_list(texts):
-    return [normalize(t) for t in texts if t]
+# 🔹 GET /books — listado paginado (cursor opaco sobre _id), con proyección y modo NDJSON
+BOOKS_PAGE_SIZE = 100
+BOOKS_MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
+def encode_cursor(book_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(book_id.binary).decode("ascii").rstrip("=")
 
-# 🔹 GET /books — listado completo de libros
-@router.get("/books", response_model=List[BookOut])
-def list_books():
-    books_col = get_books_collection()
-    books = list(books_col.find({}, {"_id": 0}))
-    return books
+def decode_cursor(token: str) -> ObjectId:
+    try:
+        return ObjectId(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Cursor 'after' no válido")
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in BOOK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Campos desconocidos: {', '.join(unknown)}")
+    return requested
+
+async def ndjson_lines(cursor):
+    # Un libro por línea a medida que llegan los lotes del cursor
+    async for doc in cursor:
+        doc.pop("_id", None)
+        yield json.dumps(doc, ensure_ascii=False).encode("utf-8") + b"\n"
+
+# La respuesta se serializa a mano (página JSON o NDJSON) y con fields= solo trae los campos pedidos:
+# se documenta con responses= en lugar de response_model=List[BookOut]
+BOOKS_RESPONSES = {
+    200: {
+        "description": (
+            f"Página de hasta 'limit' libros ({BOOKS_PAGE_SIZE} por defecto; antes se devolvía el catálogo completo). "
+            "Cada libro tiene los campos de BookOut o solo los pedidos en 'fields'. "
+            f"Si hay más libros, la cabecera {NEXT_CURSOR_HEADER} trae el valor de 'after' para la página siguiente; "
+            "con format=ndjson se vuelca un libro por línea desde 'after' hasta el final (o 'limit' libros)."
+        ),
+        "headers": {NEXT_CURSOR_HEADER: {"description": "Cursor de la página siguiente", "schema": {"type": "string"}}},
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/BookOut"}}},
+            NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}
+        }
+    }
+}
+
+@router.get("/books", responses=BOOKS_RESPONSES)
+async def list_books(limit: Optional[int] = Query(None, ge=1, le=BOOKS_MAX_PAGE_SIZE),
+                     after: Optional[str] = None,
+                     fields: Optional[str] = Query(None, description="Campos separados por comas"),
+                     output: str = Query("json", alias="format", regex="^(json|ndjson)$"),
+                     db=Depends(get_database)):
+    after_id = decode_cursor(after) if after else None
+    projection = parse_fields(fields)
+
+    # NDJSON: volcado desde 'after' hasta el final (o 'limit' libros) sin acumular la respuesta
+    if output == "ndjson":
+        cursor = list_books_cursor(db, after_id, projection, limit)
+        return StreamingResponse(ndjson_lines(cursor), media_type=NDJSON_MEDIA_TYPE)
+
+    # JSON: una página acotada; se pide un libro de más para saber si hay siguiente
+    page_size = limit or BOOKS_PAGE_SIZE
+    books = await list_books_cursor(db, after_id, projection, page_size + 1).to_list(None)
+    headers = {}
+    if len(books) > page_size:
+        books = books[:page_size]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(books[-1]["_id"])
+    for doc in books:
+        doc.pop("_id", None)
+    body = json.dumps(books, ensure_ascii=False).encode("utf-8")
+    return Response(body, media_type="application/json", headers=headers)
 
 
 # 🔹 Función auxiliar: coincidencias mínimas clave
 def has_minimum_match(book, profile: FullProfile) -> bool:
-    book_genres = normalize_list(book.get("genres", []))
-    book_themes = normalize_list(book.get("themes", []))
-    book_emotions = normalize_list(book.get("emotion_tags", []))
+    return shares_any_tag(normalize_book(book), normalize_profile(profile))
+
+
+# 🔹 Ranking del catálogo: [(book_id, score)] de mayor a menor puntuación (los k mejores)
+def rank_catalog(catalog: CatalogIndex, user_data, personality, k: Optional[int] = None) -> List[Tuple[int, float]]:
+    if RECOMMENDER_ENGINE == "numpy":
+        vectors = catalog.vectors
+        with stage_timer("candidate_filter"):
+            counts = vectors.overlaps(user_data)
+        with stage_timer("scoring"):
+            scores = vectors.score(user_data, personality, counts)
+        with stage_timer("selection"):
+            return ranked_candidates(counts, scores, k)
+
+    # Solo se puntúan los candidatos del índice invertido (coincidencia mínima)
+    with stage_timer("candidate_filter"):
+        candidates = catalog.candidates(user_data)
+    recommendation_candidates.observe(len(candidates))
+
+    with stage_timer("scoring"):
+        query = catalog.encode_query(user_data, personality)
+        scored_books = []
+        for book_id in candidates:
+            score = score_entry(query, catalog.books[book_id].features)
+            if score > 0:
+                scored_books.append((book_id, score))
+
+    with stage_timer("selection"):
+        if k is None:
+            scored_books.sort(key=lambda x: x[1], reverse=True)
+            return scored_books
+
+        # Selección parcial O(n log k); a igual puntuación gana el id menor (como el sort estable)
+        return heapq.nlargest(k, scored_books, key=lambda x: (x[1], -x[0]))
+
+
+# 🔹 Ranking de varios perfiles contra una sola pasada por el catálogo
+def rank_catalog_batch(catalog: CatalogIndex, users, k: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+    if RECOMMENDER_ENGINE == "numpy":
+        return catalog.vectors.rank_batch(users, k)
+    return [rank_catalog(catalog, user_data, personality, k) for user_data, personality in users]
+
+
+# 🔹 Rankings cacheados por huella del perfil (se invalidan al cambiar la versión del catálogo)
+def cached_rank(catalog: CatalogIndex, user_data, personality, k: int) -> List[Tuple[int, float]]:
+    key = (profile_fingerprint(user_data, personality), k)
+    scored_books = recommendation_cache.get(key, catalog.version)
+    if scored_books is None:
+        scored_books = rank_catalog(catalog, user_data, personality, k)
+        recommendation_cache.put(key, catalog.version, scored_books)
+    return scored_books
+
+def cached_rank_batch(catalog: CatalogIndex, users, k: int) -> List[List[Tuple[int, float]]]:
+    # Solo los perfiles sin entrada en caché pasan por el ranking en lote
+    keys = [(profile_fingerprint(user_data, personality), k) for user_data, personality in users]
+    ranked = [recommendation_cache.get(key, catalog.version) for key in keys]
+    missing = [idx for idx, scored_books in enumerate(ranked) if scored_books is None]
+    if missing:
+        fresh = rank_catalog_batch(catalog, [users[idx] for idx in missing], k)
+        for idx, scored_books in zip(missing, fresh):
+            ranked[idx] = scored_books
+            recommendation_cache.put(keys[idx], catalog.version, scored_books)
+    return ranked
 
-    profile_genres = normalize_list(profile.preferences.genres)
-    profile_themes = normalize_list(profile.preferences.themes)
-    profile_emotions = normalize_list(profile.preferences.emotion_tags)
 
-    genre_match = bool(set(book_genres) & set(profile_genres))
-    theme_match = bool(set(book_themes) & set(profile_themes))
-    emotion_match = bool(set(book_emotions) & set(profile_emotions))
+# 🔹 Explicación de un libro del índice a partir de su desglose de puntuación
+def explain_entry(catalog: CatalogIndex, book_id: int, user_data, personality) -> str:
+    _, breakdown = score_normalized(user_data, catalog.decode(book_id), personality, explain=True)
+    return render_explanation(breakdown)
 
-    return sum([genre_match, theme_match, emotion_match]) >= 1
+
+# 🔹 Top-k con explicaciones: el JSON de cada libro sale ya serializado del índice
+def build_recommendations(catalog: CatalogIndex, user_data, personality, scored_books) -> List[Scored]:
+    with stage_timer("explanation"):
+        return [
+            (catalog.books[book_id].raw, score, explain_entry(catalog, book_id, user_data, personality))
+            for book_id, score in scored_books
+        ]
+
+
+# 🔹 Motores "mongo" / "aggregate": ranking resuelto en la base de datos
+async def recommend_from_db(db, user_data, personality, k: int) -> List[Scored]:
+    rank = DATABASE_ENGINES[RECOMMENDER_ENGINE]
+    with stage_timer("database"):
+        ranked = await rank(db, user_data, personality, k)
+    recommendations = []
+    for doc, score, book_data in ranked:
+        _, breakdown = score_normalized(user_data, book_data, personality, explain=True)
+        # Documentos recién leídos de MongoDB: se validan antes de servirlos
+        recommendations.append((book_json(BookOut(**doc)), score, render_explanation(breakdown)))
+    return recommendations
+
+
+# 🔹 Los k mejores libros para un perfil (404 si no hay libros o ninguno coincide)
+async def top_recommendations(db, user_data, personality, k: int) -> List[Scored]:
+    if RECOMMENDER_ENGINE in DATABASE_ENGINES:
+        recommendations = await recommend_from_db(db, user_data, personality, k)
+        if not recommendations and await db["books"].find_one({}, {"_id": 1}) is None:
+            raise HTTPException(status_code=404, detail="No hay libros disponibles para recomendar.")
+    else:
+        with stage_timer("catalog_fetch"):
+            catalog = await get_catalog(db)
+        if not catalog.books:
+            raise HTTPException(status_code=404, detail="No hay libros disponibles para recomendar.")
+        # El perfil se normaliza una vez; los libros ya vienen normalizados en el índice
+        scored_books = cached_rank(catalog, user_data, personality, k=k)
+        recommendations = build_recommendations(catalog, user_data, personality, scored_books)
+
+    if not recommendations:
+        raise HTTPException(status_code=404, detail="Ningún libro coincide con tu perfil.")
+    return recommendations
 
 
 # 🔹 POST /recommendation — recomendación personalizada
 @router.post("/recommendation", response_model=RecommendationResponse)
-def recommend(profile: FullProfile):
-    books_col = get_books_collection()
-    books = list(books_col.find({}, {"_id": 0}))
+async def recommend(profile: FullProfile, db=Depends(get_database)):
+    user_data = normalize_profile(profile)
+    raw, _, explanation = (await top_recommendations(db, user_data, profile.personality, k=1))[0]
+    with stage_timer("serialization"):
+        return PrecomputedJSONResponse(recommendation_json(raw, explanation))
+
+
+# 🔹 POST /recommendations?k=N — los N mejores libros con su puntuación
+@router.post("/recommendations", response_model=RecommendationsResponse)
+async def recommend_top_k(profile: FullProfile, k: int = Query(5, ge=1, le=50), db=Depends(get_database)):
+    user_data = normalize_profile(profile)
+    recommendations = await top_recommendations(db, user_data, profile.personality, k)
+    with stage_timer("serialization"):
+        return PrecomputedJSONResponse(recommendations_json(recommendations))
 
-    if not books:
+
+# 🔹 POST /recommendations/batch — top-k para muchos perfiles en una sola pasada
+@router.post("/recommendations/batch", response_model=BatchRecommendationsResponse)
+async def recommend_batch(request: BatchRecommendationRequest, db=Depends(get_database)):
+    # Un perfil sin coincidencias recibe una lista vacía en lugar de un 404
+    users = [(normalize_profile(profile), profile.personality) for profile in request.profiles]
+
+    if RECOMMENDER_ENGINE in DATABASE_ENGINES:
+        return PrecomputedJSONResponse(batch_json([
+            recommendations_json(await recommend_from_db(db, user_data, personality, request.k))
+            for user_data, personality in users
+        ]))
+
+    catalog = await get_catalog(db)
+    if not catalog.books:
         raise HTTPException(status_code=404, detail="No hay libros disponibles para recomendar.")
 
-    scored_books = []
-    for book in books:
-        if not has_minimum_match(book, profile):
-            continue
-        score = score_book(book, profile)
-        if score > 0:
-            scored_books.append((book, score))
+    # Cientos de perfiles son CPU intensivo: se puntúan fuera del event loop
+    ranked = await run_in_threadpool(cached_rank_batch, catalog, users, request.k)
 
-    if not scored_books:
-        raise HTTPException(status_code=404, detail="Ningún libro coincide con tu perfil.")
+    results = [
+        build_recommendations(catalog, user_data, personality, scored_books)
+        for (user_data, personality), scored_books in zip(users, ranked)
+    ]
+    with stage_timer("serialization"):
+        return PrecomputedJSONResponse(batch_json([recommendations_json(scored) for scored in results]))
+
+
+# 🔹 GET /recommendations/cache — contadores de la caché de rankings
+@router.get("/recommendations/cache")
+async def recommendation_cache_stats():
+    return recommendation_cache.stats()
+
+
+# 🔹 GET /catalog — versión del índice residente, origen (MongoDB o snapshot) y tiempos de construcción/carga
+@router.get("/catalog")
+async def catalog_info(catalog: CatalogIndex = Depends(get_catalog)):
+    return {"version": catalog.version, "books": len(catalog), "skipped": catalog.skipped, **catalog.info}
 
-    scored_books.sort(key=lambda x: x[1], reverse=True)
-    best_book, best_score = scored_books[0]
-    explanation = generate_explanation(best_book, profile)
 
-    return RecommendationResponse(
-        recommendation=BookOut(**best_book),
-        explanation=explanation
-    )
+# 🔹 GET /field-options — valores distintos por campo para los formularios (304 si el cliente ya los tiene)
+@router.get("/field-options")
+async def field_options(catalog: CatalogIndex = Depends(get_catalog),
+                        if_none_match: Optional[str] = Header(None)):
+    options = catalog.field_options
+    headers = {"ETag": options.etag, "Cache-Control": "no-cache"}
+    if options.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(options.body, media_type="application/json", headers=headers)
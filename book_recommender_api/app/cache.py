@@ -0,0 +1,113 @@
+# ✅ cache.py — Caché LRU + TTL de rankings por huella canónica del perfil
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+from book_recommender_api.app.recommender import personality_bands
+
+CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024"))   # 0 desactiva la caché
+CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))     # segundos
+
+
+# -------------------------
+# 🔹 HUELLA CANÓNICA DEL PERFIL
+# -------------------------
+
+def profile_fingerprint(user_data: Dict, personality) -> str:
+    # Perfil ya normalizado: listas ordenadas y sin duplicados, personalidad reducida a bandas
+    canonical = {
+        "genres": sorted(user_data["genres"]),
+        "themes": sorted(user_data["themes"]),
+        "emotion_tags": sorted(user_data["emotion_tags"]),
+        "tone": user_data["tone"],
+        "style": user_data["style"],
+        "age_range": user_data["age_range"],
+        "personality": personality_bands(personality)
+    }
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+# -------------------------
+# 🔹 CACHÉ LRU + TTL
+# -------------------------
+
+class RecommendationCache:
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.version = None  # Versión del catálogo a la que pertenecen las entradas
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: str) -> None:
+        # Un catálogo nuevo invalida todos los rankings anteriores
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Hashable, version: str):
+        with self._lock:
+            self._check_version(version)
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: str, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "catalog_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+# Caché compartida por los endpoints de recomendación del proceso
+recommendation_cache = RecommendationCache()
@@ -0,0 +1,329 @@
+# ✅ catalog.py — Índice residente del catálogo de libros
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Depends
+from pydantic import ValidationError
+from pymongo.errors import PyMongoError
+from starlette.concurrency import run_in_threadpool
+
+from book_recommender_api.app.models import BookOut
+from book_recommender_api.app.database import get_database
+from book_recommender_api.app.field_options import FieldOptions, collect_field_options
+from book_recommender_api.app.responses import book_json
+from book_recommender_api.app.recommender import (
+    WEIGHTS, PERSONALITY_CLASSES, normalize_book, personality_class, personality_scores_by_class
+)
+from book_recommender_api.app.repository import catalog_version
+from book_recommender_api.app.vector_engine import VectorCatalog
+
+logger = logging.getLogger(__name__)
+
+# Campos que nunca se sirven ni se puntúan (no se traen de MongoDB)
+CATALOG_PROJECTION = {"_id": 0, "subjects": 0}
+
+# Campos que participan en la coincidencia mínima (has_minimum_match)
+MATCH_FIELDS = ("genres", "themes", "emotion_tags")
+
+
+# -------------------------
+# 🔹 VOCABULARIO COMPARTIDO (tag → bit)
+# -------------------------
+
+class TagVocabulary:
+    __slots__ = ("tags", "ids")
+
+    def __init__(self, tags: List[str]):
+        self.tags = tags
+        self.ids = {tag: bit for bit, tag in enumerate(tags)}
+
+    @classmethod
+    def from_counts(cls, counts: Counter) -> "TagVocabulary":
+        # Los tags más frecuentes ocupan los bits bajos → máscaras (ints) más pequeñas
+        return cls([tag for tag, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))])
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def encode(self, tags: Iterable[str]) -> int:
+        # Los tags desconocidos no tienen bit: nunca pueden coincidir
+        mask = 0
+        for tag in tags:
+            bit = self.ids.get(tag)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def decode(self, mask: int) -> frozenset:
+        tags = []
+        while mask:
+            low = mask & -mask
+            tags.append(self.tags[low.bit_length() - 1])
+            mask ^= low
+        return frozenset(tags)
+
+
+# -------------------------
+# 🔹 ENTRADA DEL ÍNDICE
+# -------------------------
+
+class IndexedBook:
+    __slots__ = ("book_id", "features", "_payload", "raw")
+
+    def __init__(self, book_id: int, features: Dict, payload: Optional[BookOut] = None, raw: Optional[bytes] = None):
+        self.book_id = book_id      # Posición estable dentro del catálogo
+        self.features = features    # Campos normalizados; listas codificadas como máscaras de bits
+        self._payload = payload
+        self.raw = raw              # JSON del BookOut, serializado una vez por versión: se empalma en las respuestas
+
+    @property
+    def payload(self) -> BookOut:
+        # BookOut reconstruido solo si se necesita el objeto (p. ej. el título en /explain-recommendation)
+        if self._payload is None:
+            self._payload = BookOut.parse_raw(self.raw)
+        return self._payload
+
+
+def encode_features(book_data: Dict, vocabularies: Dict[str, TagVocabulary], signatures: Dict[tuple, int]) -> Dict:
+    features = {field: vocabularies[field].encode(book_data[field]) for field in MATCH_FIELDS}
+    for field in ("tone", "style", "age_range"):
+        features[field] = sys.intern(book_data[field])
+    # Los libros con los mismos tags de personalidad comparten fila en la tabla por clase
+    features["personality_match"] = signatures.setdefault(book_data["personality_match"], len(signatures))
+    return features
+
+
+# -------------------------
+# 🔹 PUNTUACIÓN SOBRE MÁSCARAS (AND + popcount)
+# -------------------------
+
+def score_entry(query: Dict, features: Dict) -> float:
+    # Equivalente a recommender.score_normalized sin crear conjuntos por libro
+    scores = {
+        field: (features[field] & query[field]).bit_count() / query["sizes"][field]
+        for field in MATCH_FIELDS
+    }
+    for field in ("tone", "style", "age_range"):
+        scores[field] = 1.0 if features[field] and features[field] == query[field] else 0.0
+    scores['personality_match'] = query["personality"][features['personality_match']]
+
+    # Ponderación final (mismo orden de suma que score_normalized)
+    score = sum(scores[key] * WEIGHTS[key] for key in WEIGHTS)
+    return round(score, 4)
+
+
+# -------------------------
+# 🔹 ÍNDICE DEL CATÁLOGO
+# -------------------------
+
+class CatalogIndex:
+    def __init__(self, books: List[IndexedBook], vocabularies: Dict[str, TagVocabulary],
+                 personality_signatures: List[tuple], version: str, skipped: int = 0,
+                 postings: Optional[Dict] = None, personality_columns: Optional[List] = None,
+                 vectors: Optional[VectorCatalog] = None, field_options: Optional[Dict[str, List[str]]] = None):
+        # postings / personality_columns / vectors / field_options llegan ya calculados al cargar un snapshot
+        self.books = books
+        self.vocabularies = vocabularies
+        self.version = version
+        self.skipped = skipped  # Documentos descartados por no validar como BookOut
+        self.postings = postings if postings is not None else build_postings(books, vocabularies)
+        self.personality_signatures = personality_signatures
+        self.personality_columns = (personality_columns if personality_columns is not None
+                                    else build_personality_columns(personality_signatures))
+        self._vectors = vectors
+        self.field_options = FieldOptions(field_options or {})  # Opciones de los formularios (/api/field-options)
+        self.info: Dict = {"source": "documents"}  # Origen y tiempos de construcción / carga
+
+    @property
+    def vectors(self) -> VectorCatalog:
+        # Matrices del motor NumPy, construidas la primera vez que se usan
+        if self._vectors is None:
+            self._vectors = VectorCatalog.from_features([self.decode(entry.book_id) for entry in self.books])
+        return self._vectors
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Dict]) -> "CatalogIndex":
+        started = time.perf_counter()
+        normalized = []
+        valid_documents = []
+        skipped = 0
+        digest = hashlib.sha1()
+
+        for doc in documents:
+            try:
+                payload = BookOut(**doc)
+            except ValidationError:
+                skipped += 1
+                continue
+            digest.update(json.dumps(doc, sort_keys=True, default=str).encode("utf-8"))
+            normalized.append((normalize_book(doc), book_json(payload)))
+            valid_documents.append(doc)
+
+        vocabularies = {
+            field: TagVocabulary.from_counts(Counter(tag for book_data, _ in normalized for tag in book_data[field]))
+            for field in MATCH_FIELDS
+        }
+        signatures = {}
+        books = [
+            IndexedBook(book_id, encode_features(book_data, vocabularies, signatures), raw=raw)
+            for book_id, (book_data, raw) in enumerate(normalized)
+        ]
+        catalog = cls(books, vocabularies, list(signatures), digest.hexdigest()[:16], skipped,
+                      field_options=collect_field_options(valid_documents))
+        catalog.info["build_seconds"] = round(time.perf_counter() - started, 4)
+        return catalog
+
+    def encode_query(self, user_data: Dict, personality) -> Dict:
+        # El denominador de Jaccard incluye los tags del perfil ausentes del catálogo
+        query = {field: self.vocabularies[field].encode(user_data[field]) for field in MATCH_FIELDS}
+        query["sizes"] = {field: max(len(user_data[field]), 1) for field in MATCH_FIELDS}
+        for field in ("tone", "style", "age_range"):
+            query[field] = user_data[field]
+        # Columna precalculada de personality_match para la clase del perfil
+        query["personality"] = self.personality_columns[personality_class(personality)]
+        return query
+
+    def decode(self, book_id: int) -> Dict:
+        # Reconstruye el formato de recommender.normalize_book (explicaciones, motor NumPy)
+        features = self.books[book_id].features
+        book_data = dict(features)
+        for field in MATCH_FIELDS:
+            book_data[field] = self.vocabularies[field].decode(features[field])
+        book_data["personality_match"] = self.personality_signatures[features["personality_match"]]
+        return book_data
+
+    def candidates(self, user_data: Dict) -> List[int]:
+        # Unión de las listas de los tags del perfil: libros con al menos una coincidencia
+        matched = set()
+        for field in MATCH_FIELDS:
+            postings = self.postings[field]
+            for tag in user_data[field]:
+                matched.update(postings.get(tag, ()))
+        return sorted(matched)
+
+
+# -------------------------
+# 🔹 ÍNDICE INVERTIDO (tag normalizado → ids ordenados)
+# -------------------------
+
+def build_postings(books: List[IndexedBook], vocabularies: Dict[str, TagVocabulary]) -> Dict[str, Dict[str, List[int]]]:
+    postings = {field: {} for field in MATCH_FIELDS}
+    for entry in books:
+        for field in MATCH_FIELDS:
+            for tag in vocabularies[field].decode(entry.features[field]):
+                postings[field].setdefault(tag, []).append(entry.book_id)
+    return postings
+
+
+# -------------------------
+# 🔹 TABLA DE PERSONALIDAD (clase de personalidad → puntuación por firma de tags)
+# -------------------------
+
+def build_personality_columns(signatures: List[tuple]) -> List[List[float]]:
+    rows = [personality_scores_by_class(tags) for tags in signatures]
+    return [[row[class_id] for row in rows] for class_id in range(PERSONALITY_CLASSES)]
+
+
+# -------------------------
+# 🔹 CATÁLOGO RESIDENTE EN EL PROCESO
+# -------------------------
+
+# Cada cuántos segundos se comprueba si una importación publicó una versión nueva
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "30"))
+
+# Con un directorio de snapshots (ver snapshot.py) el catálogo se carga del snapshot publicado en CURRENT
+# en lugar de MongoDB; en modo compartido las matrices mapeadas son las mismas páginas para todos los workers
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+CATALOG_SNAPSHOT_SHARED = os.getenv("CATALOG_SNAPSHOT_SHARED", "1") == "1"
+CURRENT_FILE = "CURRENT"
+
+_catalog: Optional[CatalogIndex] = None
+_source_version: Optional[str] = None  # Versión publicada (catalog_meta o snapshot) con la que se construyó _catalog
+_checked_at = 0.0
+_refresh_task: Optional[asyncio.Task] = None
+
+async def build_catalog(db) -> CatalogIndex:
+    documents = await db["books"].find({}, CATALOG_PROJECTION).to_list(None)
+    # La construcción del índice es CPU: fuera del event loop
+    return await run_in_threadpool(CatalogIndex.from_documents, documents)
+
+def current_snapshot(directory=None) -> Optional[Path]:
+    # Versión publicada: CURRENT se sustituye de forma atómica al terminar de escribir cada snapshot
+    directory = Path(directory if directory is not None else CATALOG_SNAPSHOT_DIR)
+    pointer = directory / CURRENT_FILE
+    if not str(directory) or not pointer.exists():
+        return None
+    path = directory / pointer.read_text(encoding="utf-8").strip()
+    return path if (path / "manifest.json").exists() else None
+
+async def published_version(db) -> Optional[str]:
+    # Snapshot publicado (si hay directorio configurado) o versión de catalog_meta en MongoDB
+    snapshot = current_snapshot() if CATALOG_SNAPSHOT_DIR else None
+    return snapshot.name if snapshot is not None else await catalog_version(db)
+
+async def load_catalog(db) -> CatalogIndex:
+    snapshot = current_snapshot() if CATALOG_SNAPSHOT_DIR else None
+    if snapshot is not None:
+        from book_recommender_api.app.snapshot import load_snapshot  # snapshot.py importa este módulo
+        try:
+            catalog = await run_in_threadpool(load_snapshot, snapshot, CATALOG_SNAPSHOT_SHARED)
+        except (ValueError, KeyError, OSError) as e:
+            # Formato antiguo o directorio incompleto: se reconstruye desde MongoDB. Se anota la versión
+            # publicada para no reintentar en cada comprobación hasta que se publique otro snapshot.
+            logger.warning("No se pudo cargar el snapshot %s (%s); se construye el índice desde MongoDB", snapshot, e)
+            catalog = await build_catalog(db)
+        set_catalog(catalog, snapshot.name)
+        return catalog
+
+    # La versión se lee antes que los libros: una importación intermedia se detecta en la siguiente comprobación
+    source_version = await catalog_version(db)
+    catalog = await build_catalog(db)
+    set_catalog(catalog, source_version)
+    return catalog
+
+def current_catalog() -> Optional[CatalogIndex]:
+    # Índice residente sin disparar carga ni comprobación de versión (métricas, diagnósticos)
+    return _catalog
+
+def set_catalog(catalog: Optional[CatalogIndex], source_version: Optional[str] = None) -> None:
+    global _catalog, _source_version, _checked_at
+    _catalog = catalog
+    _source_version = source_version
+    _checked_at = time.monotonic()
+
+async def refresh_if_stale(db) -> Optional[asyncio.Task]:
+    # Si hay una versión nueva, el índice se reconstruye en segundo plano;
+    # mientras tanto las peticiones siguen usando el anterior (el cambio es un swap de referencia)
+    global _checked_at, _refresh_task
+    _checked_at = time.monotonic()
+    try:
+        latest = await published_version(db)
+    except PyMongoError:
+        return None
+    if latest != _source_version and (_refresh_task is None or _refresh_task.done()):
+        _refresh_task = asyncio.create_task(load_catalog(db))
+    return _refresh_task
+
+# Dependencia FastAPI: se construye una sola vez; las peticiones posteriores reutilizan el índice
+async def get_catalog(db=Depends(get_database)) -> CatalogIndex:
+    global _refresh_task
+    if _catalog is None:
+        # Las peticiones en frío comparten una única carga en curso (shield: cancelar una petición no la aborta)
+        if _refresh_task is None or _refresh_task.done():
+            _refresh_task = asyncio.create_task(load_catalog(db))
+        await asyncio.shield(_refresh_task)
+    elif time.monotonic() - _checked_at >= CATALOG_REFRESH_INTERVAL:
+        await refresh_if_stale(db)
+    return _catalog
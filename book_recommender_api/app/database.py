@@ -1,18 +1,202 @@
-# ✅ database.py
-from pymongo import MongoClient
+# ✅ database.py — Cliente MongoDB único por proceso (creado en el lifespan de FastAPI)
+from pymongo import MongoClient, monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from book_recommender_api.app.memory_db import InMemoryClient
+
+# Único load_dotenv() de la aplicación: el resto de módulos lee la configuración de aquí
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = MongoClient(MONGO_URI)
-db = client["book_recommender"]
+DB_NAME = "book_recommender"
+
+# Tamaño del pool de conexiones y timeouts (milisegundos; vacío = valor por defecto de pymongo)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_TIMEOUTS = {
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    "socketTimeoutMS": "MONGO_SOCKET_TIMEOUT_MS"
+}
+# Selección de servidor en la carga inicial: sin MongoDB el worker arranca en degradado sin esperar ~30 s
+MONGO_STARTUP_TIMEOUT_MS = int(os.getenv("MONGO_STARTUP_TIMEOUT_MS", "2000"))
+
+
+# -------------------------
+# 🔹 MÉTRICAS DEL POOL (eventos CMAP de pymongo)
+# -------------------------
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    # Conexiones en uso, abiertas y tiempo de espera en el checkout, por proceso
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits = deque(maxlen=window)  # Últimas esperas (ms) para los percentiles
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.open = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self._waits.clear()
+
+    # El checkout empieza y termina en el mismo hilo (Motor ejecuta pymongo en su executor)
+    def connection_check_out_started(self, event) -> None:
+        self._local.started = time.perf_counter()
+
+    def _record_wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return 0.0 if started is None else (time.perf_counter() - started) * 1000
+
+    def connection_checked_out(self, event) -> None:
+        wait = self._record_wait()
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_total_ms += wait
+            self.wait_max_ms = max(self.wait_max_ms, wait)
+            self._waits.append(wait)
+
+    def connection_check_out_failed(self, event) -> None:
+        self._record_wait()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self.open -= 1
+
+    # El resto de eventos CMAP no afecta a las métricas
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
 
-# Devuelve el objeto base de la base de datos
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            percentile = lambda q: round(waits[min(int(q * len(waits)), len(waits) - 1)], 3) if waits else 0.0
+            return {
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "min_pool_size": MONGO_MIN_POOL_SIZE,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "open": self.open,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_ms": {
+                    "mean": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                    "p50": percentile(0.50),
+                    "p99": percentile(0.99),
+                    "max": round(self.wait_max_ms, 3)
+                }
+            }
+
+pool_metrics = PoolMetrics()
+
+def client_options() -> Dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "event_listeners": [pool_metrics]
+    }
+    for option, env_var in MONGO_TIMEOUTS.items():
+        if os.getenv(env_var):
+            options[option] = int(os.getenv(env_var))
+    return options
+
+
+# -------------------------
+# 🔹 ACCESO SÍNCRONO (scripts de utils/)
+# -------------------------
+
+_client = None
+
+# Devuelve el objeto base de la base de datos (cliente síncrono: scripts de utils/)
 def get_db():
-    return db
+    global _client
+    if _client is None:
+        _client = MongoClient(MONGO_URI, **client_options())
+    return _client[DB_NAME]
 
 # Devuelve directamente la colección de libros
 def get_books_collection():
-    return db["books"]
+    return get_db()["books"]
+
+
+# -------------------------
+# 🔹 ACCESO ASÍNCRONO (routers)
+# -------------------------
+
+_async_client: Optional[AsyncIOMotorClient] = None
+
+def get_async_client():
+    # Lo crea el lifespan de main.py; fuera de él (scripts, TestClient sin "with") se crea al primer uso.
+    # MONGO_URI=memory:// usa el sustituto en memoria (tests / CI sin MongoDB)
+    global _async_client
+    if _async_client is None:
+        if MONGO_URI.startswith("memory://"):
+            _async_client = InMemoryClient()
+        else:
+            _async_client = AsyncIOMotorClient(MONGO_URI, **client_options())
+    return _async_client
+
+def close_async_client() -> None:
+    # Cierre del lifespan: libera el pool y los hilos de monitorización
+    global _async_client
+    if _async_client is not None:
+        _async_client.close()
+        _async_client = None
+
+@contextmanager
+def startup_database():
+    # Cliente de un solo uso para el lifespan, con la selección de servidor acotada;
+    # sin el listener del pool: sus conexiones no cuentan en /health/pool
+    if MONGO_URI.startswith("memory://"):
+        yield get_async_client()[DB_NAME]
+        return
+    options = {**client_options(), "serverSelectionTimeoutMS": MONGO_STARTUP_TIMEOUT_MS}
+    options.pop("event_listeners")
+    client = AsyncIOMotorClient(MONGO_URI, **options)
+    try:
+        yield client[DB_NAME]
+    finally:
+        client.close()
+
+# Dependencia FastAPI: los tests la sustituyen con app.dependency_overrides
+async def get_database():
+    return get_async_client()[DB_NAME]
@@ -1,47 +1,64 @@
 # book_recommender_api/app/explain.py
-from fastapi import APIRouter, HTTPException
-from book_recommender_api.app.database import get_db  # ✅
-from .recommender import compute_score
+from fastapi import APIRouter, Depends, HTTPException
+import heapq
+from pydantic import ValidationError
+from book_recommender_api.app.database import get_database  # ✅
+from book_recommender_api.app.models import FullProfile
+from book_recommender_api.app.catalog import CatalogIndex, get_catalog, score_entry
+from .recommender import normalize_profile, score_normalized
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
 
 router = APIRouter()
 
-def get_user_profile(user_id):
-    db = get_db()
-    return db["profiles"].find_one({"_id": ObjectId(user_id)})
+async def get_user_profile(db, user_id):
+    # Los perfiles completos se guardan en "users" (ver user_controller.save_user_profile)
+    try:
+        return await db["users"].find_one({"_id": ObjectId(user_id)})
+    except InvalidId:
+        return None
 
 @router.get("/explain-recommendation")
-def explain_recommendation(user_id: str):
-    db = get_db()
-    user = get_user_profile(user_id)
+async def explain_recommendation(user_id: str, db=Depends(get_database),
+                                 catalog: CatalogIndex = Depends(get_catalog)):
+    user = await get_user_profile(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
-    books = list(db["books"].find())
-    explanations = []
+    try:
+        profile = FullProfile.parse_obj(user)
+    except ValidationError:
+        raise HTTPException(status_code=422, detail="El perfil del usuario está incompleto")
+
+    # Una sola pasada de puntuación sobre el índice + selección de los 5 mejores
+    user_data = normalize_profile(profile)
+    query = catalog.encode_query(user_data, profile.personality)
+    scored = ((score_entry(query, entry.features), entry.book_id) for entry in catalog.books)
+    top_books = heapq.nlargest(5, scored, key=lambda x: (x[0], -x[1]))  # top 5 libros recomendados
 
-    for book in books:
-        score, matches = compute_score(user, book, explain=True)
-        explanation = generate_explanation(book, matches)
+    explanations = []
+    for _, book_id in top_books:
+        score, breakdown = score_normalized(user_data, catalog.decode(book_id), profile.personality, explain=True)
         explanations.append({
-            "book": book["title"],
+            "book": catalog.books[book_id].payload.title,
             "score": round(score, 2),
-            "matched": matches,
-            "explanation": explanation
+            "matched": breakdown.matched,
+            "explanation": generate_explanation(breakdown.matched)
         })
 
-    explanations.sort(key=lambda x: x["score"], reverse=True)
-    return explanations[:5]  # top 5 libros recomendados
+    return explanations
 
-def generate_explanation(book, matches):
+def generate_explanation(matches):
     parts = []
     if matches.get("genres"):
         parts.append(f"por incluir los géneros {', '.join(matches['genres'])}")
-    if matches.get("emotions"):
-        parts.append(f"por evocar emociones como {', '.join(matches['emotions'])}")
+    if matches.get("emotion_tags"):
+        parts.append(f"por evocar emociones como {', '.join(matches['emotion_tags'])}")
     if matches.get("style"):
         parts.append(f"por tener un estilo narrativo {matches['style']}")
     if matches.get("personality_tags"):
         parts.append(f"por coincidir con tu perfil psicológico: {', '.join(matches['personality_tags'])}")
 
+    if not parts:
+        return "Este libro fue seleccionado por afinidad general con tu perfil."
     return "Este libro fue seleccionado " + ", ".join(parts) + "."
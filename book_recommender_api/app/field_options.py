@@ -0,0 +1,38 @@
+# ✅ field_options.py — Valores distintos por campo (opciones de los formularios), una vez por versión del catálogo
+
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional
+
+# Misma normalización que utils/field_loader y utils/normalize_and_clean_genres (separadores unificados, sin puntuación)
+from book_recommender_api.utils.normalize_and_clean_genres import normalize as normalize_option
+
+# Campos que ofrecen los formularios (Streamlit y otros clientes)
+OPTION_FIELDS = ["genres", "themes", "tone", "style", "emotion_tags", "age_range", "language"]
+
+
+def collect_field_options(books: Iterable[Dict]) -> Dict[str, List[str]]:
+    fields = {field: set() for field in OPTION_FIELDS}
+    for book in books:
+        for field in OPTION_FIELDS:
+            value = book.get(field)
+            values = value if isinstance(value, list) else [value]
+            fields[field].update(norm for norm in map(normalize_option, values) if norm)
+    return {field: sorted(values) for field, values in fields.items()}
+
+
+class FieldOptions:
+    # Artefacto listo para servir: cuerpo JSON serializado una vez y su ETag (hash del contenido)
+    __slots__ = ("options", "body", "etag")
+
+    def __init__(self, options: Dict[str, List[str]]):
+        self.options = options
+        self.body = json.dumps(options, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        # If-None-Match: lista de ETags separados por comas; "*" o la variante débil (W/) también valen
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
@@ -1,9 +1,9 @@
 # ✅ main.py — Punto de entrada de la API
 
-from fastapi import FastAPI
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import Response
 
 # ✅ Routers de cada módulo
 from book_recommender_api.app.quiz import router as quiz_router
@@ -12,20 +12,48 @@ from book_recommender_api.app.explain import router as explain_router
 from book_recommender_api.app.profile import router as profile_router
 from book_recommender_api.app.books_controller import router as books_router
 from book_recommender_api.app.user_controller import router as user_router
+from book_recommender_api.app.admin import router as admin_router, RequestProfilerMiddleware
+from book_recommender_api.app import books_controller
+from book_recommender_api.app.catalog import current_catalog, load_catalog
+from book_recommender_api.app.repository import ensure_normalized_fields
+from book_recommender_api.app.cache import recommendation_cache
+from book_recommender_api.app.metrics import CONTENT_TYPE, Gauge, MetricsMiddleware, registry
+from book_recommender_api.app.database import (
+    get_async_client, close_async_client, get_database, pool_metrics, startup_database
+)
+from pymongo.errors import PyMongoError
 
-# ✅ Cargar variables de entorno
-load_dotenv()
+# ✅ Un solo cliente MongoDB por proceso: se abre al arrancar y se cierra al apagar
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_async_client()
+    try:
+        # Cargar el índice del catálogo una sola vez al arrancar (del snapshot publicado si
+        # CATALOG_SNAPSHOT_DIR está configurado: arrays mapeados y compartidos entre workers).
+        # Con timeout corto de selección de servidor: sin MongoDB el worker no retrasa el arranque
+        with startup_database() as db:
+            await load_catalog(db)
+            # Los motores de base de datos necesitan las copias normalizadas en todos los libros
+            if books_controller.RECOMMENDER_ENGINE in books_controller.DATABASE_ENGINES:
+                await ensure_normalized_fields(db)
+    except PyMongoError:
+        # Sin MongoDB el índice se construirá en la primera recomendación
+        pass
+    yield
+    close_async_client()
 
 # ✅ Crear aplicación FastAPI
 app = FastAPI(
     title="Book Recommender API",
     version="0.1.0",
-    description="API para recomendar libros personalizados en base a perfil psicológico y gustos literarios."
+    description="API para recomendar libros personalizados en base a perfil psicológico y gustos literarios.",
+    lifespan=lifespan
 )
 
-# ✅ Conexión MongoDB para comprobación de estado
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = MongoClient(MONGO_URI)
+# ✅ Peticiones y latencia por ruta (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+# ✅ Perfilado de una petición con ?profile=1 (solo administración)
+app.add_middleware(RequestProfilerMiddleware)
 
 # ✅ Registrar routers
 app.include_router(quiz_router, prefix="/quiz", tags=["Quiz"])
@@ -34,17 +62,18 @@ app.include_router(explain_router, prefix="/explain", tags=["Explain Recommendat
 app.include_router(profile_router, prefix="/profile", tags=["User Profile"])
 app.include_router(books_router, prefix="/api", tags=["Book Recommendation"])
 app.include_router(user_router, prefix="/api/users", tags=["User Preferences"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 # ✅ Endpoint raíz
 @app.get("/")
-def root():
+async def root():
     return {"message": "API de Recomendación de Libros activa"}
 
 # ✅ Endpoint de comprobación de salud
 @app.get("/health")
-def health_check():
+async def health_check(db=Depends(get_database)):
     try:
-        client.admin.command("ping")
+        await db.command("ping")
         return {"status": "ok", "mongodb": "conectado"}
     except Exception as e:
         return {
@@ -52,3 +81,25 @@ def health_check():
             "mongodb": "no conectado",
             "error": str(e)
         }
+
+# ✅ Estado del pool de conexiones (saturación, esperas en el checkout)
+@app.get("/health/pool")
+async def pool_health():
+    return pool_metrics.stats()
+
+# ✅ Métricas para Prometheus: rutas, etapas de la recomendación, catálogo, pool y caché
+registry.register(Gauge("catalog_books", "Libros en el índice residente",
+                        lambda: len(current_catalog()) if current_catalog() is not None else None))
+registry.register(Gauge("mongo_pool_connections_in_use", "Conexiones del pool en uso", lambda: pool_metrics.in_use))
+registry.register(Gauge("mongo_pool_connections_open", "Conexiones abiertas del pool", lambda: pool_metrics.open))
+registry.register(Gauge("mongo_pool_checkouts_total", "Checkouts del pool", lambda: pool_metrics.checkouts, "counter"))
+registry.register(Gauge("mongo_pool_checkout_failures_total", "Checkouts fallidos del pool",
+                        lambda: pool_metrics.checkout_failures, "counter"))
+registry.register(Gauge("recommendation_cache_hits_total", "Aciertos de la caché de rankings",
+                        lambda: recommendation_cache.hits, "counter"))
+registry.register(Gauge("recommendation_cache_misses_total", "Fallos de la caché de rankings",
+                        lambda: recommendation_cache.misses, "counter"))
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,237 @@
+# ✅ memory.py — Huella de memoria de las estructuras en proceso (catálogo, índices, vocabularios, caché)
+#
+# - Tamaño profundo por estructura (sys.getsizeof recursivo; cada objeto se cuenta una sola vez,
+#   así los strings compartidos/internados no se duplican). Los arrays mapeados de un snapshot
+#   se informan aparte (mapped_bytes): viven en el page cache, no en el heap del worker.
+# - Comparación con los documentos JSON originales: bytes en disco, objetos Python equivalentes,
+#   coste de 'subjects' y de los strings repetidos.
+# - tracemalloc: si el proceso arrancó con PYTHONTRACEMALLOC=1, memoria trazada y principales líneas.
+#
+# Uso: python -m book_recommender_api.app.memory [--from-file data/books.json] [--snapshot DIR]
+
+import argparse
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from types import FunctionType, ModuleType
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from book_recommender_api.app.repository import NORMALIZED_FIELDS, PERSONALITY_NORM
+
+TOP_ALLOCATIONS = 10
+DATASET_PATH = Path(__file__).resolve().parent.parent / "data" / "books_openlibrary_enriched.json"
+# Documento tal y como se importó: sin _id ni las copias normalizadas que añade la importación
+SOURCE_PROJECTION = {"_id": 0, PERSONALITY_NORM: 0, **{stored: 0 for stored in NORMALIZED_FIELDS.values()}}
+
+_ATOMIC = (str, bytes, int, float, bool, type(None))
+_SKIPPED = (type, ModuleType, FunctionType)
+
+
+# -------------------------
+# 🔹 TAMAÑO PROFUNDO
+# -------------------------
+
+class SizeCounter:
+    # Recorrido iterativo (sin recursión) con un conjunto de ids ya contados compartido entre estructuras
+    def __init__(self):
+        self.seen = set()
+
+    def measure(self, obj) -> Dict[str, int]:
+        heap = mapped = 0
+        stack = [obj]
+        while stack:
+            item = stack.pop()
+            if id(item) in self.seen or isinstance(item, _SKIPPED):
+                continue
+            self.seen.add(id(item))
+
+            if isinstance(item, np.ndarray):
+                if isinstance(item, np.memmap) or isinstance(item.base, np.memmap):
+                    heap += sys.getsizeof(item) - (item.nbytes if item.flags.owndata else 0)
+                    mapped += item.nbytes
+                else:
+                    heap += sys.getsizeof(item)
+                    if item.base is not None:
+                        stack.append(item.base)
+                continue
+
+            heap += sys.getsizeof(item)
+            if isinstance(item, _ATOMIC):
+                continue
+            if isinstance(item, dict):
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                stack.extend(item)
+            else:
+                if hasattr(item, "__dict__"):
+                    stack.append(item.__dict__)
+                for cls in type(item).__mro__:
+                    for slot in getattr(cls, "__slots__", ()):
+                        if hasattr(item, slot):
+                            stack.append(getattr(item, slot))
+        return {"heap_bytes": heap, "mapped_bytes": mapped}
+
+def deep_sizeof(obj) -> int:
+    return SizeCounter().measure(obj)["heap_bytes"]
+
+
+# -------------------------
+# 🔹 ESTRUCTURAS DEL PROCESO
+# -------------------------
+
+def catalog_structures(catalog) -> Dict[str, object]:
+    # Orden de atribución: lo compartido (tags) se cuenta en la primera estructura que lo referencia
+    return {
+        "vocabularies": catalog.vocabularies,
+        "books": catalog.books,
+        "postings": catalog.postings,
+        "personality": (catalog.personality_signatures, catalog.personality_columns),
+        "vectors": catalog._vectors,  # None hasta que el motor numpy lo construye
+        "field_options": catalog.field_options
+    }
+
+def structures_report(catalog=None, cache=None) -> Dict:
+    counter = SizeCounter()
+    structures = {}
+    if catalog is not None:
+        for name, structure in catalog_structures(catalog).items():
+            structures[f"catalog.{name}"] = counter.measure(structure)
+    if cache is not None:
+        structures["recommendation_cache"] = counter.measure(cache._entries)
+    return {
+        "catalog_version": getattr(catalog, "version", None),
+        "books": len(catalog) if catalog is not None else 0,
+        "structures": structures,
+        "total_heap_bytes": sum(sizes["heap_bytes"] for sizes in structures.values()),
+        "total_mapped_bytes": sum(sizes["mapped_bytes"] for sizes in structures.values())
+    }
+
+
+# -------------------------
+# 🔹 COMPARACIÓN CON LOS DOCUMENTOS JSON
+# -------------------------
+
+class DocumentStats:
+    # Se alimenta documento a documento (cursor asíncrono o archivo): sin cargar la colección entera
+    def __init__(self):
+        self.documents = 0
+        self.raw_json_bytes = 0
+        self.subjects_json_bytes = 0
+        self.python_bytes = 0
+        self.python_subjects_bytes = 0
+        self.string_bytes = 0
+        self._distinct: Dict[str, int] = {}
+
+    def _strings(self, value):
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                yield from self._strings(item)
+
+    def add(self, doc: Dict) -> None:
+        self.documents += 1
+        raw = len(json.dumps(doc, ensure_ascii=False, default=str).encode("utf-8"))
+        self.raw_json_bytes += raw
+        if "subjects" in doc:
+            without = {key: value for key, value in doc.items() if key != "subjects"}
+            self.subjects_json_bytes += raw - len(json.dumps(without, ensure_ascii=False, default=str).encode("utf-8"))
+            self.python_subjects_bytes += deep_sizeof(doc["subjects"])
+        # Como json.loads: cada documento tiene sus propios objetos
+        self.python_bytes += deep_sizeof(doc)
+        for value in doc.values():
+            for text in self._strings(value):
+                size = sys.getsizeof(text)
+                self.string_bytes += size
+                self._distinct.setdefault(text, size)
+
+    def extend(self, docs: Iterable[Dict]) -> None:
+        for doc in docs:
+            self.add(doc)
+
+    def report(self) -> Dict:
+        distinct_bytes = sum(self._distinct.values())
+        return {
+            "documents": self.documents,
+            "raw_json_bytes": self.raw_json_bytes,
+            "subjects_json_bytes": self.subjects_json_bytes,
+            "python_objects_bytes": self.python_bytes,
+            "python_subjects_bytes": self.python_subjects_bytes,
+            "string_values_bytes": self.string_bytes,
+            "distinct_strings": len(self._distinct),
+            # Lo que se ahorraría con una sola copia de cada string repetido
+            "duplicate_string_bytes": self.string_bytes - distinct_bytes
+        }
+
+def document_stats(documents: Iterable[Dict]) -> Dict:
+    stats = DocumentStats()
+    stats.extend(documents)
+    return stats.report()
+
+def compare_with_documents(report: Dict, documents: Dict) -> Dict:
+    raw = documents["raw_json_bytes"]
+    return {
+        "catalog_vs_raw_json": round(report["total_heap_bytes"] / raw, 3) if raw else None,
+        "python_documents_vs_raw_json": round(documents["python_objects_bytes"] / raw, 3) if raw else None,
+        "subjects_share_of_python_documents": (round(documents["python_subjects_bytes"] / documents["python_objects_bytes"], 3)
+                                               if documents["python_objects_bytes"] else None)
+    }
+
+
+# -------------------------
+# 🔹 TRACEMALLOC
+# -------------------------
+
+def tracemalloc_report(top: int = TOP_ALLOCATIONS) -> Dict:
+    if not tracemalloc.is_tracing():
+        return {"tracing": False, "hint": "Arrancar el proceso con PYTHONTRACEMALLOC=1"}
+    current, peak = tracemalloc.get_traced_memory()
+    stats = tracemalloc.take_snapshot().statistics("lineno")[:top]
+    return {
+        "tracing": True,
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [{"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count} for stat in stats]
+    }
+
+def memory_report(catalog=None, cache=None, documents: Optional[Dict] = None, top: int = TOP_ALLOCATIONS) -> Dict:
+    report = structures_report(catalog, cache)
+    if documents is not None:
+        report["documents"] = documents
+        report["comparison"] = compare_with_documents(report, documents)
+    report["tracemalloc"] = tracemalloc_report(top)
+    return report
+
+
+# ---------------------------
+# 🚀 Ejecutar: mide con tracemalloc la carga real de los documentos y del índice
+# ---------------------------
+if __name__ == "__main__":
+    from book_recommender_api.app.catalog import CatalogIndex
+    from book_recommender_api.app.snapshot import load_snapshot
+    from book_recommender_api.utils.records import read_records
+
+    parser = argparse.ArgumentParser(description="Huella de memoria del catálogo frente a los documentos JSON")
+    parser.add_argument("--from-file", default=DATASET_PATH)
+    parser.add_argument("--snapshot", help="Directorio de una versión del snapshot (en lugar de construir el índice)")
+    parser.add_argument("--top", type=int, default=TOP_ALLOCATIONS)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    documents = list(read_records(args.from_file))
+    loaded = tracemalloc.take_snapshot()
+    catalog = load_snapshot(args.snapshot) if args.snapshot else CatalogIndex.from_documents(documents)
+    built = tracemalloc.take_snapshot()
+
+    report = memory_report(catalog, documents=document_stats(documents), top=args.top)
+    report["measured"] = {
+        # Diferencias de tracemalloc: lo que realmente se asignó al cargar y al construir
+        "documents_loaded_bytes": sum(stat.size_diff for stat in loaded.compare_to(before, "filename")),
+        "catalog_built_bytes": sum(stat.size_diff for stat in built.compare_to(loaded, "filename"))
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
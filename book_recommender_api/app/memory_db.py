@@ -0,0 +1,345 @@
+# ✅ memory_db.py — Sustituto en memoria de la base de datos asíncrona (tests / desarrollo sin MongoDB)
+#
+# Implementa el subconjunto de la API de Motor que usan los routers:
+# find / find_one / insert_one / insert_many / update_one / delete_many / count_documents / drop / rename,
+# cursores con sort / skip / limit / batch_size / to_list / iteración asíncrona y db.command("ping"),
+# además de aggregate() con las etapas y expresiones del motor "aggregate" (repository.score_pipeline).
+
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+
+
+# -------------------------
+# 🔹 FILTROS Y PROYECCIONES
+# -------------------------
+
+def _get_field(doc: Dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None, False
+        value = value[part]
+    return value, True
+
+def _compare(value, op: str, operand) -> bool:
+    if op == "$eq":
+        return value == operand or (isinstance(value, list) and operand in value)
+    if op == "$ne":
+        return not _compare(value, "$eq", operand)
+    if op == "$in":
+        values = value if isinstance(value, list) else [value]
+        return any(v in operand for v in values)
+    if op == "$nin":
+        return not _compare(value, "$in", operand)
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise NotImplementedError(f"Operador no soportado en memoria: {op}")
+
+def matches(doc: Dict, query: Optional[Dict]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+            continue
+
+        value, exists = _get_field(doc, key)
+        if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            for op, operand in condition.items():
+                if op == "$exists":
+                    if bool(operand) != exists:
+                        return False
+                elif not _compare(value, op, operand):
+                    return False
+        elif not _compare(value, "$eq", condition):
+            return False
+    return True
+
+def project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include_id = projection.get("_id", 1)
+    fields = {key: flag for key, flag in projection.items() if key != "_id"}
+    if any(fields.values()):
+        result = {key: copy.deepcopy(doc[key]) for key, flag in fields.items() if flag and key in doc}
+    else:
+        result = {key: copy.deepcopy(value) for key, value in doc.items() if key not in fields}
+    if include_id and "_id" in doc:
+        result["_id"] = doc["_id"]
+    else:
+        result.pop("_id", None)
+    return result
+
+
+# -------------------------
+# 🔹 EXPRESIONES DE AGREGACIÓN
+# -------------------------
+
+def evaluate(expr, doc: Dict, variables: Optional[Dict] = None):
+    variables = variables or {}
+    if isinstance(expr, str):
+        if expr.startswith("$$"):
+            name, _, path = expr[2:].partition(".")
+            value = variables[name]
+            return _get_field(value, path)[0] if path else value
+        if expr.startswith("$"):
+            return _get_field(doc, expr[1:])[0]
+        return expr
+    if isinstance(expr, list):
+        return [evaluate(item, doc, variables) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if not (len(expr) == 1 and next(iter(expr)).startswith("$")):
+        return {key: evaluate(value, doc, variables) for key, value in expr.items()}
+
+    op, args = next(iter(expr.items()))
+    if op == "$literal":
+        return args
+    if op == "$cond":
+        condition, then, otherwise = args if isinstance(args, list) else (args["if"], args["then"], args["else"])
+        return evaluate(then if evaluate(condition, doc, variables) else otherwise, doc, variables)
+    if op == "$switch":
+        for branch in args["branches"]:
+            if evaluate(branch["case"], doc, variables):
+                return evaluate(branch["then"], doc, variables)
+        return evaluate(args["default"], doc, variables)
+    if op == "$map":
+        items = evaluate(args["input"], doc, variables) or []
+        name = args.get("as", "this")
+        return [evaluate(args["in"], doc, {**variables, name: item}) for item in items]
+
+    values = evaluate(args, doc, variables) if isinstance(args, list) else [evaluate(args, doc, variables)]
+    if op == "$ifNull":
+        return next((value for value in values if value is not None), values[-1])
+    if op == "$size":
+        return len(values[0])
+    if op == "$setIntersection":
+        common = set(values[0]).intersection(*values[1:])
+        return [value for value in dict.fromkeys(values[0]) if value in common]
+    if op == "$eq":
+        return values[0] == values[1]
+    if op == "$ne":
+        return values[0] != values[1]
+    if op == "$and":
+        return all(values)
+    if op == "$or":
+        return any(values)
+    if op == "$add":
+        total = 0
+        for value in values:
+            total += value
+        return total
+    if op == "$multiply":
+        product = 1
+        for value in values:
+            product *= value
+        return product
+    if op == "$divide":
+        return values[0] / values[1]
+    if op == "$sum":
+        items = values[0] if len(values) == 1 and isinstance(values[0], list) else values
+        return sum(value for value in items if isinstance(value, (int, float)))
+    if op == "$round":
+        return round(values[0], values[1] if len(values) > 1 else 0)
+    raise NotImplementedError(f"Expresión no soportada en memoria: {op}")
+
+def aggregate(docs: List[Dict], pipeline: List[Dict]) -> List[Dict]:
+    docs = [copy.deepcopy(doc) for doc in docs]
+    for stage in pipeline:
+        name, spec = next(iter(stage.items()))
+        if name == "$match":
+            docs = [doc for doc in docs if matches(doc, spec)]
+        elif name in ("$addFields", "$set"):
+            for doc in docs:
+                doc.update({key: evaluate(value, doc) for key, value in spec.items()})
+        elif name == "$sort":
+            for field, order in reversed(list(spec.items())):
+                docs.sort(key=lambda doc: _get_field(doc, field)[0], reverse=order < 0)
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$project":
+            docs = [project(doc, spec) for doc in docs]
+        else:
+            raise NotImplementedError(f"Etapa no soportada en memoria: {name}")
+    return docs
+
+
+# -------------------------
+# 🔹 CURSOR
+# -------------------------
+
+class InMemoryCursor:
+    def __init__(self, docs: List[Dict], projection: Optional[Dict] = None):
+        self._docs = docs
+        self._projection = projection
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction: int = 1) -> "InMemoryCursor":
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda doc: _get_field(doc, field)[0], reverse=order < 0)
+        return self
+
+    def skip(self, count: int) -> "InMemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, count: int) -> "InMemoryCursor":
+        # Sin red de por medio no hay lotes: se acepta por compatibilidad con Motor
+        return self
+
+    def _results(self) -> List[Dict]:
+        docs = self._docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        results = self._results()
+        return results if length is None else results[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+
+# -------------------------
+# 🔹 COLECCIÓN, BASE DE DATOS Y CLIENTE
+# -------------------------
+
+class InMemoryCollection:
+    def __init__(self, name: str, database: Optional["InMemoryDatabase"] = None):
+        self.name = name
+        self.database = database
+        self.docs: List[Dict] = []
+        self.indexes: List[Any] = []
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> InMemoryCursor:
+        return InMemoryCursor([doc for doc in self.docs if matches(doc, query)], projection)
+
+    def aggregate(self, pipeline: List[Dict]) -> InMemoryCursor:
+        return InMemoryCursor(aggregate(self.docs, pipeline))
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return project(doc, projection)
+        return None
+
+    async def insert_one(self, document: Dict):
+        document.setdefault("_id", ObjectId())
+        self.docs.append(copy.deepcopy(document))
+        return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    async def insert_many(self, documents: Iterable[Dict], ordered: bool = True):
+        inserted_ids = []
+        for document in documents:
+            result = await self.insert_one(document)
+            inserted_ids.append(result.inserted_id)
+        return SimpleNamespace(inserted_ids=inserted_ids, acknowledged=True)
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        for doc in self.docs:
+            if matches(doc, query):
+                before = copy.deepcopy(doc)
+                doc.update(copy.deepcopy(update.get("$set", {})))
+                modified = int(doc != before)
+                return SimpleNamespace(matched_count=1, modified_count=modified, upserted_id=None)
+        if upsert:
+            document = {key: value for key, value in query.items() if not key.startswith("$")}
+            document.update(update.get("$set", {}))
+            result = await self.insert_one(document)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=result.inserted_id)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    async def delete_many(self, query: Optional[Dict] = None):
+        remaining = [doc for doc in self.docs if not matches(doc, query)]
+        deleted = len(self.docs) - len(remaining)
+        self.docs = remaining
+        return SimpleNamespace(deleted_count=deleted)
+
+    async def count_documents(self, query: Optional[Dict] = None) -> int:
+        return sum(1 for doc in self.docs if matches(doc, query))
+
+    async def create_index(self, keys, **kwargs) -> str:
+        self.indexes.append((keys, kwargs))
+        return kwargs.get("name") or str(keys)
+
+    async def drop(self) -> None:
+        self.docs = []
+        self.indexes = []
+
+    async def rename(self, new_name: str, dropTarget: bool = False) -> None:
+        # Como renameCollection: el destino se sustituye de golpe, nunca queda vacío a medias
+        collections = self.database._collections
+        if collections.get(new_name) is not None and collections[new_name].docs and not dropTarget:
+            raise OperationFailure(f"target namespace exists: {new_name}")
+        collections.pop(self.name, None)
+        self.name = new_name
+        collections[new_name] = self
+
+
+class InMemoryDatabase:
+    def __init__(self, name: str = "book_recommender"):
+        self.name = name
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name, self)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, name: str, *args, **kwargs) -> Dict:
+        if name == "ping":
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Comando no soportado en memoria: {name}")
+
+    async def list_collection_names(self) -> List[str]:
+        return [name for name, collection in self._collections.items() if collection.docs]
+
+
+class InMemoryClient:
+    def __init__(self):
+        self._databases: Dict[str, InMemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> InMemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(name)
+        return self._databases[name]
+
+    @property
+    def admin(self) -> InMemoryDatabase:
+        return self["admin"]
+
+    def close(self) -> None:
+        pass
@@ -1,6 +1,6 @@
 # models.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conint, conlist
 from typing import List
 
 class Preferences(BaseModel):
@@ -40,3 +40,18 @@ class BookOut(BaseModel):
 class RecommendationResponse(BaseModel):
     recommendation: BookOut
     explanation: str
+
+class ScoredRecommendation(BaseModel):
+    book: BookOut
+    score: float
+    explanation: str
+
+class RecommendationsResponse(BaseModel):
+    recommendations: List[ScoredRecommendation]
+
+class BatchRecommendationRequest(BaseModel):
+    profiles: conlist(FullProfile, min_items=1, max_items=1000)
+    k: conint(ge=1, le=50) = 5
+
+class BatchRecommendationsResponse(BaseModel):
+    results: List[RecommendationsResponse]
@@ -1,19 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 from datetime import datetime
 from uuid import uuid4
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
+from book_recommender_api.app.database import get_database
 
-load_dotenv()
 router = APIRouter()
 
-# Conexión a MongoDB
-client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
-db = client["book_recommender"]
-users_collection = db["users"]
+# Colección de usuarios (cliente asíncrono compartido)
+async def get_users_collection(db=Depends(get_database)):
+    return db["users"]
 
 # 📌 MODELOS
 
@@ -43,8 +39,8 @@ class FullProfile(BaseModel):
 # ✅ ENDPOINT: REGISTRAR USUARIO
 
 @router.post("/register")
-def register_user(user: UserBase):
-    if users_collection.find_one({"email": user.email}):
+async def register_user(user: UserBase, users_collection=Depends(get_users_collection)):
+    if await users_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Usuario ya registrado")
     
     user_data = user.dict()
@@ -53,14 +49,14 @@ def register_user(user: UserBase):
     user_data["preferences"] = None
     user_data["personality"] = None
     
-    users_collection.insert_one(user_data)
+    await users_collection.insert_one(user_data)
     return {"message": "Usuario registrado correctamente", "user_id": user_data["user_id"]}
 
 # ✅ ENDPOINT: AÑADIR QUIZ (preferencias)
 
 @router.post("/add-quiz/{user_id}")
-def add_quiz(user_id: str, preferences: Preferences):
-    result = users_collection.update_one(
+async def add_quiz(user_id: str, preferences: Preferences, users_collection=Depends(get_users_collection)):
+    result = await users_collection.update_one(
         {"user_id": user_id},
         {"$set": {"preferences": preferences.dict()}}
     )
@@ -71,8 +67,9 @@ def add_quiz(user_id: str, preferences: Preferences):
 # ✅ ENDPOINT: AÑADIR TEST DE PERSONALIDAD
 
 @router.post("/add-personality/{user_id}")
-def add_personality(user_id: str, personality: Personality):
-    result = users_collection.update_one(
+async def add_personality(user_id: str, personality: Personality,
+                          users_collection=Depends(get_users_collection)):
+    result = await users_collection.update_one(
         {"user_id": user_id},
         {"$set": {"personality": personality.dict()}}
     )
@@ -83,8 +80,8 @@ def add_personality(user_id: str, personality: Personality):
 # ✅ ENDPOINT: CONSULTAR PERFIL COMPLETO
 
 @router.get("/profile/{user_id}")
-def get_profile(user_id: str):
-    user = users_collection.find_one({"user_id": user_id}, {"_id": 0})
+async def get_profile(user_id: str, users_collection=Depends(get_users_collection)):
+    user = await users_collection.find_one({"user_id": user_id}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return user
@@ -0,0 +1,147 @@
+# ✅ profiler.py — Profiler por muestreo (hilo que lee sys._current_frames) con salida para flame graphs
+#
+# Cada `interval` segundos el hilo muestreador recorre la pila de los hilos observados y cuenta
+# pilas idénticas. No instrumenta el código: el coste es el tiempo que el muestreador retiene el GIL,
+# que se mide y se devuelve (overhead_percent) junto al perfil.
+# Formatos: pilas colapsadas ("a;b;c 12", flamegraph.pl / speedscope) y JSON de speedscope.
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.005  # 200 muestras/s
+MAX_DEPTH = 128           # Pilas más profundas se truncan por la raíz
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+Frame = Tuple[str, str, int]  # (función, archivo, primera línea)
+
+
+class Profile:
+    def __init__(self, stacks: Counter, thread_names: Dict[int, str], interval: float,
+                 duration: float, sampling_seconds: float, samples: int):
+        self.stacks = stacks                # (id de hilo, (Frame raíz → hoja)) → muestras
+        self.thread_names = thread_names
+        self.interval = interval
+        self.duration = duration
+        self.sampling_seconds = sampling_seconds
+        self.samples = samples
+
+    def stats(self) -> Dict:
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "interval_ms": round(self.interval * 1000, 3),
+            "duration_seconds": round(self.duration, 4),
+            "sampling_seconds": round(self.sampling_seconds, 6),
+            # Tiempo del muestreador sobre el tiempo de pared: lo que el perfilado resta a la aplicación
+            "overhead_percent": round(self.sampling_seconds / self.duration * 100, 3) if self.duration else 0.0
+        }
+
+    def _thread(self, thread_id: int) -> str:
+        return self.thread_names.get(thread_id, f"thread-{thread_id}")
+
+    def collapsed(self) -> str:
+        lines = []
+        for (thread_id, stack), count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            names = [self._thread(thread_id)] + [f"{func} ({os.path.basename(file)}:{line})" for func, file, line in stack]
+            lines.append(";".join(name.replace(";", ":") for name in names) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "book_recommender_api") -> Dict:
+        frames: List[Dict] = []
+        frame_ids: Dict[Frame, int] = {}
+        profiles: Dict[int, Dict] = {}
+        for (thread_id, stack), count in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_ids:
+                    frame_ids[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_ids[frame])
+            profile = profiles.setdefault(thread_id, {
+                "type": "sampled", "name": self._thread(thread_id), "unit": "seconds",
+                "startValue": 0, "endValue": round(self.duration, 6), "samples": [], "weights": []
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(round(count * self.interval, 6))
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "book_recommender_api.profiler",
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values())
+        }
+
+
+class SamplingProfiler:
+    # with SamplingProfiler(...) as profiler: ...  → profiler.profile
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_ids: Optional[Iterable[int]] = None,
+                 switch_interval: Optional[float] = None):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None  # None = todos los hilos
+        # Un hilo ocupado solo cede el GIL cada sys.getswitchinterval() (5 ms): para perfilar una
+        # sola petición se puede bajar mientras dure el muestreo (afecta a todo el proceso)
+        self.switch_interval = switch_interval
+        self.profile: Optional[Profile] = None
+        self._stacks: Counter = Counter()
+        self._labels: Dict[object, Frame] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_switch: Optional[float] = None
+        self._sampling_seconds = 0.0
+        self._samples = 0
+        self._started = 0.0
+
+    def _frame(self, code) -> Frame:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (code.co_name, code.co_filename, code.co_firstlineno)
+        return label
+
+    def _sample(self, own_id: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                stack.append(self._frame(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self._stacks[(thread_id, tuple(stack))] += 1
+            self._samples += 1
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            self._sample(own_id)
+            self._sampling_seconds += time.perf_counter() - started
+
+    def start(self) -> "SamplingProfiler":
+        if self.switch_interval is not None:
+            self._previous_switch = sys.getswitchinterval()
+            sys.setswitchinterval(self.switch_interval)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        duration = time.perf_counter() - self._started
+        if self._previous_switch is not None:
+            sys.setswitchinterval(self._previous_switch)
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.profile = Profile(self._stacks, names, self.interval, duration, self._sampling_seconds, self._samples)
+        return self.profile
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> bool:
+        self.stop()
+        return False
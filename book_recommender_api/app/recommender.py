@@ -1,4 +1,5 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from types import SimpleNamespace
 from .models import FullProfile
 import unicodedata
 import re
@@ -37,34 +38,54 @@ def normalize_list(texts: List[str]) -> List[str]:
 # 🔹 CÁLCULO DE COINCIDENCIA
 # -------------------------
 
-def compute_score(profile: FullProfile, book: Dict) -> float:
-    prefs = profile.preferences
-
-    # Normalización de campos del libro
-    book_data = {
-        'genres': normalize_list(book.get("genres", [])),
-        'themes': normalize_list(book.get("themes", [])),
-        'emotion_tags': normalize_list(book.get("emotion_tags", [])),
+def normalize_book(book: Dict) -> Dict:
+    return {
+        'genres': frozenset(normalize_list(book.get("genres", []))),
+        'themes': frozenset(normalize_list(book.get("themes", []))),
+        'emotion_tags': frozenset(normalize_list(book.get("emotion_tags", []))),
         'tone': normalize(book.get("tone")),
         'style': normalize(book.get("style")),
         'age_range': normalize(book.get("age_range")),
-        'personality_match': book.get("personality_match", [])
+        'personality_match': tuple(book.get("personality_match", []))
     }
 
-    # Normalización del perfil del usuario
-    user_data = {
-        'genres': normalize_list(prefs.genres),
-        'themes': normalize_list(prefs.themes),
-        'emotion_tags': normalize_list(prefs.emotion_tags),
+def normalize_profile(profile: FullProfile) -> Dict:
+    prefs = profile.preferences
+    return {
+        'genres': frozenset(normalize_list(prefs.genres)),
+        'themes': frozenset(normalize_list(prefs.themes)),
+        'emotion_tags': frozenset(normalize_list(prefs.emotion_tags)),
         'tone': normalize(prefs.tone),
         'style': normalize(prefs.style),
         'age_range': normalize(prefs.age_range)
     }
 
-    # Similaridad por campos (Jaccard para listas)
-    def jaccard(list1, list2):
-        return len(set(list1) & set(list2)) / max(len(set(list2)), 1)
+def shares_any_tag(book_data: Dict, user_data: Dict) -> bool:
+    return bool(
+        book_data['genres'] & user_data['genres']
+        or book_data['themes'] & user_data['themes']
+        or book_data['emotion_tags'] & user_data['emotion_tags']
+    )
+
+# Similaridad por campos (Jaccard respecto a las etiquetas del usuario)
+def jaccard(book_tags: frozenset, user_tags: frozenset) -> float:
+    return len(book_tags & user_tags) / max(len(user_tags), 1)
+
+
+# Desglose de una puntuación: componentes por campo y etiquetas coincidentes
+class ScoreBreakdown:
+    __slots__ = ("score", "components", "matched")
+
+    def __init__(self, score: float, components: Dict[str, float], matched: Dict):
+        self.score = score
+        self.components = components
+        self.matched = matched
+
+    def as_dict(self) -> Dict:
+        return {"score": self.score, "components": self.components, "matched": self.matched}
+
 
+def score_normalized(user_data: Dict, book_data: Dict, personality, explain: bool = False):
     scores = {
         'genres': jaccard(book_data['genres'], user_data['genres']),
         'themes': jaccard(book_data['themes'], user_data['themes']),
@@ -72,31 +93,63 @@ def compute_score(profile: FullProfile, book: Dict) -> float:
         'tone': 1.0 if book_data['tone'] and book_data['tone'] == user_data['tone'] else 0.0,
         'style': 1.0 if book_data['style'] and book_data['style'] == user_data['style'] else 0.0,
         'age_range': 1.0 if book_data['age_range'] and book_data['age_range'] == user_data['age_range'] else 0.0,
-        'personality_match': match_personality(profile.personality, book_data['personality_match'])
+        'personality_match': match_personality(personality, book_data['personality_match'])
     }
 
     # Ponderación final
-    score = sum(scores[key] * WEIGHTS[key] for key in WEIGHTS)
-    return round(score, 4)
+    score = round(sum(scores[key] * WEIGHTS[key] for key in WEIGHTS), 4)
+    if not explain:
+        return score
+
+    # Con explain=True se devuelve también el desglose calculado en esta misma pasada
+    matched = {
+        'genres': sorted(book_data['genres'] & user_data['genres']),
+        'themes': sorted(book_data['themes'] & user_data['themes']),
+        'emotion_tags': sorted(book_data['emotion_tags'] & user_data['emotion_tags']),
+        'tone': book_data['tone'] if scores['tone'] else None,
+        'style': book_data['style'] if scores['style'] else None,
+        'age_range': book_data['age_range'] if scores['age_range'] else None,
+        'personality_tags': matched_personality_tags(personality, book_data['personality_match'])
+    }
+    return score, ScoreBreakdown(score, scores, matched)
+
+def compute_score(profile: FullProfile, book: Dict, explain: bool = False):
+    # Normalización de campos del libro y del perfil del usuario
+    book_data = normalize_book(book)
+    user_data = normalize_profile(profile)
+    return score_normalized(user_data, book_data, profile.personality, explain)
 
 
 # -------------------------
 # 🔹 PERSONALITY MATCH AVANZADO
 # -------------------------
 
+# Umbrales de las reglas: <= LOW_TRAIT es "bajo", >= HIGH_TRAIT es "alto"
+LOW_TRAIT = 40
+HIGH_TRAIT = 60
+TRAITS = ("O", "C", "E", "A", "N")
+
 RULES = {
-    "alta apertura": lambda p: p.O >= 60,
-    "baja apertura": lambda p: p.O <= 40,
-    "alta responsabilidad": lambda p: p.C >= 60,
-    "baja responsabilidad": lambda p: p.C <= 40,
-    "alta extraversion": lambda p: p.E >= 60,
-    "baja extraversion": lambda p: p.E <= 40,
-    "alta amabilidad": lambda p: p.A >= 60,
-    "baja amabilidad": lambda p: p.A <= 40,
-    "alto neuroticismo": lambda p: p.N >= 60,
-    "bajo neuroticismo": lambda p: p.N <= 40
+    "alta apertura": lambda p: p.O >= HIGH_TRAIT,
+    "baja apertura": lambda p: p.O <= LOW_TRAIT,
+    "alta responsabilidad": lambda p: p.C >= HIGH_TRAIT,
+    "baja responsabilidad": lambda p: p.C <= LOW_TRAIT,
+    "alta extraversion": lambda p: p.E >= HIGH_TRAIT,
+    "baja extraversion": lambda p: p.E <= LOW_TRAIT,
+    "alta amabilidad": lambda p: p.A >= HIGH_TRAIT,
+    "baja amabilidad": lambda p: p.A <= LOW_TRAIT,
+    "alto neuroticismo": lambda p: p.N >= HIGH_TRAIT,
+    "bajo neuroticismo": lambda p: p.N <= LOW_TRAIT
 }
 
+def personality_bands(personality) -> tuple:
+    # Banda por rasgo (0 = bajo, 1 = medio, 2 = alto): lo único que RULES distingue
+    bands = []
+    for trait in TRAITS:
+        value = getattr(personality, trait)
+        bands.append(0 if value <= LOW_TRAIT else 2 if value >= HIGH_TRAIT else 1)
+    return tuple(bands)
+
 def match_personality(personality: Dict, tags: List[str]) -> float:
     if not tags:
         return 0.0
@@ -109,49 +162,65 @@ def match_personality(personality: Dict, tags: List[str]) -> float:
 
     return round(matched / len(tags), 4)
 
+def matched_personality_tags(personality, tags: List[str]) -> List[str]:
+    return [tag for tag in tags if normalize(tag) in RULES and RULES[normalize(tag)](personality)]
+
 
 # -------------------------
-# 🔹 GENERADOR DE EXPLICACIONES
+# 🔹 CLASES DE PERSONALIDAD (3 bandas ^ 5 rasgos = 243)
 # -------------------------
 
-def generate_explanation(book: Dict, profile: FullProfile) -> str:
-    prefs = profile.preferences
-    explanation = []
+PERSONALITY_CLASSES = 3 ** len(TRAITS)
+BAND_VALUES = (LOW_TRAIT, LOW_TRAIT + 1, HIGH_TRAIT)  # Un valor representativo por banda
 
-    # Normalizar campos
-    book_data = {
-        'genres': normalize_list(book.get("genres", [])),
-        'themes': normalize_list(book.get("themes", [])),
-        'emotion_tags': normalize_list(book.get("emotion_tags", [])),
-        'tone': normalize(book.get("tone")),
-        'style': normalize(book.get("style")),
-        'age_range': normalize(book.get("age_range")),
-        'personality_match': book.get("personality_match", [])
-    }
+def personality_class(personality) -> int:
+    class_id = 0
+    for band in personality_bands(personality):
+        class_id = class_id * 3 + band
+    return class_id
 
-    user_data = {
-        'genres': normalize_list(prefs.genres),
-        'themes': normalize_list(prefs.themes),
-        'emotion_tags': normalize_list(prefs.emotion_tags),
-        'tone': normalize(prefs.tone),
-        'style': normalize(prefs.style),
-        'age_range': normalize(prefs.age_range)
-    }
+def class_representative(class_id: int) -> SimpleNamespace:
+    values = {}
+    for trait in reversed(TRAITS):
+        class_id, band = divmod(class_id, 3)
+        values[trait] = BAND_VALUES[band]
+    return SimpleNamespace(**values)
+
+CLASS_REPRESENTATIVES = [class_representative(class_id) for class_id in range(PERSONALITY_CLASSES)]
+
+def personality_scores_by_class(tags: List[str]) -> Tuple[float, ...]:
+    # match_personality solo depende de la banda de cada rasgo: se evalúa una vez por clase
+    return tuple(match_personality(representative, tags) for representative in CLASS_REPRESENTATIVES)
+
+
+# -------------------------
+# 🔹 GENERADOR DE EXPLICACIONES
+# -------------------------
+
+def generate_explanation(book: Dict, profile: FullProfile, breakdown: ScoreBreakdown = None) -> str:
+    # Sin desglose previo se calcula uno (normalizando libro y perfil)
+    if breakdown is None:
+        _, breakdown = compute_score(profile, book, explain=True)
+    return render_explanation(breakdown)
+
+def render_explanation(breakdown: ScoreBreakdown) -> str:
+    matched = breakdown.matched
+    explanation = []
 
     # Comparaciones y frases
-    if set(book_data['genres']) & set(user_data['genres']):
+    if matched['genres']:
         explanation.append("géneros que te interesan")
-    if set(book_data['themes']) & set(user_data['themes']):
+    if matched['themes']:
         explanation.append("temas que has indicado como relevantes")
-    if set(book_data['emotion_tags']) & set(user_data['emotion_tags']):
+    if matched['emotion_tags']:
         explanation.append("emociones que valoras en tus lecturas")
-    if book_data['tone'] and book_data['tone'] == user_data['tone']:
+    if matched['tone']:
         explanation.append("tono narrativo que prefieres")
-    if book_data['style'] and book_data['style'] == user_data['style']:
+    if matched['style']:
         explanation.append("estilo narrativo afín a tus gustos")
-    if book_data['age_range'] and book_data['age_range'] == user_data['age_range']:
+    if matched['age_range']:
         explanation.append("rango de edad adecuado para ti")
-    if match_personality(profile.personality, book_data['personality_match']) >= 0.5:
+    if breakdown.components['personality_match'] >= 0.5:
         explanation.append("afinidad psicológica con tu perfil de personalidad")
 
     # Generar texto final
@@ -0,0 +1,254 @@
+# ✅ repository.py — Consultas de libros resueltas en MongoDB (campos normalizados + índices multikey)
+
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from book_recommender_api.app.models import BookOut
+from book_recommender_api.app.recommender import (
+    WEIGHTS, RULES, normalize, normalize_list, score_normalized
+)
+
+# Copias normalizadas que se guardan junto a cada libro al importar
+NORMALIZED_LIST_FIELDS = {"genres": "genres_norm", "themes": "themes_norm", "emotion_tags": "emotion_tags_norm"}
+NORMALIZED_FIELDS = {**NORMALIZED_LIST_FIELDS, "tone": "tone_norm", "style": "style_norm", "age_range": "age_range_norm"}
+PERSONALITY_NORM = "personality_match_norm"  # Etiquetas en orden y con repeticiones (como match_personality)
+
+# Para puntuar candidatos basta con los campos normalizados (ni 'subjects' ni 'description')
+CANDIDATE_PROJECTION = {
+    **{stored: 1 for stored in NORMALIZED_FIELDS.values()},
+    "personality_match": 1
+}
+
+# Los ganadores se sirven completos salvo 'subjects'
+WINNER_PROJECTION = {"subjects": 0, PERSONALITY_NORM: 0, **{stored: 0 for stored in NORMALIZED_FIELDS.values()}}
+
+
+# -------------------------
+# 🔹 ESCRITURA (ruta de importación)
+# -------------------------
+
+def with_normalized_fields(book: Dict) -> Dict:
+    doc = dict(book)
+    for field, stored in NORMALIZED_LIST_FIELDS.items():
+        doc[stored] = sorted(set(normalize_list(book.get(field, []))))
+    for field in ("tone", "style", "age_range"):
+        doc[NORMALIZED_FIELDS[field]] = normalize(book.get(field))
+    # Sin descartar etiquetas vacías: match_personality las cuenta en el denominador
+    doc[PERSONALITY_NORM] = [normalize(tag) for tag in book.get("personality_match", [])]
+    return doc
+
+async def ensure_indexes(collection) -> List[str]:
+    # Índices multikey: un documento aparece una vez por cada tag normalizado
+    return [await collection.create_index(stored) for stored in NORMALIZED_LIST_FIELDS.values()]
+
+# Importación sin cortes: se llena una colección auxiliar y se renombra sobre "books"
+STAGING_COLLECTION = "books_staging"
+META_COLLECTION = "catalog_meta"
+IMPORT_BATCH_SIZE = 1000
+
+def batched(items: Iterable, size: int):
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+async def replace_books(db, books: Iterable[Dict], batch_size: int = IMPORT_BATCH_SIZE) -> Dict:
+    # "books" sigue sirviendo el catálogo anterior hasta el renameCollection atómico final
+    staging = db[STAGING_COLLECTION]
+    await staging.drop()  # Restos de una importación interrumpida
+
+    imported = 0
+    for batch in batched((with_normalized_fields(book) for book in books), batch_size):
+        # insert_many desordenado = bulk write sin esperar a cada documento
+        result = await staging.insert_many(batch, ordered=False)
+        imported += len(result.inserted_ids)
+    if not imported:
+        await staging.drop()
+        raise ValueError("La importación no contiene libros: se conserva el catálogo actual.")
+
+    indexes = await ensure_indexes(staging)
+    await staging.rename("books", dropTarget=True)
+
+    # Nueva versión publicada: los procesos de la API la detectan y recargan su índice
+    meta = {"version": uuid4().hex, "count": imported, "imported_at": datetime.utcnow()}
+    await db[META_COLLECTION].update_one({"_id": "books"}, {"$set": meta}, upsert=True)
+    return {**meta, "indexes": indexes}
+
+async def catalog_version(db) -> Optional[str]:
+    meta = await db[META_COLLECTION].find_one({"_id": "books"})
+    return meta.get("version") if meta else None
+
+
+# -------------------------
+# 🔹 MIGRACIÓN: libros importados antes de guardar las copias normalizadas
+# -------------------------
+
+# Sin ellas, candidate_query no los encuentra nunca: los motores "mongo"/"aggregate" los ignorarían en silencio
+LEGACY_QUERY = {"$or": [{stored: {"$exists": False}} for stored in (*NORMALIZED_FIELDS.values(), PERSONALITY_NORM)]}
+
+async def count_legacy_books(db) -> int:
+    return await db["books"].count_documents(LEGACY_QUERY)
+
+async def ensure_normalized_fields(db) -> None:
+    # Arranque con un motor de base de datos: falla en lugar de servir rankings incompletos
+    legacy = await count_legacy_books(db)
+    if legacy:
+        raise RuntimeError(
+            f"{legacy} libros sin campos normalizados: reimporta el catálogo o ejecuta "
+            "python -m book_recommender_api.utils.backfill_normalized"
+        )
+
+async def backfill_normalized_fields(db) -> int:
+    # Añade las copias normalizadas a los libros heredados (idempotente; la versión del catálogo no cambia)
+    collection = db["books"]
+    updated = 0
+    async for doc in collection.find(LEGACY_QUERY):
+        normalized = with_normalized_fields(doc)
+        fields = {stored: normalized[stored] for stored in (*NORMALIZED_FIELDS.values(), PERSONALITY_NORM)}
+        await collection.update_one({"_id": doc["_id"]}, {"$set": fields})
+        updated += 1
+    await ensure_indexes(collection)
+    return updated
+
+
+# -------------------------
+# 🔹 LECTURA (motor "mongo")
+# -------------------------
+
+def stored_book_data(doc: Dict) -> Dict:
+    # Formato de recommender.normalize_book sin repetir la normalización NFKD/regex
+    # (ensure_normalized_fields garantiza al arrancar que todos los libros tienen las copias)
+    book_data = {field: frozenset(doc[stored]) for field, stored in NORMALIZED_LIST_FIELDS.items()}
+    for field in ("tone", "style", "age_range"):
+        book_data[field] = doc[NORMALIZED_FIELDS[field]]
+    book_data["personality_match"] = tuple(doc.get("personality_match", []))
+    return book_data
+
+def candidate_query(user_data: Dict) -> Optional[Dict]:
+    # $or de $in sobre los campos normalizados = has_minimum_match en el servidor
+    clauses = [
+        {stored: {"$in": sorted(user_data[field])}}
+        for field, stored in NORMALIZED_LIST_FIELDS.items()
+        if user_data[field]
+    ]
+    return {"$or": clauses} if clauses else None
+
+async def rank_in_db(db, user_data: Dict, personality, k: int) -> List[Tuple[Dict, float, Dict]]:
+    # Devuelve [(documento completo, score, book_data)] de los k mejores candidatos
+    query = candidate_query(user_data)
+    if query is None:
+        return []
+
+    scored = []
+    async for doc in db["books"].find(query, CANDIDATE_PROJECTION).sort("_id", 1):
+        book_data = stored_book_data(doc)
+        score = score_normalized(user_data, book_data, personality)
+        if score > 0:
+            scored.append((score, len(scored), doc["_id"], book_data))
+
+    # A igual puntuación gana el primero en orden de _id (como el orden del catálogo)
+    winners = heapq.nlargest(k, scored, key=lambda x: (x[0], -x[1]))
+    if not winners:
+        return []
+
+    ids = [doc_id for _, _, doc_id, _ in winners]
+    full_docs = {doc["_id"]: doc async for doc in db["books"].find({"_id": {"$in": ids}}, WINNER_PROJECTION)}
+    return [(full_docs[doc_id], score, book_data) for score, _, doc_id, book_data in winners if doc_id in full_docs]
+
+
+# -------------------------
+# 🔹 LISTADO (GET /books): páginas por _id, sin cargar la colección completa
+# -------------------------
+
+BOOK_FIELDS = list(BookOut.__fields__)  # Campos públicos: nunca 'subjects' ni las copias normalizadas
+LISTING_BATCH_SIZE = 500  # Documentos por lote del cursor (getMore) al volcar el catálogo
+
+def listing_projection(fields: Optional[List[str]] = None) -> Dict:
+    # _id se pide siempre: es la clave del cursor (índice por defecto de la colección)
+    return {"_id": 1, **{field: 1 for field in (fields or BOOK_FIELDS)}}
+
+def list_books_cursor(db, after=None, fields: Optional[List[str]] = None,
+                      limit: Optional[int] = None, batch_size: int = LISTING_BATCH_SIZE):
+    # Paginación por rango (_id > after) en lugar de skip: coste constante por página
+    query = {"_id": {"$gt": after}} if after is not None else {}
+    cursor = db["books"].find(query, listing_projection(fields)).sort("_id", 1).batch_size(batch_size)
+    return cursor.limit(limit) if limit else cursor
+
+
+# -------------------------
+# 🔹 MOTOR "aggregate": puntuación completa en el servidor
+# -------------------------
+
+def _list_component(field: str, user_tags) -> Dict:
+    # jaccard(): |libro ∩ usuario| / max(|usuario|, 1)
+    stored = "$" + NORMALIZED_LIST_FIELDS[field]
+    return {"$divide": [
+        {"$size": {"$setIntersection": [{"$ifNull": [stored, []]}, sorted(user_tags)]}},
+        max(len(user_tags), 1)
+    ]}
+
+def _equal_component(field: str, user_value: str):
+    # Un valor vacío en el perfil nunca puntúa (tampoco contra un libro vacío)
+    if not user_value:
+        return 0.0
+    return {"$cond": [{"$eq": ["$" + NORMALIZED_FIELDS[field], user_value]}, 1.0, 0.0]}
+
+def _personality_component(personality) -> Dict:
+    # match_personality(): reglas cumplidas / nº de etiquetas, con el $switch resuelto por etiqueta
+    stored = {"$ifNull": ["$" + PERSONALITY_NORM, []]}
+    branches = [
+        {"case": {"$eq": ["$$tag", tag]}, "then": 1 if rule(personality) else 0}
+        for tag, rule in RULES.items()
+    ]
+    matched = {"$sum": {"$map": {
+        "input": stored, "as": "tag",
+        "in": {"$switch": {"branches": branches, "default": 0}}
+    }}}
+    return {"$cond": [
+        {"$eq": [{"$size": stored}, 0]},
+        0.0,
+        {"$round": [{"$divide": [matched, {"$size": stored}]}, 4]}
+    ]}
+
+def score_pipeline(user_data: Dict, personality, k: int) -> List[Dict]:
+    # Misma fórmula que score_normalized: componentes por campo, suma ponderada y redondeo a 4
+    components = {
+        "genres": _list_component("genres", user_data["genres"]),
+        "themes": _list_component("themes", user_data["themes"]),
+        "emotion_tags": _list_component("emotion_tags", user_data["emotion_tags"]),
+        "tone": _equal_component("tone", user_data["tone"]),
+        "style": _equal_component("style", user_data["style"]),
+        "age_range": _equal_component("age_range", user_data["age_range"]),
+        "personality_match": _personality_component(personality)
+    }
+    weighted = [{"$multiply": ["$_components." + key, WEIGHTS[key]]} for key in WEIGHTS]
+
+    return [
+        {"$match": candidate_query(user_data)},
+        {"$addFields": {"_components": components}},
+        {"$addFields": {"_score": {"$round": [{"$add": weighted}, 4]}}},
+        {"$match": {"_score": {"$gt": 0}}},
+        # A igual puntuación gana el primero en orden de _id (como rank_in_db)
+        {"$sort": {"_score": -1, "_id": 1}},
+        {"$limit": k},
+        {"$project": {"subjects": 0, "_components": 0}}
+    ]
+
+async def rank_with_pipeline(db, user_data: Dict, personality, k: int) -> List[Tuple[Dict, float, Dict]]:
+    # Mismo formato que rank_in_db; solo los k ganadores salen de la base de datos
+    if candidate_query(user_data) is None:
+        return []
+
+    results = []
+    async for doc in db["books"].aggregate(score_pipeline(user_data, personality, k)):
+        book_data = stored_book_data(doc)
+        score = doc.pop("_score")
+        for stored in (*NORMALIZED_FIELDS.values(), PERSONALITY_NORM):
+            doc.pop(stored, None)
+        results.append((doc, score, book_data))
+    return results
@@ -0,0 +1,43 @@
+# ✅ responses.py — Respuestas JSON compuestas a partir de bytes ya serializados
+#
+# Cada libro del catálogo se serializa una vez por versión (IndexedBook.raw); las respuestas
+# de recomendación empalman esos bytes sin pasar por BookOut ni por json.dumps en cada petición.
+
+import json
+from typing import Iterable, Tuple
+
+from fastapi.responses import Response
+
+from book_recommender_api.app.models import BookOut
+
+Scored = Tuple[bytes, float, str]  # (JSON del libro, score, explicación)
+
+
+def book_json(book: BookOut) -> bytes:
+    return json.dumps(book.dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _string(text: str) -> bytes:
+    return json.dumps(text, ensure_ascii=False).encode("utf-8")
+
+
+# 🔹 Mismas formas que RecommendationResponse / RecommendationsResponse / BatchRecommendationsResponse
+def recommendation_json(raw: bytes, explanation: str) -> bytes:
+    return b'{"recommendation":' + raw + b',"explanation":' + _string(explanation) + b"}"
+
+def scored_json(raw: bytes, score: float, explanation: str) -> bytes:
+    return (b'{"book":' + raw + b',"score":' + repr(float(score)).encode("ascii")
+            + b',"explanation":' + _string(explanation) + b"}")
+
+def recommendations_json(scored: Iterable[Scored]) -> bytes:
+    return b'{"recommendations":[' + b",".join(scored_json(*item) for item in scored) + b"]}"
+
+def batch_json(results: Iterable[bytes]) -> bytes:
+    return b'{"results":[' + b",".join(results) + b"]}"
+
+
+class PrecomputedJSONResponse(Response):
+    # El contenido ya es JSON codificado: se envía tal cual
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
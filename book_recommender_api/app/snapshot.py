@@ -0,0 +1,317 @@
+# ✅ snapshot.py — Snapshot binario y versionado del catálogo codificado (arranque sin reconstruir desde MongoDB)
+#
+# Estructura en disco (un directorio por versión del catálogo):
+#   <dir>/CURRENT                      → nombre de la versión publicada (se sustituye de forma atómica)
+#   <dir>/<versión>/manifest.json      → vocabularios, firmas de personalidad, tablas de códigos y tiempos
+#   <dir>/<versión>/<campo>.npy        → matrices multi-hot (uint8) de genres / themes / emotion_tags
+#   <dir>/<versión>/<campo>.bits.npy   → las mismas filas empaquetadas (bytes de la máscara de bits del índice)
+#   <dir>/<versión>/<campo>.postings.npy / .postings_offsets.npy → índice invertido (libros por bit, CSC)
+#   <dir>/<versión>/<campo>.npy        → códigos (int32, 0 = vacío) de tone / style / age_range
+#   <dir>/<versión>/personality_*.npy  → firma por libro y tabla firma × 243 clases
+#   <dir>/<versión>/payloads.bin       → JSON de cada BookOut, concatenados (payload_offsets.npy)
+# Todos los .npy se abren con mmap de solo lectura: cargar un snapshot no copia las matrices en memoria y,
+# en modo compartido, N workers usan las mismas páginas del page cache (la RSS del catálogo no se multiplica).
+# Publicar una versión = escribir su directorio y sustituir CURRENT; los workers la detectan y cambian de mapa.
+#
+# Uso: python -m book_recommender_api.app.snapshot [--from-file data/books.json] [--out DIR]
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from book_recommender_api.app.catalog import (
+    CatalogIndex, IndexedBook, TagVocabulary, MATCH_FIELDS, CATALOG_PROJECTION,
+    CATALOG_SNAPSHOT_DIR, CURRENT_FILE, current_snapshot
+)
+from book_recommender_api.app.repository import catalog_version
+from book_recommender_api.app.responses import book_json
+from book_recommender_api.app.vector_engine import CODE_FIELDS, VectorCatalog
+
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_KEEP = 2  # Versiones anteriores que se conservan (workers que aún no han cambiado de mapa)
+
+
+# -------------------------
+# 🔹 ESCRITURA
+# -------------------------
+
+def write_snapshot(catalog: CatalogIndex, directory, source_version: Optional[str] = None) -> Path:
+    started = time.perf_counter()
+    directory = Path(directory)
+    target = directory / catalog.version
+    # La versión es un digest del contenido: reimportar el mismo catálogo solo vuelve a publicar el puntero
+    if _is_complete(target, catalog.version):
+        _publish(directory, target)
+        return target
+    # Nunca se borra un directorio existente (puede ser el que apunta CURRENT): si quedó incompleto,
+    # la versión se publica con otro nombre
+    if target.exists():
+        target = directory / f"{catalog.version}.{uuid4().hex[:8]}"
+    tmp = directory / f".{target.name}.{uuid4().hex[:8]}.tmp"
+    tmp.mkdir(parents=True)
+
+    n = len(catalog.books)
+    for field in MATCH_FIELDS:
+        # Columna = bit de la máscara del índice (mismo orden que TagVocabulary)
+        matrix = np.zeros((n, len(catalog.vocabularies[field])), dtype=np.uint8)
+        for entry in catalog.books:
+            mask = entry.features[field]
+            while mask:
+                low = mask & -mask
+                matrix[entry.book_id, low.bit_length() - 1] = 1
+                mask ^= low
+        np.save(tmp / f"{field}.npy", matrix)
+        np.save(tmp / f"{field}.bits.npy", np.packbits(matrix, axis=1, bitorder="little"))
+        rows, offsets = _postings_arrays(matrix)
+        np.save(tmp / f"{field}.postings.npy", rows)
+        np.save(tmp / f"{field}.postings_offsets.npy", offsets)
+
+    code_tables = {}
+    for field in CODE_FIELDS:
+        code_tables[field] = sorted({entry.features[field] for entry in catalog.books if entry.features[field]})
+        codes = {value: code for code, value in enumerate(code_tables[field], start=1)}
+        np.save(tmp / f"{field}.npy", np.array([codes.get(entry.features[field], 0) for entry in catalog.books],
+                                               dtype=np.int32))
+
+    np.save(tmp / "personality_ids.npy",
+            np.array([entry.features["personality_match"] for entry in catalog.books], dtype=np.int32))
+    np.save(tmp / "personality_table.npy", np.array(catalog.personality_columns, dtype=np.float64).T.copy())
+
+    offsets = [0]
+    with open(tmp / "payloads.bin", "wb") as f:
+        for entry in catalog.books:
+            raw = entry.raw if entry.raw is not None else book_json(entry.payload)
+            f.write(raw)
+            offsets.append(offsets[-1] + len(raw))
+    np.save(tmp / "payload_offsets.npy", np.array(offsets, dtype=np.int64))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": catalog.version,
+        "source_version": source_version,
+        "books": n,
+        "skipped": catalog.skipped,
+        "vocabularies": {field: catalog.vocabularies[field].tags for field in MATCH_FIELDS},
+        "code_tables": code_tables,
+        "personality_signatures": [list(tags) for tags in catalog.personality_signatures],
+        "field_options": catalog.field_options.options,
+        "built_at": datetime.utcnow().isoformat(),
+        "index_build_seconds": catalog.info.get("build_seconds"),
+        "write_seconds": round(time.perf_counter() - started, 4)
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+
+    # Publicación: directorio completo primero, puntero CURRENT después (os.replace es atómico)
+    os.replace(tmp, target)
+    _publish(directory, target)
+    return target
+
+def _is_complete(path: Path, version: str) -> bool:
+    # manifest.json se escribe el último y el directorio se renombra entero: si existe, está completo
+    try:
+        manifest = read_manifest(path)
+    except (OSError, ValueError):
+        return False
+    return manifest.get("format") == SNAPSHOT_FORMAT and manifest.get("version") == version
+
+def _publish(directory: Path, target: Path) -> None:
+    pointer = directory / f".{CURRENT_FILE}.{uuid4().hex[:8]}.tmp"
+    pointer.write_text(target.name, encoding="utf-8")
+    os.replace(pointer, directory / CURRENT_FILE)
+    prune_snapshots(directory)
+
+def prune_snapshots(directory, keep: int = SNAPSHOT_KEEP) -> None:
+    # Borrar un directorio mapeado es seguro: los workers que lo usan conservan sus páginas hasta soltarlo
+    current = current_snapshot(directory)
+    versions = sorted(
+        (path for path in Path(directory).iterdir()
+         if path.is_dir() and not path.name.startswith(".") and path != current),
+        key=lambda path: path.stat().st_mtime, reverse=True
+    )
+    for path in versions[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def build_snapshot(documents: Iterable[Dict], directory, source_version: Optional[str] = None) -> Dict:
+    catalog = CatalogIndex.from_documents(documents)
+    path = write_snapshot(catalog, directory, source_version)
+    return json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+
+
+def _postings_arrays(matrix: np.ndarray):
+    # Libros de cada bit, concatenados por bit (orden ascendente dentro de cada uno) + desplazamientos
+    rows, columns = np.nonzero(matrix)
+    order = np.argsort(columns, kind="stable")
+    offsets = np.searchsorted(columns[order], np.arange(matrix.shape[1] + 1))
+    return rows[order].astype(np.int32), offsets.astype(np.int64)
+
+
+# -------------------------
+# 🔹 VISTAS SOBRE LOS ARRAYS MAPEADOS (modo compartido)
+# -------------------------
+
+class ArrayPostings:
+    # Misma interfaz que el dict tag → ids de build_postings, leyendo del array mapeado
+    __slots__ = ("ids", "rows", "offsets")
+
+    def __init__(self, ids: Dict[str, int], rows: np.ndarray, offsets: np.ndarray):
+        self.ids = ids
+        self.rows = rows
+        self.offsets = offsets
+
+    def get(self, tag: str, default=()):
+        bit = self.ids.get(tag)
+        if bit is None:
+            return default
+        return self.rows[self.offsets[bit]:self.offsets[bit + 1]].tolist()
+
+    def __getitem__(self, tag: str) -> list:
+        if tag not in self.ids:
+            raise KeyError(tag)
+        return self.get(tag)
+
+class SnapshotBooks:
+    # Secuencia de IndexedBook creada al acceder: ningún objeto por libro vive en el worker
+    def __init__(self, bits: Dict[str, np.ndarray], codes: Dict[str, np.ndarray], tables: Dict[str, list],
+                 personality_ids: np.ndarray, offsets: np.ndarray, payloads: np.ndarray):
+        self.bits = bits
+        self.codes = codes
+        self.tables = tables
+        self.personality_ids = personality_ids
+        self.offsets = offsets
+        self.payloads = payloads
+
+    def __len__(self) -> int:
+        return len(self.personality_ids)
+
+    def __getitem__(self, book_id: int) -> IndexedBook:
+        if not 0 <= book_id < len(self):
+            raise IndexError(book_id)
+        features = {field: int.from_bytes(self.bits[field][book_id].tobytes(), "little") for field in MATCH_FIELDS}
+        for field in CODE_FIELDS:
+            features[field] = self.tables[field][self.codes[field][book_id]]
+        features["personality_match"] = int(self.personality_ids[book_id])
+        raw = self.payloads[self.offsets[book_id]:self.offsets[book_id + 1]].tobytes()
+        return IndexedBook(book_id, features, raw=raw)
+
+    def __iter__(self):
+        return (self[book_id] for book_id in range(len(self)))
+
+
+# -------------------------
+# 🔹 LECTURA
+# -------------------------
+
+def read_manifest(path) -> Dict:
+    return json.loads((Path(path) / "manifest.json").read_text(encoding="utf-8"))
+
+def load_snapshot(path, shared: bool = False) -> CatalogIndex:
+    # shared=False materializa los libros y el índice invertido en el proceso (motor "python" más rápido);
+    # shared=True solo crea vistas sobre los arrays mapeados (memoria por worker casi constante)
+    started = time.perf_counter()
+    path = Path(path)
+    manifest = read_manifest(path)
+    if manifest["format"] != SNAPSHOT_FORMAT:
+        raise ValueError(f"Formato de snapshot no soportado: {manifest['format']}")
+
+    load = lambda name: np.load(path / f"{name}.npy", mmap_mode="r")
+    matrices = {field: load(field) for field in MATCH_FIELDS}
+    bits = {field: load(f"{field}.bits") for field in MATCH_FIELDS}
+    postings_rows = {field: load(f"{field}.postings") for field in MATCH_FIELDS}
+    postings_offsets = {field: load(f"{field}.postings_offsets") for field in MATCH_FIELDS}
+    codes = {field: load(field) for field in CODE_FIELDS}
+    personality_ids = load("personality_ids")
+    personality_table = load("personality_table")
+    offsets = load("payload_offsets")
+    payloads = np.memmap(path / "payloads.bin", dtype=np.uint8, mode="r") if offsets[-1] else np.zeros(0, np.uint8)
+
+    vocabularies = {field: TagVocabulary(manifest["vocabularies"][field]) for field in MATCH_FIELDS}
+    tables = {field: [""] + manifest["code_tables"][field] for field in CODE_FIELDS}
+    books = SnapshotBooks(bits, codes, tables, personality_ids, offsets, payloads)
+
+    if shared:
+        postings = {
+            field: ArrayPostings(vocabularies[field].ids, postings_rows[field], postings_offsets[field])
+            for field in MATCH_FIELDS
+        }
+    else:
+        books = list(books)
+        postings = {
+            field: {tag: ArrayPostings(vocabularies[field].ids, postings_rows[field], postings_offsets[field]).get(tag)
+                    for tag in vocabularies[field].tags}
+            for field in MATCH_FIELDS
+        }
+
+    # El motor NumPy usa directamente las matrices mapeadas (vocabulario = bit del índice)
+    vectors = VectorCatalog(
+        vocabularies={
+            **{field: vocabularies[field].ids for field in MATCH_FIELDS},
+            **{field: {value: code for code, value in enumerate(manifest["code_tables"][field])} for field in CODE_FIELDS}
+        },
+        tag_matrices=matrices,
+        code_columns=codes,
+        personality_ids=personality_ids,
+        personality_table=personality_table
+    )
+    catalog = CatalogIndex(
+        books, vocabularies, [tuple(tags) for tags in manifest["personality_signatures"]],
+        manifest["version"], manifest["skipped"],
+        postings=postings,
+        field_options=manifest["field_options"],
+        personality_columns=np.asarray(personality_table).T.tolist(),
+        vectors=vectors
+    )
+    catalog.info = {
+        "source": "snapshot",
+        "shared": shared,
+        "path": str(path),
+        "source_version": manifest["source_version"],
+        "built_at": manifest["built_at"],
+        "write_seconds": manifest["write_seconds"],
+        "load_seconds": round(time.perf_counter() - started, 4)
+    }
+    return catalog
+
+
+# -------------------------
+# 🔹 CONSTRUCCIÓN DESDE LÍNEA DE COMANDOS
+# -------------------------
+
+async def build_snapshot_from_db(db, directory) -> Dict:
+    # Misma consulta que catalog.build_catalog; la construcción es CPU y va fuera del event loop
+    source_version = await catalog_version(db)
+    documents = await db["books"].find({}, CATALOG_PROJECTION).to_list(None)
+    return await asyncio.get_running_loop().run_in_executor(None, build_snapshot, documents, directory, source_version)
+
+async def _build_from_mongo(directory) -> Dict:
+    from book_recommender_api.app.database import DB_NAME, get_async_client
+    return await build_snapshot_from_db(get_async_client()[DB_NAME], directory)
+
+if __name__ == "__main__":
+    from book_recommender_api.utils.records import read_records
+
+    parser = argparse.ArgumentParser(description="Construye el snapshot binario del catálogo")
+    parser.add_argument("--from-file", help="JSON o JSON Lines de libros (por defecto: colección books de MongoDB)")
+    parser.add_argument("--out", default=CATALOG_SNAPSHOT_DIR or "catalog_snapshot")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.from_file:
+        manifest = build_snapshot(read_records(args.from_file), args.out)
+    else:
+        manifest = asyncio.run(_build_from_mongo(args.out))
+    total = round(time.perf_counter() - started, 4)
+
+    # Directorio publicado según CURRENT: puede no llamarse como la versión (ver write_snapshot)
+    loaded = load_snapshot(current_snapshot(args.out))
+    print(f"✅ Snapshot {manifest['version']}: {manifest['books']} libros ({manifest['skipped']} descartados)")
+    print(f"⏱️  Construcción: {total} s (índice {manifest['index_build_seconds']} s, escritura {manifest['write_seconds']} s)")
+    print(f"⏱️  Carga: {loaded.info['load_seconds']} s")
@@ -1,18 +1,16 @@
 # ✅ user_controller.py — Guarda perfiles de usuario en MongoDB
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime
-from pymongo.collection import Collection
 from book_recommender_api.app.models import FullProfile
-from book_recommender_api.app.database import get_db
+from book_recommender_api.app.database import get_database
 
 router = APIRouter()
 
 @router.post("/api/users/save")
-def save_user_profile(profile: FullProfile):
+async def save_user_profile(profile: FullProfile, db=Depends(get_database)):
     try:
-        db = get_db()
-        users: Collection = db["users"]
+        users = db["users"]
 
         user_doc = {
             "preferences": profile.preferences.dict(),
@@ -20,7 +18,7 @@ def save_user_profile(profile: FullProfile):
             "timestamp": datetime.utcnow().isoformat()
         }
 
-        result = users.insert_one(user_doc)
+        result = await users.insert_one(user_doc)
         return {"status": "success", "inserted_id": str(result.inserted_id)}
 
     except Exception as e:
@@ -0,0 +1,181 @@
+# ✅ vector_engine.py — Motor de puntuación vectorizado (NumPy) sobre todo el catálogo
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from book_recommender_api.app.recommender import WEIGHTS, personality_class, personality_scores_by_class
+
+# Campos multi-etiqueta (matrices multi-hot) y categóricos (columnas de códigos)
+TAG_FIELDS = ("genres", "themes", "emotion_tags")
+CODE_FIELDS = ("tone", "style", "age_range")
+
+# Perfiles por bloque en el modo batch (acota la matriz perfiles × libros en memoria)
+BATCH_CHUNK = 64
+
+
+# -------------------------
+# 🔹 CODIFICACIÓN DEL CATÁLOGO
+# -------------------------
+
+def build_vocabulary(values) -> Dict[str, int]:
+    return {value: idx for idx, value in enumerate(sorted(values))}
+
+def encode_tags(features: Sequence[Dict], field: str, vocab: Dict[str, int]) -> np.ndarray:
+    matrix = np.zeros((len(features), len(vocab)), dtype=np.uint8)
+    for row, book_data in enumerate(features):
+        for tag in book_data[field]:
+            matrix[row, vocab[tag]] = 1
+    return matrix
+
+def encode_codes(features: Sequence[Dict], field: str, vocab: Dict[str, int]) -> np.ndarray:
+    # El código 0 se reserva para el valor vacío, que nunca coincide
+    return np.array([vocab.get(book_data[field], -1) + 1 for book_data in features], dtype=np.int32)
+
+def profile_code(vocab: Dict[str, int], value: str) -> int:
+    # Valor del perfil vacío o ausente del catálogo → -1: no coincide con ningún libro (ni con el 0 = vacío)
+    return vocab[value] + 1 if value in vocab else -1
+
+def encode_personality(features: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    # Firma de tags por libro + tabla firma × clase de personalidad (243 columnas)
+    signatures = {}
+    ids = np.array([signatures.setdefault(book_data["personality_match"], len(signatures)) for book_data in features],
+                   dtype=np.int32)
+    table = np.array([personality_scores_by_class(tags) for tags in signatures], dtype=np.float64)
+    return ids, table.reshape(len(signatures), -1)
+
+
+class VectorCatalog:
+    def __init__(self, vocabularies: Dict[str, Dict[str, int]], tag_matrices: Dict[str, np.ndarray],
+                 code_columns: Dict[str, np.ndarray], personality_ids: np.ndarray, personality_table: np.ndarray):
+        self.vocabularies = vocabularies
+        self.tag_matrices = tag_matrices            # n_libros × |vocabulario| (uint8)
+        self.code_columns = code_columns            # n_libros (int32, 0 = vacío)
+        self.personality_ids = personality_ids      # n_libros: firma de tags de personalidad
+        self.personality_table = personality_table  # n_firmas × 243 clases
+        self._float_matrices = {}
+
+    def __len__(self) -> int:
+        return len(self.personality_ids)
+
+    @classmethod
+    def from_features(cls, features: Sequence[Dict]) -> "VectorCatalog":
+        vocabularies = {}
+        tag_matrices = {}
+        code_columns = {}
+
+        for field in TAG_FIELDS:
+            vocabularies[field] = build_vocabulary({tag for book_data in features for tag in book_data[field]})
+            tag_matrices[field] = encode_tags(features, field, vocabularies[field])
+
+        for field in CODE_FIELDS:
+            vocabularies[field] = build_vocabulary({book_data[field] for book_data in features if book_data[field]})
+            code_columns[field] = encode_codes(features, field, vocabularies[field])
+
+        personality_ids, personality_table = encode_personality(features)
+        return cls(vocabularies, tag_matrices, code_columns, personality_ids, personality_table)
+
+    # -------------------------
+    # 🔹 PUNTUACIÓN
+    # -------------------------
+
+    def overlaps(self, user_data: Dict) -> Dict[str, np.ndarray]:
+        # Tamaño de la intersección por libro: solo se leen las columnas del perfil
+        counts = {}
+        for field in TAG_FIELDS:
+            vocab = self.vocabularies[field]
+            columns = [vocab[tag] for tag in user_data[field] if tag in vocab]
+            counts[field] = self.tag_matrices[field][:, columns].sum(axis=1, dtype=np.int32)
+        return counts
+
+    def personality_scores(self, personality) -> np.ndarray:
+        # Una columna de la tabla precalculada, expandida a todos los libros
+        return self.personality_table[:, personality_class(personality)][self.personality_ids]
+
+    def score(self, user_data: Dict, personality, counts: Dict[str, np.ndarray] = None) -> np.ndarray:
+        if counts is None:
+            counts = self.overlaps(user_data)
+
+        components = {}
+        for field in TAG_FIELDS:
+            components[field] = counts[field] / max(len(user_data[field]), 1)
+        for field in CODE_FIELDS:
+            code = profile_code(self.vocabularies[field], user_data[field])
+            components[field] = (self.code_columns[field] == code).astype(np.float64)
+        components["personality_match"] = self.personality_scores(personality)
+        return weighted_sum(components)
+
+    def rank(self, user_data: Dict, personality, k: Optional[int] = None) -> List[Tuple[int, float]]:
+        # Candidatos con coincidencia mínima y puntuación > 0, de mayor a menor
+        counts = self.overlaps(user_data)
+        scores = self.score(user_data, personality, counts)
+        return ranked_candidates(counts, scores, k)
+
+    # -------------------------
+    # 🔹 PUNTUACIÓN EN LOTE (perfiles × libros)
+    # -------------------------
+
+    def float_matrix(self, field: str) -> np.ndarray:
+        # Copia float32 para el producto matricial (BLAS); los conteos son exactos
+        if field not in self._float_matrices:
+            self._float_matrices[field] = self.tag_matrices[field].astype(np.float32)
+        return self._float_matrices[field]
+
+    def score_batch(self, users: Sequence[Tuple[Dict, object]]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        counts = {}
+        components = {}
+        for field in TAG_FIELDS:
+            vocab = self.vocabularies[field]
+            profile_matrix = np.zeros((len(users), len(vocab)), dtype=np.float32)
+            for row, (user_data, _) in enumerate(users):
+                profile_matrix[row, [vocab[tag] for tag in user_data[field] if tag in vocab]] = 1
+            counts[field] = (profile_matrix @ self.float_matrix(field).T).astype(np.int32)
+            sizes = np.array([max(len(user_data[field]), 1) for user_data, _ in users])
+            components[field] = counts[field] / sizes[:, None]
+
+        for field in CODE_FIELDS:
+            vocab = self.vocabularies[field]
+            codes = np.array([profile_code(vocab, user_data[field]) for user_data, _ in users])
+            components[field] = (self.code_columns[field][None, :] == codes[:, None]).astype(np.float64)
+
+        classes = [personality_class(personality) for _, personality in users]
+        components["personality_match"] = self.personality_table[:, classes].T[:, self.personality_ids]
+        return counts, weighted_sum(components)
+
+    def rank_batch(self, users: Sequence[Tuple[Dict, object]], k: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        results = []
+        for start in range(0, len(users), BATCH_CHUNK):
+            counts, scores = self.score_batch(users[start:start + BATCH_CHUNK])
+            for row in range(len(scores)):
+                row_counts = {field: counts[field][row] for field in TAG_FIELDS}
+                results.append(ranked_candidates(row_counts, scores[row], k))
+        return results
+
+
+def weighted_sum(components: Dict[str, np.ndarray]) -> np.ndarray:
+    # Misma ponderación (y mismo orden de suma) que recommender.score_normalized
+    scores = 0.0
+    for key in WEIGHTS:
+        scores = scores + components[key] * WEIGHTS[key]
+    return np.round(scores, 4)
+
+def ranked_candidates(counts: Dict[str, np.ndarray], scores: np.ndarray, k: Optional[int]) -> List[Tuple[int, float]]:
+    mask = (counts["genres"] > 0) | (counts["themes"] > 0) | (counts["emotion_tags"] > 0)
+    ids = np.flatnonzero(mask & (scores > 0))
+    order = top_k_order(ids, scores[ids], k)
+    return list(zip(order.tolist(), scores[order].tolist()))
+
+
+# -------------------------
+# 🔹 SELECCIÓN PARCIAL (argpartition)
+# -------------------------
+
+def top_k_order(ids: np.ndarray, scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    # ids ascendentes; los empates se resuelven por id como en un sort estable
+    selected = np.arange(len(ids))
+    if k is not None and k < len(ids):
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+    return ids[selected[np.lexsort((selected, -scores[selected]))]]
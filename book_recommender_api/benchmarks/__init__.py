@@ -0,0 +1 @@
+# ✅ benchmarks — Mediciones del camino de recomendación sobre catálogos sintéticos
@@ -0,0 +1,188 @@
+# ✅ benchmarks/run.py — Benchmarks del camino de recomendación sobre catálogos sintéticos
+#
+# Por cada tamaño de catálogo mide:
+#   - compute_score / has_minimum_match / generate_explanation: µs por llamada sobre una muestra del catálogo
+#   - construcción del índice residente (CatalogIndex.from_documents)
+#   - POST /api/recommendation completo a través de TestClient (sin caché de rankings)
+# y escribe un JSON comparable entre commits (--compare muestra la variación respecto a otro resultado).
+#
+# Uso: python -m book_recommender_api.benchmarks.run [--sizes 1000,10000,100000] [--output results.json]
+#        python -m book_recommender_api.benchmarks.run --sizes 1000000 --requests 20
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.benchmarks.synthetic import DATASET_PATH, generate_books, generate_profiles, profile_dataset
+from book_recommender_api.app import books_controller
+from book_recommender_api.app.books_controller import has_minimum_match
+from book_recommender_api.app.cache import recommendation_cache
+from book_recommender_api.app.catalog import CatalogIndex, set_catalog
+from book_recommender_api.app.database import get_database
+from book_recommender_api.app.main import app
+from book_recommender_api.app.memory_db import InMemoryDatabase
+from book_recommender_api.app.models import FullProfile
+from book_recommender_api.app.recommender import compute_score, generate_explanation
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]  # 1_000_000 con --sizes (varios GB de RAM)
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SAMPLE_SIZE = 5_000   # Libros por medición de las funciones sueltas
+PROFILES = 5          # Perfiles distintos en las funciones sueltas
+REQUESTS = 50         # Peticiones medidas al endpoint
+
+
+# ---------------------------
+# ⏱️ Medición
+# ---------------------------
+def summarize(samples_ms: List[float]) -> Dict:
+    ordered = sorted(samples_ms)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 4),
+        "min_ms": round(ordered[0], 4)
+    }
+
+def per_call(func: Callable[[Dict, FullProfile], object], books: List[Dict], profiles: List[FullProfile]) -> Dict:
+    # func(libro, perfil). Cada pasada recorre la muestra con un perfil; se informa también el coste por llamada
+    for book in books[:100]:
+        func(book, profiles[0])  # Calentamiento: cachés de normalización e intérprete
+    samples = []
+    for profile in profiles:
+        start = time.perf_counter()
+        for book in books:
+            func(book, profile)
+        samples.append((time.perf_counter() - start) * 1000)
+    result = summarize(samples)
+    result["per_call_us"] = round(statistics.fmean(samples) * 1000 / max(len(books), 1), 3)
+    return result
+
+
+# ---------------------------
+# 📏 Suite por tamaño de catálogo
+# ---------------------------
+def run_size(size: int, distributions, profiles: List[Dict], sample_size: int, requests: int, seed: int) -> Dict:
+    started = time.perf_counter()
+    books = list(generate_books(size, distributions, seed))
+    generate_seconds = time.perf_counter() - started
+
+    sample = books[:sample_size]
+    scoring_profiles = [FullProfile.parse_obj(profile) for profile in profiles[:PROFILES]]
+    result = {
+        "books": size,
+        "generate_seconds": round(generate_seconds, 3),
+        "compute_score": per_call(lambda book, profile: compute_score(profile, book), sample, scoring_profiles),
+        "has_minimum_match": per_call(has_minimum_match, sample, scoring_profiles),
+        # Las explicaciones solo se generan para los ganadores: basta una muestra corta
+        "generate_explanation": per_call(generate_explanation, sample[:1000], scoring_profiles)
+    }
+
+    started = time.perf_counter()
+    catalog = CatalogIndex.from_documents(books)
+    result["catalog_build_seconds"] = round(time.perf_counter() - started, 3)
+    del books, sample
+
+    # Endpoint completo: validación del perfil, ranking sobre el índice y serialización
+    set_catalog(catalog)
+    app.dependency_overrides[get_database] = lambda: InMemoryDatabase()
+    try:
+        client = TestClient(app)
+        client.post("/api/recommendation", json=profiles[0])  # Calentamiento (p. ej. matrices del motor numpy)
+        samples, statuses = [], {}
+        for profile in islice(iter(profiles * (requests // len(profiles) + 1)), requests):
+            recommendation_cache.clear()
+            start = time.perf_counter()
+            response = client.post("/api/recommendation", json=profile)
+            samples.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        result["recommendation_endpoint"] = {**summarize(samples), "status_codes": statuses}
+    finally:
+        app.dependency_overrides.pop(get_database, None)
+        set_catalog(None)
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes: List[int], sample_size: int = SAMPLE_SIZE, requests: int = REQUESTS,
+              seed: int = 42, dataset=DATASET_PATH) -> Dict:
+    distributions = profile_dataset(dataset)
+    profiles = generate_profiles(max(requests, PROFILES), distributions)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "engine": books_controller.RECOMMENDER_ENGINE,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "sample_size": sample_size,
+            "created_at": datetime.utcnow().isoformat(),
+            "distributions": {field: dist.as_dict() for field, dist in distributions.items()}
+        },
+        "results": {str(size): run_size(size, distributions, profiles, sample_size, requests, seed) for size in sizes}
+    }
+
+
+# ---------------------------
+# 🔍 Comparación entre commits
+# ---------------------------
+COMPARED = ("compute_score", "has_minimum_match", "generate_explanation", "recommendation_endpoint")
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    # Variación del tiempo medio (negativo = más rápido que la referencia)
+    lines = []
+    for size, result in current["results"].items():
+        previous = baseline["results"].get(size)
+        if not previous:
+            continue
+        for name in COMPARED:
+            before, after = previous[name]["mean_ms"], result[name]["mean_ms"]
+            change = (after - before) / before * 100 if before else 0.0
+            lines.append(f"{size:>8} {name:<24} {before:>10.3f} → {after:>10.3f} ms ({change:+.1f} %)")
+    return lines
+
+
+# ---------------------------
+# 🚀 Ejecutar
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del camino de recomendación")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Tamaños separados por comas")
+    parser.add_argument("--sample", type=int, default=SAMPLE_SIZE)
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Por defecto benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="Resultado anterior con el que comparar")
+    args = parser.parse_args()
+
+    report = run_suite([int(size) for size in args.sizes.split(",")], args.sample, args.requests, args.seed)
+    output = Path(args.output or RESULTS_DIR / f"{report['meta']['commit'] or 'local'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    for size, result in report["results"].items():
+        print(f"📚 {size} libros (índice en {result['catalog_build_seconds']} s)")
+        for name in COMPARED:
+            stats = result[name]
+            extra = f", {stats['per_call_us']} µs/llamada" if "per_call_us" in stats else ""
+            print(f"  - {name:<24} media {stats['mean_ms']} ms, p95 {stats['p95_ms']} ms{extra}")
+    print(f"✅ Resultados en {output}")
+
+    if args.compare:
+        print("\n🔍 Comparación con", args.compare)
+        for line in compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8"))):
+            print(line)
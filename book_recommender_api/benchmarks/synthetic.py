@@ -0,0 +1,133 @@
+# ✅ benchmarks/synthetic.py — Catálogos sintéticos con las distribuciones del dataset real
+#
+# Se perfila books_openlibrary_enriched.json (frecuencia de cada tag, longitud de cada lista,
+# valores de tone / style / age_range, etiquetas de personalidad, longitud de 'subjects') y se
+# generan N libros muestreando esas distribuciones. Los campos con cola larga (themes, subgenres,
+# subjects) crean tags nuevos al ritmo del dataset (distintos / apariciones) hasta su tamaño y, a partir
+# de ahí, con la curva de Heaps (distintos ∝ apariciones^β): la cardinalidad crece de forma sublineal,
+# como lo haría con datos reales.
+#
+# Uso: python -m book_recommender_api.benchmarks.synthetic --books 10000 --output data/synthetic_10k.jsonl
+import argparse
+import random
+from collections import Counter
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from book_recommender_api.utils.records import read_records, write_records
+
+DATASET_PATH = Path(__file__).resolve().parent.parent / "data" / "books_openlibrary_enriched.json"
+LIST_FIELDS = ("genres", "subgenres", "themes", "emotion_tags", "personality_match", "subjects")
+SCALAR_FIELDS = ("tone", "style", "age_range")
+GROWING_FIELDS = ("subgenres", "themes", "subjects")  # Vocabulario abierto: crece con el catálogo
+HEAPS_BETA = 0.7
+
+
+class FieldDistribution:
+    # Distribución observada de un campo: valores con su frecuencia y (en listas) longitudes
+    def __init__(self, values: Counter, lengths: Optional[Counter] = None, new_tag_rate: float = 0.0):
+        # Pesos acumulados precalculados: random.choices no los recalcula en cada muestra
+        self.values = list(values)
+        self.cum_weights = list(accumulate(values.values()))
+        self.lengths = list(lengths or [])
+        self.length_cum_weights = list(accumulate((lengths or Counter()).values()))
+        self.new_tag_rate = new_tag_rate
+        self.occurrences = self.cum_weights[-1] if self.cum_weights else 0
+
+    def sample_value(self, rng: random.Random) -> str:
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+    def tag_rate(self, draws: int) -> float:
+        # Derivada de la curva de Heaps ajustada para pasar por (apariciones, distintos) del dataset
+        if draws <= self.occurrences:
+            return self.new_tag_rate
+        return self.new_tag_rate * HEAPS_BETA * (draws / self.occurrences) ** (HEAPS_BETA - 1)
+
+    def sample_list(self, rng: random.Random, field: str, state: Dict[str, int]) -> List[str]:
+        size = rng.choices(self.lengths, cum_weights=self.length_cum_weights)[0] if self.lengths else 0
+        tags = []
+        for _ in range(size):
+            state["draws"] += 1
+            if self.new_tag_rate and rng.random() < self.tag_rate(state["draws"]):
+                state["created"] += 1
+                tags.append(f"{field} {state['created']}")
+            elif self.values:
+                tags.append(self.sample_value(rng))
+        return list(dict.fromkeys(tags))  # Sin repetidos, como en el dataset limpio
+
+    def as_dict(self) -> Dict:
+        return {"distinct": len(self.values), "new_tag_rate": round(self.new_tag_rate, 4),
+                "max_length": max(self.lengths, default=0)}
+
+
+def profile_dataset(path=DATASET_PATH) -> Dict[str, FieldDistribution]:
+    values = {field: Counter() for field in LIST_FIELDS + SCALAR_FIELDS}
+    lengths = {field: Counter() for field in LIST_FIELDS}
+    years = Counter()
+    for book in read_records(path):
+        for field in LIST_FIELDS:
+            tags = book.get(field) or []
+            lengths[field][len(tags)] += 1
+            values[field].update(tags)
+        for field in SCALAR_FIELDS:
+            if book.get(field):
+                values[field][book[field]] += 1
+        if isinstance(book.get("year"), int):
+            years[str(book["year"])] += 1
+
+    distributions = {}
+    for field in LIST_FIELDS:
+        occurrences = sum(values[field].values())
+        rate = len(values[field]) / occurrences if field in GROWING_FIELDS and occurrences else 0.0
+        distributions[field] = FieldDistribution(values[field], lengths[field], rate)
+    for field in SCALAR_FIELDS:
+        distributions[field] = FieldDistribution(values[field])
+    distributions["year"] = FieldDistribution(years)
+    return distributions
+
+
+def generate_books(count: int, distributions: Dict[str, FieldDistribution], seed: int = 42) -> Iterator[Dict]:
+    # Determinista para una semilla: el mismo catálogo en cada commit que se compara
+    rng = random.Random(seed)
+    state = {field: {"draws": 0, "created": 0} for field in LIST_FIELDS}
+    for idx in range(count):
+        book = {"title": f"Libro sintético {idx}", "author": f"Autor {rng.randrange(max(count // 3, 1))}"}
+        for field in LIST_FIELDS:
+            book[field] = distributions[field].sample_list(rng, field, state[field])
+        for field in SCALAR_FIELDS:
+            book[field] = distributions[field].sample_value(rng)
+        book["year"] = int(distributions["year"].sample_value(rng))
+        book["description"] = ""
+        yield book
+
+
+def generate_profiles(count: int, distributions: Dict[str, FieldDistribution], seed: int = 7) -> List[Dict]:
+    # Perfiles (FullProfile como dict) con tags frecuentes del catálogo y rasgos uniformes
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        preferences = {
+            field: list(dict.fromkeys(distributions[field].sample_value(rng) for _ in range(rng.randint(1, 3))))
+            for field in ("genres", "themes", "emotion_tags")
+        }
+        preferences.update({field: distributions[field].sample_value(rng) for field in SCALAR_FIELDS})
+        preferences["language"] = "es"
+        personality = {trait: rng.randint(0, 100) for trait in ("O", "C", "E", "A", "N")}
+        profiles.append({"preferences": preferences, "personality": personality})
+    return profiles
+
+
+# ---------------------------
+# 🚀 Ejecutar
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un catálogo sintético con las distribuciones del dataset real")
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--output", required=True, help=".jsonl (una línea por libro) o .json")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    args = parser.parse_args()
+
+    written = write_records(args.output, generate_books(args.books, profile_dataset(args.dataset), args.seed))
+    print(f"✅ {written} libros sintéticos escritos en {args.output}")
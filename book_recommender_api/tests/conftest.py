@@ -0,0 +1,138 @@
+# ✅ book_recommender_api/tests/conftest.py
+
+import json
+import os
+import random
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from book_recommender_api.app.database import get_database
+from book_recommender_api.app.memory_db import InMemoryDatabase
+from book_recommender_api.app.catalog import set_catalog
+from book_recommender_api.app.models import FullProfile, Preferences, Personality
+from book_recommender_api.app.main import app
+
+
+# -------------------------
+# 🔹 DATOS COMPARTIDOS (helpers, también para parametrize)
+# -------------------------
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "books_openlibrary_enriched.json")
+
+with open(DATA_PATH, "r", encoding="utf-8") as f:
+    dataset_books = json.load(f)
+
+# Algunos libros con tone / style vacíos: un valor vacío nunca debe puntuar (ni contra un perfil vacío)
+books = [
+    dict(book, tone="" if idx % 9 == 0 else book["tone"], style="" if idx % 17 == 0 else book["style"])
+    for idx, book in enumerate(dataset_books)
+]
+
+
+# 🎲 Perfiles aleatorios construidos con valores reales del catálogo (más valores vacíos y desconocidos)
+def random_profiles(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    pool = {
+        field: sorted({tag for book in books for tag in book.get(field, [])})
+        for field in ["genres", "themes", "emotion_tags"]
+    }
+    single = {field: sorted({book[field] for book in books} | {"", "valor inexistente"})
+              for field in ["tone", "style", "age_range"]}
+    profiles = []
+    for _ in range(n):
+        profiles.append(FullProfile.parse_obj({
+            "preferences": {
+                "genres": rnd.sample(pool["genres"], rnd.randint(0, 2)),
+                "themes": rnd.sample(pool["themes"], rnd.randint(0, 4)) + ["tema inexistente"],
+                "emotion_tags": rnd.sample(pool["emotion_tags"], rnd.randint(1, 3)),
+                "tone": rnd.choice(single["tone"]),
+                "style": rnd.choice(single["style"]),
+                "age_range": rnd.choice(single["age_range"]),
+                "language": "es"
+            },
+            "personality": {trait: rnd.randint(0, 100) for trait in "OCEAN"}
+        }))
+    return profiles
+
+
+# 📚 Catálogo ficticio (con 'subjects' y un documento inválido)
+mock_books = [
+    {
+        "title": "Distopía Uno",
+        "author": "Autora A",
+        "genres": ["Ciencia Ficción", "Distopía"],
+        "subgenres": [],
+        "themes": ["Libertad", "control social"],
+        "emotion_tags": ["angustia"],
+        "tone": "Oscuro",
+        "style": "directo",
+        "age_range": "16+",
+        "personality_match": ["Alta apertura"],
+        "year": 1949,
+        "description": "",
+        "subjects": ["fiction", "dystopias"]
+    },
+    {
+        "title": "Cuento Luminoso",
+        "author": "Autor B",
+        "genres": ["Fantasía"],
+        "subgenres": ["cuento"],
+        "themes": ["amistad"],
+        "emotion_tags": ["ternura", "alegría"],
+        "tone": "luminoso",
+        "style": "poético",
+        "age_range": "12+",
+        "personality_match": ["Alta amabilidad", "Bajo neuroticismo"],
+        "year": 1990,
+        "description": "Un cuento."
+    },
+    {"title": "Sin campos obligatorios"}
+]
+
+mock_profile = FullProfile(
+    preferences=Preferences(
+        genres=["ciencia ficcion"],
+        themes=["libertad"],
+        tone="oscuro",
+        style="directo",
+        emotion_tags=["angustia"],
+        age_range="16+",
+        language="es"
+    ),
+    personality=Personality(O=75, C=50, E=50, A=50, N=50)
+)
+
+
+# 🧪 Índice residente del test: se devuelve set_catalog y se restablece aunque falle una aserción
+@pytest.fixture
+def resident_catalog():
+    set_catalog(None)
+    yield set_catalog
+    set_catalog(None)
+
+
+# 🧪 Base de datos en memoria en lugar de MongoDB (CI sin servidor)
+@pytest.fixture
+def memory_db(resident_catalog):
+    db = InMemoryDatabase()
+    app.dependency_overrides[get_database] = lambda: db
+    yield db
+    app.dependency_overrides.pop(get_database, None)
+
+
+# 🧪 MongoDB real (semántica de $round, $setIntersection...): se omite si no hay servidor
+@pytest.fixture
+def mongo_db():
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"), serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip("MongoDB no disponible")
+    name = "book_recommender_test"
+    client.drop_database(name)
+    yield client[name]
+    client.drop_database(name)
+    client.close()
@@ -0,0 +1,24 @@
+# ✅ book_recommender_api/tests/test_benchmarks.py
+
+from book_recommender_api.app.models import BookOut, FullProfile
+from book_recommender_api.benchmarks.run import compare, run_suite
+from book_recommender_api.benchmarks.synthetic import generate_books, generate_profiles, profile_dataset
+
+
+# 🔹 Test 1: el catálogo sintético es determinista y válido para la API
+def test_synthetic_catalog():
+    distributions = profile_dataset()
+    books = list(generate_books(200, distributions, seed=1))
+    assert books == list(generate_books(200, distributions, seed=1))
+    assert all(BookOut(**book) for book in books)
+    assert any(book["subjects"] for book in books)
+    assert all(FullProfile.parse_obj(profile) for profile in generate_profiles(5, distributions))
+
+
+# 🔹 Test 2: la suite produce resultados comparables entre ejecuciones
+def test_benchmark_suite_smoke():
+    report = run_suite([50], sample_size=20, requests=3)
+    result = report["results"]["50"]
+    assert {"compute_score", "has_minimum_match", "generate_explanation", "recommendation_endpoint"} <= set(result)
+    assert result["recommendation_endpoint"]["runs"] == 3
+    assert len(compare(report, report)) == 4
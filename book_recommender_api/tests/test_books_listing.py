@@ -0,0 +1,73 @@
+# ✅ book_recommender_api/tests/test_books_listing.py
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.main import app
+from book_recommender_api.app.repository import replace_books
+
+# 📚 Catálogo ficticio con 'subjects' (nunca debe salir en el listado)
+books = [
+    {
+        "title": f"Libro {i}",
+        "author": "Autora",
+        "genres": ["fantasía"],
+        "subgenres": [],
+        "themes": ["amistad"],
+        "emotion_tags": ["ternura"],
+        "tone": "luminoso",
+        "style": "poético",
+        "age_range": "12+",
+        "personality_match": ["Alta amabilidad"],
+        "year": 2000 + i,
+        "description": "",
+        "subjects": ["fiction"]
+    }
+    for i in range(5)
+]
+
+
+# 🔹 Test 1: las páginas se encadenan con el cursor opaco y cubren el catálogo una vez
+def test_books_pagination(memory_db):
+    asyncio.run(replace_books(memory_db, books))
+    client = TestClient(app)
+
+    titles, after = [], None
+    while True:
+        params = {"limit": 2, **({"after": after} if after else {})}
+        response = client.get("/api/books", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert all("subjects" not in book and "_id" not in book and "genres_norm" not in book for book in page)
+        titles += [book["title"] for book in page]
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            break
+
+    assert titles == [book["title"] for book in books]
+    assert client.get("/api/books", params={"after": "no-es-un-cursor"}).status_code == 400
+
+
+# 🔹 Test 2: proyección con fields= (y campos desconocidos rechazados)
+def test_books_fields_projection(memory_db):
+    asyncio.run(replace_books(memory_db, books))
+    client = TestClient(app)
+
+    response = client.get("/api/books", params={"fields": "title,year"})
+    assert response.json()[0] == {"title": "Libro 0", "year": 2000}
+    assert client.get("/api/books", params={"fields": "title,subjects"}).status_code == 422
+
+
+# 🔹 Test 3: modo NDJSON — un libro por línea, todo el catálogo desde 'after'
+def test_books_ndjson_stream(memory_db):
+    asyncio.run(replace_books(memory_db, books))
+    client = TestClient(app)
+
+    first_page = client.get("/api/books", params={"limit": 2})
+    response = client.get("/api/books", params={"format": "ndjson", "fields": "title",
+                                                 "after": first_page.headers["X-Next-Cursor"]})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"title": f"Libro {i}"} for i in range(2, 5)]
@@ -0,0 +1,91 @@
+# ✅ book_recommender_api/tests/test_cache.py
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.models import FullProfile, Preferences, Personality
+from book_recommender_api.app.cache import RecommendationCache, profile_fingerprint, recommendation_cache
+from book_recommender_api.app.catalog import CatalogIndex, set_catalog
+from book_recommender_api.app.recommender import normalize_profile
+from book_recommender_api.app.main import app
+
+
+def make_profile(genres, themes, O=75, N=30):
+    return FullProfile(
+        preferences=Preferences(
+            genres=genres,
+            themes=themes,
+            tone="oscuro",
+            style="directo",
+            emotion_tags=["alerta"],
+            age_range="16+",
+            language="es"
+        ),
+        personality=Personality(O=O, C=50, E=50, A=50, N=N)
+    )
+
+def fingerprint(profile: FullProfile) -> str:
+    return profile_fingerprint(normalize_profile(profile), profile.personality)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# 🔹 Test 1: la huella ignora orden, duplicados, mayúsculas/acentos y valores dentro de la misma banda
+def test_fingerprint_is_canonical():
+    base = make_profile(["Ciencia Ficción", "Distopía"], ["libertad"])
+    same = make_profile(["distopia", "ciencia ficcion", "Distopía"], ["Libertad"], O=90, N=10)
+    assert fingerprint(base) == fingerprint(same)
+    assert fingerprint(base) != fingerprint(make_profile(["Distopía"], ["libertad"]))
+    assert fingerprint(base) != fingerprint(make_profile(["Ciencia Ficción", "Distopía"], ["libertad"], O=50))
+
+
+# 🔹 Test 2: LRU con expulsión por tamaño y expiración por TTL
+def test_lru_and_ttl():
+    clock = FakeClock()
+    cache = RecommendationCache(maxsize=2, ttl=10, clock=clock)
+    cache.put("a", "v1", [1])
+    cache.put("b", "v1", [2])
+    assert cache.get("a", "v1") == [1]
+    cache.put("c", "v1", [3])               # expulsa "b" (el menos usado)
+    assert cache.get("b", "v1") is None
+    clock.now = 10
+    assert cache.get("a", "v1") is None     # expirado
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+
+
+# 🔹 Test 3: un cambio de versión del catálogo vacía la caché
+def test_version_change_invalidates():
+    cache = RecommendationCache(maxsize=10, ttl=60)
+    cache.put("a", "v1", [])
+    assert cache.get("a", "v1") == []
+    assert cache.get("a", "v2") is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+# 🔹 Test 4: el endpoint reutiliza el ranking y expone los contadores
+def test_recommend_hits_cache():
+    book = {
+        "title": "Libro", "author": "A", "genres": ["Distopía"], "subgenres": [], "themes": ["libertad"],
+        "emotion_tags": ["alerta"], "tone": "oscuro", "style": "directo", "age_range": "16+",
+        "personality_match": ["Alta apertura"], "year": 2000, "description": ""
+    }
+    recommendation_cache.clear()
+    set_catalog(CatalogIndex.from_documents([book]))
+    try:
+        client = TestClient(app)
+        before = client.get("/api/recommendations/cache").json()
+        first = client.post("/api/recommendation", json=make_profile(["Distopía"], ["libertad"]).dict())
+        second = client.post("/api/recommendation", json=make_profile(["distopia"], ["Libertad"], O=99).dict())
+        assert first.json() == second.json()
+        after = client.get("/api/recommendations/cache").json()
+        assert after["hits"] == before["hits"] + 1
+        assert after["misses"] == before["misses"] + 1
+    finally:
+        set_catalog(None)
@@ -0,0 +1,162 @@
+# ✅ book_recommender_api/tests/test_catalog.py
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.models import BookOut, FullProfile, RecommendationsResponse
+from book_recommender_api.app import catalog as catalog_module
+from book_recommender_api.app.catalog import CatalogIndex, TagVocabulary, get_catalog, set_catalog, score_entry
+from book_recommender_api.app.repository import replace_books
+from book_recommender_api.app.recommender import compute_score, normalize_profile, score_normalized, shares_any_tag
+from book_recommender_api.app.main import app
+from book_recommender_api.tests.conftest import mock_books, mock_profile
+
+
+# 🔹 Test 1: el índice descarta documentos inválidos y conserva el orden
+def test_catalog_from_documents():
+    catalog = CatalogIndex.from_documents(mock_books)
+    assert len(catalog) == 2
+    assert catalog.skipped == 1
+    assert [entry.payload.title for entry in catalog.books] == ["Distopía Uno", "Cuento Luminoso"]
+    assert catalog.decode(0)["genres"] == frozenset({"ciencia ficcion", "distopia"})
+
+
+# 🔹 Test 2: la versión depende del contenido
+def test_catalog_version():
+    assert CatalogIndex.from_documents(mock_books).version == CatalogIndex.from_documents(mock_books).version
+    assert CatalogIndex.from_documents(mock_books[:1]).version != CatalogIndex.from_documents(mock_books).version
+
+
+# 🔹 Test 3: puntuar sobre el índice equivale a compute_score
+def test_indexed_score_matches_compute_score():
+    catalog = CatalogIndex.from_documents(mock_books)
+    user_data = normalize_profile(mock_profile)
+    query = catalog.encode_query(user_data, mock_profile.personality)
+    for entry, book in zip(catalog.books, mock_books):
+        expected = compute_score(mock_profile, book)
+        assert score_normalized(user_data, catalog.decode(entry.book_id), mock_profile.personality) == expected
+        assert score_entry(query, entry.features) == expected
+
+
+# 🔹 Test 4: máscaras de bits ida y vuelta, tags frecuentes en bits bajos
+def test_tag_vocabulary_roundtrip():
+    vocab = TagVocabulary.from_counts({"raro": 1, "comun": 5, "medio": 3})
+    assert vocab.tags == ["comun", "medio", "raro"]
+    mask = vocab.encode(["raro", "comun", "desconocido"])
+    assert mask == 0b101
+    assert vocab.decode(mask) == frozenset({"raro", "comun"})
+
+
+# 🔹 Test 5: el índice invertido equivale al filtrado completo
+def test_candidates_match_full_scan():
+    catalog = CatalogIndex.from_documents(mock_books)
+    assert catalog.postings["genres"]["fantasia"] == [1]
+    tender_profile = FullProfile(
+        preferences=mock_profile.preferences.copy(update={"emotion_tags": ["Ternura"]}),
+        personality=mock_profile.personality
+    )
+    for profile in (mock_profile, tender_profile):
+        user_data = normalize_profile(profile)
+        expected = [entry.book_id for entry in catalog.books if shares_any_tag(catalog.decode(entry.book_id), user_data)]
+        assert catalog.candidates(user_data) == expected
+
+
+# 🔹 Test 6: el endpoint sirve desde el índice residente
+def test_recommend_uses_resident_catalog():
+    set_catalog(CatalogIndex.from_documents(mock_books))
+    try:
+        client = TestClient(app)
+        response = client.post("/api/recommendation", json=mock_profile.dict())
+        assert response.status_code == 200
+        assert response.json()["recommendation"]["title"] == "Distopía Uno"
+        assert "subjects" not in response.json()["recommendation"]
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 7: catálogo vacío → 404
+def test_recommend_empty_catalog():
+    set_catalog(CatalogIndex.from_documents([]))
+    try:
+        response = TestClient(app).post("/api/recommendation", json=mock_profile.dict())
+        assert response.status_code == 404
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 8: una importación nueva se recoge sin dejar de servir el índice anterior
+def test_catalog_reloads_new_version(memory_db, monkeypatch):
+    valid_books = mock_books[:3]
+
+    async def scenario():
+        await replace_books(memory_db, valid_books[:2])
+        first = await get_catalog(memory_db)
+        await replace_books(memory_db, valid_books)
+
+        monkeypatch.setattr(catalog_module, "CATALOG_REFRESH_INTERVAL", 0)
+        assert await get_catalog(memory_db) is first  # la reconstrucción va en segundo plano
+        await catalog_module._refresh_task
+        reloaded = await get_catalog(memory_db)
+        assert reloaded is not first
+        assert len(reloaded.books) == len(CatalogIndex.from_documents(valid_books).books)
+
+    asyncio.run(scenario())
+
+
+# 🔹 Test 9: opciones de campos precalculadas por versión, revalidadas con ETag
+def test_field_options_etag():
+    set_catalog(CatalogIndex.from_documents(mock_books))
+    try:
+        client = TestClient(app)
+        response = client.get("/api/field-options")
+        assert response.status_code == 200
+        assert "ciencia ficcion" in response.json()["genres"]
+        assert "oscuro" in response.json()["tone"]
+        etag = response.headers["ETag"]
+
+        cached = client.get("/api/field-options", headers={"If-None-Match": f'W/{etag}, "otro"'})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        set_catalog(CatalogIndex.from_documents(mock_books[1:]))
+        changed = client.get("/api/field-options", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 10: las respuestas empalman el JSON precalculado y conservan la forma del modelo
+def test_recommendations_splice_precomputed_json():
+    catalog = CatalogIndex.from_documents(mock_books)
+    set_catalog(catalog)
+    try:
+        response = TestClient(app).post("/api/recommendations", params={"k": 2}, json=mock_profile.dict())
+        assert response.status_code == 200
+        parsed = RecommendationsResponse.parse_raw(response.content)
+        assert parsed.recommendations[0].book == BookOut(**mock_books[0])
+        assert response.json()["recommendations"][0]["book"] == BookOut(**mock_books[0]).dict()
+        assert catalog.books[0].raw.decode("utf-8") in response.text
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 11: peticiones en frío concurrentes comparten una sola carga del índice
+def test_cold_requests_share_one_load(memory_db, monkeypatch):
+    builds = []
+    build_catalog = catalog_module.build_catalog
+
+    async def counted_build(db):
+        builds.append(db)
+        await asyncio.sleep(0.01)
+        return await build_catalog(db)
+    monkeypatch.setattr(catalog_module, "build_catalog", counted_build)
+
+    async def scenario():
+        await replace_books(memory_db, mock_books[:3])
+        catalogs = await asyncio.gather(*(get_catalog(memory_db) for _ in range(10)))
+        assert len(builds) == 1
+        assert all(catalog is catalogs[0] for catalog in catalogs)
+
+    asyncio.run(scenario())
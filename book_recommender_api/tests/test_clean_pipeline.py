@@ -0,0 +1,60 @@
+# ✅ book_recommender_api/tests/test_clean_pipeline.py
+
+import copy
+import json
+
+import pytest
+
+from book_recommender_api.utils.clean_pipeline import MapStage, StreamStage, default_stages, run_pipeline
+from book_recommender_api.utils.records import read_records
+from book_recommender_api.utils.apply_field_corrections import correct_book, correction_maps
+from book_recommender_api.utils.eliminar_duplicados_json import libros_unicos
+from book_recommender_api.utils.normalize_and_clean_genres import clean_books, load_valid_genres
+from book_recommender_api.utils.validate_books import validate_books
+from book_recommender_api.tests.conftest import books
+
+
+def drop_untitled(book):
+    return book if book.get("title") else None
+
+
+# 🔹 Test 1: una sola pasada equivale a la cadena de scripts (géneros → correcciones → duplicados → validación)
+@pytest.mark.parametrize("workers", [0, 2])
+def test_pipeline_matches_script_chain(tmp_path, workers):
+    sample = copy.deepcopy(books[:40])
+    dataset = [sample[:5]] + sample + sample[:3]  # lista anidada + duplicados
+    source = tmp_path / "books.json"
+    source.write_text(json.dumps(dataset, ensure_ascii=False), encoding="utf-8")
+    corrections = tmp_path / "corrections.json"
+    corrections.write_text(json.dumps({"tone": ["OSCURO", "Reflexivo"]}), encoding="utf-8")
+
+    issues = []
+    report = run_pipeline(source, tmp_path / "clean.jsonl", default_stages(issues, corrections=corrections),
+                          workers=workers, chunk_size=7)
+
+    # Cadena de scripts, paso a paso
+    flat = copy.deepcopy(sample[:5] + sample + sample[:3])
+    step = clean_books(flat, load_valid_genres(), {"modified": 0})
+    maps = correction_maps({"tone": ["OSCURO", "Reflexivo"]})
+    step = (correct_book(book, maps)[0] for book in step)
+    expected = list(libros_unicos(step, {"antes": 0}))
+
+    assert list(read_records(tmp_path / "clean.jsonl")) == expected
+    assert issues == validate_books(expected)
+    assert (report["read"], report["written"]) == (len(dataset), len(expected))
+    assert report["stages"]["flatten"]["out"] == len(flat)
+    deduplicate = report["stages"]["deduplicate"]
+    assert (deduplicate["in"], deduplicate["out"]) == (len(flat), 40)
+
+
+# 🔹 Test 2: una etapa map puede descartar libros y cada etapa cuenta entradas/salidas
+def test_map_stage_can_drop_records(tmp_path):
+    source = tmp_path / "books.jsonl"
+    source.write_text("\n".join(json.dumps(book) for book in [{"title": "A"}, {"title": ""}, {"title": "B"}]),
+                      encoding="utf-8")
+    stages = [MapStage("drop_untitled", drop_untitled), StreamStage("identity", lambda books: iter(books))]
+    report = run_pipeline(source, tmp_path / "out.jsonl", stages)
+    assert [book["title"] for book in read_records(tmp_path / "out.jsonl")] == ["A", "B"]
+    assert report["stages"]["drop_untitled"]["in"] == 3
+    assert report["stages"]["drop_untitled"]["out"] == 2
+    assert report["stages"]["identity"]["out"] == 2
@@ -0,0 +1,68 @@
+# ✅ book_recommender_api/tests/test_database.py
+
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app import database
+from book_recommender_api.app.database import PoolMetrics, client_options
+from book_recommender_api.app.catalog import set_catalog
+from book_recommender_api.app.main import app
+
+EVENT = SimpleNamespace(address=("localhost", 27017), connection_id=1)
+
+
+# 🔹 Test 1: los eventos CMAP se traducen en conexiones en uso y esperas de checkout
+def test_pool_metrics_track_checkouts():
+    metrics = PoolMetrics()
+    metrics.connection_created(EVENT)
+    metrics.connection_check_out_started(EVENT)
+    metrics.connection_checked_out(EVENT)
+    metrics.connection_check_out_started(EVENT)
+    metrics.connection_checked_out(EVENT)
+    metrics.connection_checked_in(EVENT)
+    metrics.connection_check_out_started(EVENT)
+    metrics.connection_check_out_failed(EVENT)
+
+    stats = metrics.stats()
+    assert (stats["in_use"], stats["peak_in_use"], stats["open"]) == (1, 2, 1)
+    assert (stats["checkouts"], stats["checkout_failures"]) == (2, 1)
+    assert 0 <= stats["wait_ms"]["p50"] <= stats["wait_ms"]["max"]
+
+
+# 🔹 Test 2: pool y timeouts configurables por entorno, con el listener registrado
+def test_client_options_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "250")
+    monkeypatch.delenv("MONGO_SOCKET_TIMEOUT_MS", raising=False)
+    options = client_options()
+    assert options["waitQueueTimeoutMS"] == 250
+    assert "socketTimeoutMS" not in options
+    assert options["event_listeners"] == [database.pool_metrics]
+
+
+# 🔹 Test 3: el lifespan abre un único cliente y lo cierra al apagar
+def test_lifespan_shares_one_client(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_URI", "memory://")
+    monkeypatch.setattr(database, "_async_client", None)
+    with TestClient(app) as client:
+        shared = database._async_client
+        assert shared is not None
+        assert client.get("/health").json()["status"] == "ok"
+        assert database.get_async_client() is shared
+        assert "in_use" in client.get("/health/pool").json()
+    assert database._async_client is None
+    set_catalog(None)
+
+
+# 🔹 Test 4: sin MongoDB el arranque no espera al timeout por defecto de selección de servidor
+def test_startup_without_mongo_is_bounded(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_URI", "mongodb://127.0.0.1:9")
+    monkeypatch.setattr(database, "MONGO_STARTUP_TIMEOUT_MS", 200)
+    monkeypatch.setattr(database, "_async_client", None)
+    set_catalog(None)
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        assert client.get("/").status_code == 200
+        assert time.perf_counter() - started < 5
+    assert database._async_client is None
@@ -0,0 +1,49 @@
+# ✅ book_recommender_api/tests/test_explain.py
+
+import asyncio
+
+from bson.objectid import ObjectId
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.main import app
+
+books = [
+    {
+        "title": f"Libro {idx}", "author": "A", "genres": genres, "subgenres": [], "themes": ["libertad"],
+        "emotion_tags": ["alerta"], "tone": "oscuro", "style": style, "age_range": "16+",
+        "personality_match": ["Alta apertura"], "year": 2000, "description": ""
+    }
+    for idx, (genres, style) in enumerate([
+        (["Distopía"], "directo"), ([], "poético"), (["Distopía"], "poético"),
+        (["Ensayo"], "directo"), ([], "directo"), (["Distopía"], "directo")
+    ])
+]
+
+user = {
+    "_id": ObjectId("64b7f0000000000000000000"),
+    "preferences": {
+        "genres": ["distopia"], "themes": ["Libertad"], "tone": "oscuro", "style": "directo",
+        "emotion_tags": ["ternura"], "age_range": "16+", "language": "es"
+    },
+    "personality": {"O": 80, "C": 50, "E": 50, "A": 50, "N": 50}
+}
+
+
+# 🔹 Test 1: top 5 en una sola pasada, con desglose de coincidencias
+def test_explain_recommendation(memory_db):
+    asyncio.run(memory_db["books"].insert_many([dict(book) for book in books]))
+    asyncio.run(memory_db["users"].insert_one(dict(user)))
+    response = TestClient(app).get("/explain/explain-recommendation", params={"user_id": str(user["_id"])})
+    assert response.status_code == 200
+    result = response.json()
+    assert [item["book"] for item in result] == ["Libro 0", "Libro 5", "Libro 2", "Libro 3", "Libro 4"]
+    assert result[0]["matched"]["genres"] == ["distopia"]
+    assert result[0]["matched"]["personality_tags"] == ["Alta apertura"]
+    assert "géneros distopia" in result[0]["explanation"]
+
+
+# 🔹 Test 2: usuario inexistente o id inválido → 404
+def test_explain_unknown_user(memory_db):
+    client = TestClient(app)
+    assert client.get("/explain/explain-recommendation", params={"user_id": "x"}).status_code == 404
+    assert client.get("/explain/explain-recommendation", params={"user_id": str(ObjectId())}).status_code == 404
@@ -0,0 +1,75 @@
+# ✅ book_recommender_api/tests/test_memory.py
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app import admin
+from book_recommender_api.app.catalog import CatalogIndex
+from book_recommender_api.app.main import app
+from book_recommender_api.app.memory import DocumentStats, SizeCounter, deep_sizeof, document_stats
+from book_recommender_api.app.repository import replace_books
+from book_recommender_api.tests.conftest import mock_books
+
+
+# 🔹 Test 1: los objetos compartidos se cuentan una sola vez
+def test_deep_sizeof_counts_shared_objects_once():
+    tags = ["x" * 100 for _ in range(3)]
+    shared = [tags[0]] * 3
+    assert deep_sizeof(tags) > deep_sizeof(shared)
+
+    counter = SizeCounter()
+    first = counter.measure(tags)["heap_bytes"]
+    assert counter.measure(tags)["heap_bytes"] == 0 and first > 0
+
+
+# 🔹 Test 2: coste de 'subjects' y de los strings repetidos frente al JSON original
+def test_document_stats():
+    # Dos copias decodificadas del mismo libro: como json.loads, cada una con sus propios strings
+    documents = [json.loads(json.dumps(mock_books[0])) for _ in range(2)]
+    stats = document_stats(documents)
+    assert stats["documents"] == 2
+    assert 0 < stats["subjects_json_bytes"] < stats["raw_json_bytes"]
+    assert 0 < stats["python_subjects_bytes"] < stats["python_objects_bytes"]
+    assert stats["duplicate_string_bytes"] == stats["string_values_bytes"] // 2
+
+
+# 🔹 Test 3: /admin/memory por estructura y comparación con la colección
+def test_memory_endpoint(memory_db, resident_catalog, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secreto")
+    asyncio.run(replace_books(memory_db, mock_books[:2]))
+    resident_catalog(CatalogIndex.from_documents(mock_books))
+
+    client = TestClient(app)
+    assert client.get("/admin/memory").status_code == 403
+    report = client.get("/admin/memory", params={"documents": True}, headers={"X-Admin-Token": "secreto"}).json()
+    assert report["books"] == 2
+    assert report["structures"]["catalog.books"]["heap_bytes"] > 0
+    assert "recommendation_cache" in report["structures"]
+    assert report["documents"]["documents"] == 2
+    assert report["comparison"]["catalog_vs_raw_json"] > 0
+
+
+# 🔹 Test 4: los documentos se miden por lotes en el threadpool, nunca en el event loop
+def test_memory_documents_measured_off_event_loop(memory_db, resident_catalog, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secreto")
+    monkeypatch.setattr(admin, "DOCUMENT_BATCH", 2)
+    asyncio.run(replace_books(memory_db, mock_books[:3]))
+    resident_catalog(CatalogIndex.from_documents(mock_books))
+
+    on_loop = []
+    add = DocumentStats.add
+
+    def checked_add(self, doc):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(doc)
+        except RuntimeError:
+            pass
+        add(self, doc)
+    monkeypatch.setattr(DocumentStats, "add", checked_add)
+
+    report = TestClient(app).get("/admin/memory", params={"documents": True}, headers={"X-Admin-Token": "secreto"}).json()
+    assert report["documents"]["documents"] == 3
+    assert on_loop == []
@@ -0,0 +1,60 @@
+# ✅ book_recommender_api/tests/test_memory_db.py
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.memory_db import InMemoryDatabase, matches, project
+from book_recommender_api.app.main import app
+
+profile_payload = {
+    "preferences": {
+        "genres": ["Distopía"], "themes": ["libertad"], "tone": "oscuro", "style": "directo",
+        "emotion_tags": ["alerta"], "age_range": "16+", "language": "es"
+    },
+    "personality": {"O": 70, "C": 50, "E": 50, "A": 50, "N": 30}
+}
+
+
+# 🔹 Test 1: filtros y proyecciones del subconjunto de MongoDB soportado
+def test_filters_and_projection():
+    doc = {"_id": 1, "title": "T", "genres": ["a", "b"], "year": 2000, "subjects": ["x"]}
+    assert matches(doc, {"genres": "a"})
+    assert matches(doc, {"$or": [{"genres": {"$in": ["z"]}}, {"year": {"$gte": 2000}}]})
+    assert not matches(doc, {"language": {"$exists": True}})
+    assert project(doc, {"_id": 0, "subjects": 0}) == {"title": "T", "genres": ["a", "b"], "year": 2000}
+    assert project(doc, {"title": 1}) == {"_id": 1, "title": "T"}
+
+
+# 🔹 Test 2: operaciones asíncronas de colección y cursor
+def test_async_collection_operations():
+    async def scenario():
+        db = InMemoryDatabase()
+        await db["books"].insert_many([{"n": 3}, {"n": 1}, {"n": 2}])
+        assert [d["n"] for d in await db["books"].find({}, {"_id": 0}).sort("n").to_list(None)] == [1, 2, 3]
+        assert [d["n"] async for d in db["books"].find({"n": {"$gt": 1}}).sort("n", -1).limit(1)] == [3]
+        result = await db["books"].update_one({"n": 1}, {"$set": {"n": 10}})
+        assert result.modified_count == 1
+        assert await db["books"].count_documents({"n": {"$gte": 3}}) == 2
+        assert (await db["books"].delete_many({})).deleted_count == 3
+        assert await db.command("ping") == {"ok": 1.0}
+    asyncio.run(scenario())
+
+
+# 🔹 Test 3: los routers async funcionan contra la base de datos en memoria
+def test_routers_with_memory_db(memory_db):
+    client = TestClient(app)
+    assert client.get("/health").json()["status"] == "ok"
+
+    user_id = client.post("/profile/register", json={"username": "ana", "email": "ana@example.com"}).json()["user_id"]
+    assert client.post("/profile/register", json={"username": "ana", "email": "ana@example.com"}).status_code == 400
+    assert client.post(f"/profile/add-personality/{user_id}", json=profile_payload["personality"]).status_code == 200
+    assert client.get(f"/profile/profile/{user_id}").json()["personality"]["O"] == 70
+    assert client.get("/profile/profile/desconocido").status_code == 404
+
+    saved = client.post("/api/users/api/users/save", json=profile_payload).json()
+    assert saved["status"] == "success"
+    assert asyncio.run(memory_db["users"].count_documents({})) == 2
+
+    # Sin libros en la base de datos no hay recomendación posible
+    assert client.post("/api/recommendation", json=profile_payload).status_code == 404
@@ -0,0 +1,39 @@
+# ✅ book_recommender_api/tests/test_metrics.py
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.catalog import CatalogIndex, set_catalog
+from book_recommender_api.app.main import app
+from book_recommender_api.app.metrics import Histogram
+from book_recommender_api.tests.conftest import mock_books, mock_profile
+
+
+# 🔹 Test 1: histograma acumulado en formato de exposición
+def test_histogram_exposition():
+    histogram = Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "scoring")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{stage="scoring",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="scoring",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{stage="scoring",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="scoring"} 4' in lines
+
+
+# 🔹 Test 2: /metrics expone rutas (por plantilla), etapas, candidatos y tamaño del catálogo
+def test_metrics_endpoint():
+    set_catalog(CatalogIndex.from_documents(mock_books))
+    try:
+        client = TestClient(app)
+        assert client.post("/api/recommendation", json=mock_profile.dict()).status_code == 200
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'http_requests_total{method="POST",route="/api/recommendation",status="200"}' in body
+        assert 'http_request_duration_seconds_count{method="POST",route="/api/recommendation"}' in body
+        for stage in ("catalog_fetch", "candidate_filter", "scoring", "selection", "explanation", "serialization"):
+            assert f'recommendation_stage_seconds_count{{stage="{stage}"}}' in body
+        assert "recommendation_candidates_count" in body
+        assert "catalog_books 2" in body
+    finally:
+        set_catalog(None)
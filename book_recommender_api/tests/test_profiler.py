@@ -0,0 +1,80 @@
+# ✅ book_recommender_api/tests/test_profiler.py
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app.catalog import CatalogIndex, set_catalog
+from book_recommender_api.app.main import app
+from book_recommender_api.app.profiler import SamplingProfiler
+from book_recommender_api.tests.conftest import mock_books, mock_profile
+
+
+def busy_loop(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+# 🔹 Test 1: el muestreador ve la función activa y mide su propio coste
+def test_sampling_profiler_collapsed_and_speedscope():
+    with SamplingProfiler(interval=0.001, thread_ids={threading.get_ident()}) as profiler:
+        busy_loop(0.2)
+    profile = profiler.profile
+
+    assert profile.samples > 0
+    assert "busy_loop" in profile.collapsed()
+    assert 0 <= profile.stats()["overhead_percent"] < 100
+    speedscope = profile.speedscope()
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    assert any(frame["name"] == "busy_loop" for frame in speedscope["shared"]["frames"])
+
+
+# 🔹 Test 2: solo administración (desactivado sin ADMIN_TOKEN, 403 con token erróneo)
+def test_profile_endpoint_requires_admin(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/admin/profile", params={"seconds": 0.05}).status_code == 404
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secreto")
+    assert client.get("/admin/profile", params={"seconds": 0.05},
+                      headers={"X-Admin-Token": "otro"}).status_code == 403
+    response = client.get("/admin/profile", params={"seconds": 0.05, "format": "collapsed"},
+                          headers={"X-Admin-Token": "secreto"})
+    assert response.status_code == 200
+    assert "X-Profile-Overhead-Percent" in response.headers
+
+
+# 🔹 Test 3: ?profile=1 devuelve el perfil de la recomendación en lugar de la respuesta
+def test_recommendation_profile_mode(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secreto")
+    set_catalog(CatalogIndex.from_documents(mock_books))
+    try:
+        client = TestClient(app)
+        response = client.post("/api/recommendation", params={"profile": 1}, json=mock_profile.dict(),
+                               headers={"X-Admin-Token": "secreto"})
+        assert response.status_code == 200
+        assert response.headers["X-Profiled-Status"] == "200"
+        assert response.json()["$schema"].startswith("https://www.speedscope.app")
+
+        denied = client.post("/api/recommendation", params={"profile": 1}, json=mock_profile.dict())
+        assert denied.status_code == 403
+        assert client.post("/api/recommendation", json=mock_profile.dict()).json()["recommendation"]
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 4: sin ADMIN_TOKEN, ?profile=1 se ignora y el cliente recibe su recomendación
+def test_profile_flag_ignored_when_disabled(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    set_catalog(CatalogIndex.from_documents(mock_books))
+    try:
+        response = TestClient(app).post("/api/recommendation", params={"profile": 1}, json=mock_profile.dict())
+        assert response.status_code == 200
+        assert "X-Profiled-Status" not in response.headers
+        assert response.json()["recommendation"]
+    finally:
+        set_catalog(None)
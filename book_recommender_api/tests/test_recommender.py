@@ -3,6 +3,7 @@
 import pytest
 from book_recommender_api.app.models import FullProfile, Preferences, Personality
 from book_recommender_api.app.recommender import compute_score, match_personality, generate_explanation, score_book
+from book_recommender_api.app.recommender import personality_class, personality_scores_by_class
 
 # 📘 Libro ficticio con coincidencias parciales reales
 mock_book = {
@@ -89,3 +90,25 @@ def test_generate_explanation_no_match():
     explanation = generate_explanation(mock_book, profile_sin_match)
     assert isinstance(explanation, str)
     assert "()" not in explanation, "La explicación no debe tener campos vacíos aunque no haya coincidencias"
+
+# 🔹 Test 7: la tabla por clase de personalidad equivale a match_personality
+@pytest.mark.parametrize("values", [
+    (40, 41, 59, 60, 0), (100, 60, 40, 41, 59), (30, 30, 30, 30, 30), (75, 55, 80, 50, 30)
+])
+def test_personality_scores_by_class(values):
+    personality = Personality(**dict(zip("OCEAN", values)))
+    tags = ["Alta apertura", "Baja responsabilidad", "Alta extraversión", "Bajo neuroticismo", "Otra etiqueta"]
+    for n in range(len(tags) + 1):
+        table = personality_scores_by_class(tags[:n])
+        assert table[personality_class(personality)] == match_personality(personality, tags[:n])
+
+# 🔹 Test 8: compute_score(explain=True) devuelve el desglose de la misma pasada
+def test_compute_score_breakdown():
+    score, breakdown = compute_score(mock_profile, mock_book, explain=True)
+    assert score == compute_score(mock_profile, mock_book) == breakdown.score
+    assert breakdown.matched["genres"] == ["ciencia ficcion"]
+    assert breakdown.matched["emotion_tags"] == ["alerta"]
+    assert breakdown.matched["tone"] == "oscuro"
+    assert breakdown.matched["personality_tags"] == ["Alta apertura", "Alta extraversión"]
+    assert breakdown.components["themes"] == 0.5
+    assert generate_explanation(mock_book, mock_profile, breakdown) == generate_explanation(mock_book, mock_profile)
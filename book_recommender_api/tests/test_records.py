@@ -0,0 +1,46 @@
+# ✅ book_recommender_api/tests/test_records.py
+
+import json
+
+import pytest
+
+from book_recommender_api.utils.records import read_records, write_records, flatten_records
+from book_recommender_api.tests.conftest import DATA_PATH, dataset_books as books
+
+
+# 🔹 Test 1: el array heredado se lee igual que json.load, aunque los libros crucen bloques
+@pytest.mark.parametrize("chunk_size", [1, 97, 1 << 16])
+def test_read_legacy_array_incrementally(chunk_size):
+    assert list(read_records(DATA_PATH, chunk_size=chunk_size)) == books
+
+
+# 🔹 Test 2: ida y vuelta en JSON Lines y en array con sangría
+@pytest.mark.parametrize("name", ["books.jsonl", "books.json"])
+def test_write_and_read_roundtrip(tmp_path, name):
+    path = tmp_path / name
+    assert write_records(path, iter(books[:25])) == 25
+    assert list(read_records(path)) == books[:25]
+    if name.endswith(".json"):
+        assert json.loads(path.read_text(encoding="utf-8")) == books[:25]
+
+
+# 🔹 Test 3: reescribir el mismo archivo que se está leyendo (y aplanar listas anidadas)
+def test_rewrite_in_place(tmp_path):
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([books[:2], books[2], [1, 2], "x"]), encoding="utf-8")
+    assert write_records(path, flatten_records(read_records(path))) == 3
+    assert list(read_records(path)) == books[:3]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+# 🔹 Test 4: errores de formato
+def test_invalid_inputs(tmp_path):
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text("[" + json.dumps(books[0]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(read_records(truncated))
+
+    bad_line = tmp_path / "bad.jsonl"
+    bad_line.write_text(json.dumps(books[0]) + "\n{roto\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Línea 2"):
+        list(read_records(bad_line))
@@ -0,0 +1,155 @@
+# ✅ book_recommender_api/tests/test_repository.py
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app import books_controller
+from book_recommender_api.app.repository import (
+    with_normalized_fields, candidate_query, stored_book_data, ensure_indexes, score_pipeline, replace_books,
+    catalog_version, count_legacy_books, ensure_normalized_fields, backfill_normalized_fields, CANDIDATE_PROJECTION
+)
+from book_recommender_api.app.recommender import compute_score, normalize_book, normalize_profile
+from book_recommender_api.app.main import app
+from book_recommender_api.tests.conftest import books, random_profiles
+
+
+# 🔹 Test 1: las copias normalizadas reproducen normalize_book
+def test_stored_fields_match_normalize_book():
+    for book in books[:50]:
+        doc = with_normalized_fields(book)
+        assert doc["genres_norm"] == sorted(doc["genres_norm"])
+        assert stored_book_data(doc) == normalize_book(book)
+
+
+# 🔹 Test 2: la consulta de candidatos equivale a has_minimum_match
+def test_candidate_query_matches_minimum_match(memory_db):
+    asyncio.run(memory_db.books.insert_many([with_normalized_fields(book) for book in books]))
+    assert len(asyncio.run(ensure_indexes(memory_db.books))) == 3
+
+    for profile in random_profiles(20, seed=11):
+        user_data = normalize_profile(profile)
+        found = asyncio.run(memory_db.books.find(candidate_query(user_data), CANDIDATE_PROJECTION).to_list())
+        expected = [book for book in books if books_controller.has_minimum_match(book, profile)]
+        assert len(found) == len(expected)
+        assert all("description" not in doc and "subjects" not in doc for doc in found)
+
+
+# 🔹 Test 3: la puntuación del pipeline de agregación coincide con compute_score
+def test_score_pipeline_matches_compute_score(memory_db):
+    asyncio.run(memory_db.books.insert_many([with_normalized_fields(book) for book in books]))
+
+    for profile in random_profiles(20, seed=5):
+        pipeline = score_pipeline(normalize_profile(profile), profile.personality, k=len(books))
+        results = asyncio.run(memory_db.books.aggregate(pipeline).to_list())
+        expected = [
+            compute_score(profile, book) for book in books
+            if books_controller.has_minimum_match(book, profile) and compute_score(profile, book) > 0
+        ]
+        assert sorted(doc["_score"] for doc in results) == sorted(expected)
+        assert [doc["_score"] for doc in results] == sorted(expected, reverse=True)
+        assert all("subjects" not in doc and "_components" not in doc for doc in results)
+
+
+# 🔹 Test 4: los motores "mongo" y "aggregate" devuelven el mismo ranking que el catálogo residente
+@pytest.mark.parametrize("profile", random_profiles(5, seed=3))
+def test_database_engines_match_python_engine(profile, memory_db, monkeypatch):
+    asyncio.run(memory_db.books.insert_many([with_normalized_fields(book) for book in books]))
+    client = TestClient(app)
+
+    responses = {}
+    for engine in ("python", "mongo", "aggregate"):
+        monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", engine)
+        books_controller.recommendation_cache.clear()
+        responses[engine] = client.post("/api/recommendations?k=5", json=profile.dict())
+
+    for engine in ("mongo", "aggregate"):
+        assert responses[engine].status_code == responses["python"].status_code
+        assert responses[engine].json() == responses["python"].json()
+
+
+# 🔹 Test 5: la importación llena la colección auxiliar y la renombra sobre "books"
+def test_replace_books_never_exposes_empty_catalog(memory_db):
+    seen = []
+
+    def streamed(items):
+        # Lo que vería un lector en "books" mientras se importa cada lote
+        for book in items:
+            seen.append(len(memory_db.books.docs))
+            yield book
+
+    async def scenario():
+        first = await replace_books(memory_db, books[:10], batch_size=3)
+        second = await replace_books(memory_db, streamed(books[10:30]), batch_size=7)
+
+        assert set(seen) == {10}
+        assert await memory_db.books.count_documents({}) == 20
+        assert await memory_db.books_staging.count_documents({}) == 0
+        assert len(memory_db.books.indexes) == 3
+        assert first["version"] != second["version"]
+        assert await catalog_version(memory_db) == second["version"]
+
+        with pytest.raises(ValueError):
+            await replace_books(memory_db, [])
+        assert await memory_db.books.count_documents({}) == 20
+
+    asyncio.run(scenario())
+
+
+# 🔹 Test 6: etiquetas de personalidad vacías cuentan en el denominador (como match_personality)
+def test_score_pipeline_counts_empty_personality_tags(memory_db):
+    tagged = [
+        {**book, "personality_match": tags}
+        for book, tags in zip(books, [["", "Alta apertura"], ["  ", "baja extraversión", ""], [""], ["alta apertura"]] * 20)
+    ]
+    asyncio.run(memory_db.books.insert_many([with_normalized_fields(book) for book in tagged]))
+
+    for profile in random_profiles(20, seed=23):
+        pipeline = score_pipeline(normalize_profile(profile), profile.personality, k=len(tagged))
+        results = asyncio.run(memory_db.books.aggregate(pipeline).to_list())
+        expected = [
+            compute_score(profile, book) for book in tagged
+            if books_controller.has_minimum_match(book, profile) and compute_score(profile, book) > 0
+        ]
+        assert [doc["_score"] for doc in results] == sorted(expected, reverse=True)
+
+
+# 🔹 Test 7: la misma paridad contra un MongoDB real ($round del servidor); se omite sin servidor
+@pytest.mark.mongo
+def test_score_pipeline_matches_compute_score_on_mongo(mongo_db):
+    mongo_db.books.insert_many([with_normalized_fields(book) for book in books])
+
+    for profile in random_profiles(20, seed=5):
+        pipeline = score_pipeline(normalize_profile(profile), profile.personality, k=len(books))
+        results = list(mongo_db.books.aggregate(pipeline))
+        expected = [
+            compute_score(profile, book) for book in books
+            if books_controller.has_minimum_match(book, profile) and compute_score(profile, book) > 0
+        ]
+        assert [doc["_score"] for doc in results] == sorted(expected, reverse=True)
+
+
+# 🔹 Test 8: libros importados sin copias normalizadas: el arranque falla y la migración los recupera
+def test_legacy_books_require_backfill(memory_db, monkeypatch):
+    legacy = books[:20]
+    asyncio.run(memory_db.books.insert_many([dict(book) for book in legacy]))
+    assert asyncio.run(count_legacy_books(memory_db)) == 20
+    with pytest.raises(RuntimeError, match="backfill_normalized"):
+        asyncio.run(ensure_normalized_fields(memory_db))
+
+    assert asyncio.run(backfill_normalized_fields(memory_db)) == 20
+    assert asyncio.run(count_legacy_books(memory_db)) == 0
+    asyncio.run(ensure_normalized_fields(memory_db))
+
+    client = TestClient(app)
+    statuses = set()
+    for profile in random_profiles(5, seed=29):
+        responses = {}
+        for engine in ("python", "mongo", "aggregate"):
+            monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", engine)
+            books_controller.recommendation_cache.clear()
+            responses[engine] = client.post("/api/recommendations?k=5", json=profile.dict())
+        assert responses["mongo"].json() == responses["python"].json() == responses["aggregate"].json()
+        statuses.add(responses["mongo"].status_code)
+    assert 200 in statuses
@@ -0,0 +1,109 @@
+# ✅ book_recommender_api/tests/test_snapshot.py
+
+from fastapi.testclient import TestClient
+
+import asyncio
+import json
+
+import pytest
+
+from book_recommender_api.app import books_controller
+from book_recommender_api.app import catalog as catalog_module
+from book_recommender_api.app.catalog import CatalogIndex, get_catalog
+from book_recommender_api.app.recommender import normalize_profile
+from book_recommender_api.app.repository import replace_books
+from book_recommender_api.app.snapshot import build_snapshot, current_snapshot, load_snapshot, write_snapshot
+from book_recommender_api.app.main import app
+from book_recommender_api.tests.conftest import books, random_profiles
+
+
+# 🔹 Test 1: el snapshot reproduce el índice (máscaras, postings, tabla de personalidad, payloads)
+def test_snapshot_roundtrip(tmp_path):
+    catalog = CatalogIndex.from_documents(books)
+    loaded = load_snapshot(write_snapshot(catalog, tmp_path))
+
+    assert loaded.version == catalog.version
+    assert [entry.features for entry in loaded.books] == [entry.features for entry in catalog.books]
+    assert loaded.postings == catalog.postings
+    assert loaded.personality_columns == catalog.personality_columns
+    assert loaded.books[7].payload == catalog.books[7].payload
+    assert loaded.info["source"] == "snapshot" and loaded.info["load_seconds"] >= 0
+
+
+# 🔹 Test 2: los dos motores devuelven el mismo ranking desde el snapshot (materializado o compartido)
+@pytest.mark.parametrize("shared", [False, True])
+def test_snapshot_rankings_match(tmp_path, monkeypatch, shared):
+    catalog = CatalogIndex.from_documents(books)
+    loaded = load_snapshot(write_snapshot(catalog, tmp_path), shared=shared)
+    for engine in ("python", "numpy"):
+        monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", engine)
+        for profile in random_profiles(20, seed=17):
+            user_data = normalize_profile(profile)
+            assert (books_controller.rank_catalog(loaded, user_data, profile.personality, k=10)
+                    == books_controller.rank_catalog(catalog, user_data, profile.personality, k=10))
+
+
+# 🔹 Test 3: CURRENT apunta a la última versión publicada y el arranque la usa
+def test_startup_loads_current_snapshot(tmp_path, monkeypatch, memory_db, resident_catalog):
+    first = build_snapshot(books[:50], tmp_path, source_version="v1")
+    second = build_snapshot(books[:80], tmp_path, source_version="v2")
+    assert current_snapshot(tmp_path).name == second["version"] != first["version"]
+
+    monkeypatch.setattr(catalog_module, "CATALOG_SNAPSHOT_DIR", str(tmp_path))
+    with TestClient(app) as client:
+        info = client.get("/api/catalog").json()
+    assert (info["source"], info["shared"], info["version"], info["books"]) == ("snapshot", True, second["version"], 80)
+
+
+# 🔹 Test 4: el modo compartido no materializa libros y sigue al CURRENT publicado
+def test_shared_catalog_follows_published_version(tmp_path, monkeypatch, memory_db):
+    build_snapshot(books[:50], tmp_path)
+    monkeypatch.setattr(catalog_module, "CATALOG_SNAPSHOT_DIR", str(tmp_path))
+
+    async def scenario():
+        first = await get_catalog(memory_db)
+        assert not isinstance(first.books, list)
+        assert first.books[3].payload == CatalogIndex.from_documents(books[:50]).books[3].payload
+
+        second = build_snapshot(books[:90], tmp_path)
+        monkeypatch.setattr(catalog_module, "CATALOG_REFRESH_INTERVAL", 0)
+        assert await get_catalog(memory_db) is first  # el nuevo mapa se carga en segundo plano
+        await catalog_module._refresh_task
+        reloaded = await get_catalog(memory_db)
+        assert (reloaded.version, len(reloaded)) == (second["version"], 90)
+
+    asyncio.run(scenario())
+
+
+# 🔹 Test 5: un snapshot ilegible (otro formato) no tumba el arranque: se construye desde MongoDB
+def test_unreadable_snapshot_falls_back_to_mongo(tmp_path, monkeypatch, memory_db, resident_catalog):
+    build_snapshot(books[:50], tmp_path)
+    manifest_path = current_snapshot(tmp_path) / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest_path.write_text(json.dumps({**manifest, "format": manifest["format"] + 1}), encoding="utf-8")
+    asyncio.run(replace_books(memory_db, books[:30]))
+
+    monkeypatch.setattr(catalog_module, "CATALOG_SNAPSHOT_DIR", str(tmp_path))
+    with TestClient(app) as client:
+        info = client.get("/api/catalog").json()
+    assert (info["source"], info["books"]) == ("documents", 30)
+
+
+# 🔹 Test 6: republicar la misma versión no borra ni reescribe el directorio al que apunta CURRENT
+def test_republish_same_version_keeps_live_directory(tmp_path):
+    first = build_snapshot(books[:50], tmp_path)
+    live = current_snapshot(tmp_path)
+    manifest_stat = (live / "manifest.json").stat()
+
+    second = build_snapshot(books[:50], tmp_path)
+    assert second["version"] == first["version"] and current_snapshot(tmp_path) == live
+    assert (live / "manifest.json").stat().st_ino == manifest_stat.st_ino
+    assert load_snapshot(live).version == first["version"]
+
+    # Un directorio incompleto con el nombre de la versión no se toca: se publica con otro nombre
+    catalog = CatalogIndex.from_documents(books[:60])
+    (tmp_path / catalog.version).mkdir()
+    published = write_snapshot(catalog, tmp_path)
+    assert published.name != catalog.version and current_snapshot(tmp_path) == published
+    assert (tmp_path / catalog.version).is_dir()
+    assert load_snapshot(published).version == catalog.version
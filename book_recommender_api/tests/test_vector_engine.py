@@ -0,0 +1,124 @@
+# ✅ book_recommender_api/tests/test_vector_engine.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from book_recommender_api.app import books_controller
+from book_recommender_api.app.catalog import CatalogIndex, set_catalog
+from book_recommender_api.app.recommender import compute_score, normalize_profile
+from book_recommender_api.app.main import app
+from book_recommender_api.tests.conftest import books, random_profiles
+
+
+# 🔹 Test 1: el motor vectorizado reproduce compute_score para todo el catálogo
+def test_vector_scores_match_compute_score():
+    catalog = CatalogIndex.from_documents(books)
+    for profile in random_profiles(25):
+        scores = catalog.vectors.score(normalize_profile(profile), profile.personality)
+        assert scores.tolist() == [compute_score(profile, book) for book in books]
+
+
+# 🔹 Test 2: el ranking coincide con el del motor Python
+@pytest.mark.parametrize("profile", random_profiles(10, seed=11))
+def test_vector_rank_matches_python_engine(profile, monkeypatch):
+    catalog = CatalogIndex.from_documents(books)
+    user_data = normalize_profile(profile)
+    monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", "python")
+    expected = books_controller.rank_catalog(catalog, user_data, profile.personality)
+    assert catalog.vectors.rank(user_data, profile.personality) == expected
+
+
+# 🔹 Test 3: la selección top-k (heap / argpartition) respeta el orden completo
+@pytest.mark.parametrize("k", [1, 3, 20])
+def test_top_k_matches_full_ranking(k, monkeypatch):
+    catalog = CatalogIndex.from_documents(books)
+    for profile in random_profiles(5, seed=k):
+        user_data = normalize_profile(profile)
+        full = books_controller.rank_catalog(catalog, user_data, profile.personality)
+        for engine in ("python", "numpy"):
+            monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", engine)
+            assert books_controller.rank_catalog(catalog, user_data, profile.personality, k=k) == full[:k]
+
+
+# 🔹 Test 4: el endpoint funciona con RECOMMENDER_ENGINE=numpy
+def test_recommend_with_numpy_engine(monkeypatch):
+    profile = random_profiles(1, seed=3)[0]
+    set_catalog(CatalogIndex.from_documents(books))
+    try:
+        client = TestClient(app)
+        monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", "python")
+        expected = client.post("/api/recommendation", json=profile.dict()).json()
+        monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", "numpy")
+        assert client.post("/api/recommendation", json=profile.dict()).json() == expected
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 5: /recommendations?k=N devuelve N libros ordenados con su puntuación
+def test_recommend_top_k_endpoint():
+    profile = random_profiles(1, seed=3)[0]
+    set_catalog(CatalogIndex.from_documents(books))
+    try:
+        client = TestClient(app)
+        best = client.post("/api/recommendation", json=profile.dict()).json()
+        response = client.post("/api/recommendations?k=4", json=profile.dict())
+        assert response.status_code == 200
+        recommendations = response.json()["recommendations"]
+        assert len(recommendations) == 4
+        assert recommendations[0]["book"] == best["recommendation"]
+        assert recommendations[0]["explanation"] == best["explanation"]
+        scores = [item["score"] for item in recommendations]
+        assert scores == sorted(scores, reverse=True)
+        assert client.post("/api/recommendations?k=0", json=profile.dict()).status_code == 422
+    finally:
+        set_catalog(None)
+
+
+# 🔹 Test 6: el batch (perfiles × libros) coincide con el ranking individual
+def test_rank_batch_matches_single_rank():
+    catalog = CatalogIndex.from_documents(books)
+    users = [(normalize_profile(profile), profile.personality) for profile in random_profiles(70, seed=21)]
+    batch = catalog.vectors.rank_batch(users, k=5)
+    assert batch == [catalog.vectors.rank(user_data, personality, k=5) for user_data, personality in users]
+
+
+# 🔹 Test 6b: el batch coincide con el motor Python con valores escalares vacíos o desconocidos
+def test_rank_batch_matches_python_with_empty_scalars(monkeypatch):
+    # Libros con tone / style / age_range vacíos y perfiles con valores vacíos o fuera del vocabulario
+    blanked = [dict(book, tone="" if idx % 5 == 0 else book["tone"], style="" if idx % 7 == 0 else book["style"],
+                    age_range="" if idx % 11 == 0 else book["age_range"]) for idx, book in enumerate(books)]
+    catalog = CatalogIndex.from_documents(blanked)
+    users = []
+    for idx, profile in enumerate(random_profiles(40, seed=31)):
+        profile.preferences.tone = ["", "tono inexistente", profile.preferences.tone][idx % 3]
+        profile.preferences.style = ["estilo inexistente", "", profile.preferences.style][idx % 3]
+        profile.preferences.age_range = ["", profile.preferences.age_range][idx % 2]
+        users.append((normalize_profile(profile), profile.personality))
+
+    monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", "python")
+    expected = [books_controller.rank_catalog(catalog, user_data, personality, k=5) for user_data, personality in users]
+    assert catalog.vectors.rank_batch(users, k=5) == expected
+
+
+# 🔹 Test 7: /recommendations/batch devuelve un top-k por perfil
+def test_recommend_batch_endpoint(monkeypatch):
+    profiles = random_profiles(3, seed=4)
+    no_match = profiles[0].copy(deep=True)
+    no_match.preferences.genres, no_match.preferences.themes, no_match.preferences.emotion_tags = [], [], []
+    payload = {"profiles": [p.dict() for p in profiles + [no_match]], "k": 2}
+    set_catalog(CatalogIndex.from_documents(books))
+    try:
+        client = TestClient(app)
+        for engine in ("python", "numpy"):
+            monkeypatch.setattr(books_controller, "RECOMMENDER_ENGINE", engine)
+            response = client.post("/api/recommendations/batch", json=payload)
+            assert response.status_code == 200
+            results = response.json()["results"]
+            assert len(results) == 4
+            assert results[-1]["recommendations"] == []
+            for profile, result in zip(profiles, results):
+                single = client.post("/api/recommendations?k=2", json=profile.dict()).json()
+                assert result == single
+        assert client.post("/api/recommendations/batch", json={"profiles": []}).status_code == 422
+    finally:
+        set_catalog(None)
@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 from collections import defaultdict
+from book_recommender_api.utils.records import read_records, write_records
 
 # -----------------------------
 # 📍 Rutas
@@ -10,75 +11,67 @@ input_path = base_path / "data" / "books_openlibrary_enriched.json"
 corrections_path = Path(__file__).resolve().parent / "field_options_corrected.json"
 output_path = base_path / "data" / "books_openlibrary_corrected.json"
 
-# -----------------------------
-# 📥 Cargar archivos
-# -----------------------------
-with open(input_path, "r", encoding="utf-8") as f:
-    books = json.load(f)
-
-with open(corrections_path, "r", encoding="utf-8") as f:
-    corrected_fields = json.load(f)
-
 # -----------------------------
 # 🧠 Construir diccionario de correcciones inverso
 # -----------------------------
-reverse_map = defaultdict(dict)
-
-for field, corrected_list in corrected_fields.items():
-    for correct_value in corrected_list:
-        reverse_map[field][correct_value] = correct_value  # valor correcto mapeado a sí mismo
-
-    # Generar mapping inverso desde posibles errores al valor corregido
-    originals = set()
-    for book in books:
-        val = book.get(field)
-        if isinstance(val, list):
-            originals.update(val)
-        elif isinstance(val, str):
-            originals.add(val)
-
-    for original in originals:
-        for correct_value in corrected_list:
-            if original != correct_value and original.casefold() == correct_value.casefold():
-                reverse_map[field][original] = correct_value
+def correction_maps(corrected_fields):
+    # Por campo: valor en casefold → valor corregido. Cubre el valor correcto (mapeado a sí mismo)
+    # y cualquier variante que solo difiera en mayúsculas, sin una pasada previa por los libros
+    return {
+        field: {correct_value.casefold(): correct_value for correct_value in corrected_list}
+        for field, corrected_list in corrected_fields.items()
+    }
+
+def load_correction_maps(path=corrections_path):
+    with open(path, "r", encoding="utf-8") as f:
+        return correction_maps(json.load(f))
 
 # -----------------------------
 # 🧹 Aplicar correcciones
 # -----------------------------
-corrected_books = []
-modification_count = defaultdict(int)
-
-for book in books:
+def correct_book(book, maps):
+    # Devuelve el libro corregido y los campos modificados
     corrected_book = book.copy()
+    modified = []
 
-    for field, mapping in reverse_map.items():
+    for field, mapping in maps.items():
         original = corrected_book.get(field)
 
         if isinstance(original, list):
-            new_values = [mapping.get(v, v) for v in original]
+            new_values = [mapping.get(v.casefold(), v) if isinstance(v, str) else v for v in original]
             if new_values != original:
                 corrected_book[field] = sorted(set(new_values))
-                modification_count[field] += 1
+                modified.append(field)
 
         elif isinstance(original, str):
-            new_value = mapping.get(original, original)
+            new_value = mapping.get(original.casefold(), original)
             if new_value != original:
                 corrected_book[field] = new_value
-                modification_count[field] += 1
+                modified.append(field)
 
-    corrected_books.append(corrected_book)
+    return corrected_book, modified
 
-# -----------------------------
-# 💾 Guardar archivo corregido
-# -----------------------------
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(corrected_books, f, ensure_ascii=False, indent=2)
+if __name__ == "__main__":
+    maps = load_correction_maps()
+    modification_count = defaultdict(int)
 
-# -----------------------------
-# 📊 Reporte final
-# -----------------------------
-print("✅ Correcciones aplicadas con éxito.")
-print(f"📁 Archivo generado: {output_path.name}\n")
+    def corrected_books(books):
+        for book in books:
+            corrected_book, modified = correct_book(book, maps)
+            for field in modified:
+                modification_count[field] += 1
+            yield corrected_book
+
+    # -----------------------------
+    # 💾 Guardar archivo corregido (una sola pasada, libro a libro)
+    # -----------------------------
+    write_records(output_path, corrected_books(read_records(input_path)))
+
+    # -----------------------------
+    # 📊 Reporte final
+    # -----------------------------
+    print("✅ Correcciones aplicadas con éxito.")
+    print(f"📁 Archivo generado: {output_path.name}\n")
 
-for field, count in modification_count.items():
-    print(f"🔧 Campo '{field}': {count} registros modificados")
+    for field, count in modification_count.items():
+        print(f"🔧 Campo '{field}': {count} registros modificados")
@@ -0,0 +1,14 @@
+# backfill_normalized.py
+import asyncio
+from book_recommender_api.app.database import DB_NAME, get_async_client
+from book_recommender_api.app.repository import backfill_normalized_fields
+
+# ✅ Libros importados antes de guardar las copias normalizadas (*_norm): se completan sin reimportar
+async def backfill(db=None):
+    db = db if db is not None else get_async_client()[DB_NAME]
+    updated = await backfill_normalized_fields(db)
+    print(f"✅ {updated} libros completados con sus campos normalizados.")
+    return updated
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
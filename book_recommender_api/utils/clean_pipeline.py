@@ -0,0 +1,243 @@
+# ✅ utils/clean_pipeline.py — Limpieza completa del dataset en una sola lectura y una sola escritura
+#
+# Cada script de limpieza es una etapa sobre un flujo de libros:
+#   - MapStage: función libro → libro (o None para descartarlo). Sin estado: se reparte en un pool de procesos.
+#   - StreamStage: generador sobre el flujo completo (deduplicar, validar). Con estado: corre en el proceso principal.
+#
+# Uso: python -m book_recommender_api.utils.clean_pipeline [--input ...] [--output ...] [--workers N]
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from book_recommender_api.utils.records import read_records, write_records, flatten_records
+from book_recommender_api.utils.normalize_and_clean_genres import (
+    DATA_PATH, OUTPUT_PATH, TAXONOMY_PATH, clean_book_genres, load_valid_genres
+)
+from book_recommender_api.utils.apply_field_corrections import corrections_path, correct_book, load_correction_maps
+from book_recommender_api.utils.eliminar_duplicados_json import libros_unicos
+from book_recommender_api.utils.validate_books import book_issues
+
+CHUNK_SIZE = 500  # Libros por tarea enviada al pool
+
+
+# ---------------------------
+# 🧱 Etapas
+# ---------------------------
+class MapStage:
+    def __init__(self, name: str, func: Callable[[Dict], Optional[Dict]]):
+        self.name = name
+        self.func = func  # Debe poder serializarse (función de módulo o functools.partial)
+
+class StreamStage:
+    def __init__(self, name: str, func: Callable[[Iterable[Dict]], Iterator[Dict]]):
+        self.name = name
+        self.func = func
+
+class StageStats:
+    __slots__ = ("records_in", "records_out", "seconds")
+
+    def __init__(self):
+        self.records_in = 0
+        self.records_out = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict:
+        return {"in": self.records_in, "out": self.records_out, "seconds": round(self.seconds, 4)}
+
+
+# ---------------------------
+# 🧹 Etapas del flujo de limpieza (adaptan los scripts existentes)
+# ---------------------------
+def genres_stage(book: Dict, valid_genres: frozenset) -> Dict:
+    clean_book_genres(book, valid_genres)
+    return book
+
+def corrections_stage(book: Dict, maps: Dict) -> Dict:
+    return correct_book(book, maps)[0]
+
+def deduplicate_stage(books: Iterable[Dict]) -> Iterator[Dict]:
+    return libros_unicos(books, {"antes": 0})
+
+def validation_stage(issues: List[str]) -> Callable[[Iterable[Dict]], Iterator[Dict]]:
+    # No filtra: deja pasar cada libro y acumula sus problemas en `issues`
+    def validate(books: Iterable[Dict]) -> Iterator[Dict]:
+        titles_seen = set()
+        for idx, book in enumerate(books):
+            issues.extend(book_issues(idx, book, titles_seen))
+            yield book
+    return validate
+
+def default_stages(issues: List[str], taxonomy_path: Path = TAXONOMY_PATH,
+                   corrections: Path = corrections_path) -> List:
+    # El mismo orden que la cadena de scripts: géneros → correcciones → duplicados → validación
+    stages = [
+        StreamStage("flatten", flatten_records),
+        MapStage("normalize_genres", partial(genres_stage, valid_genres=frozenset(load_valid_genres(taxonomy_path)))),
+    ]
+    if Path(corrections).exists():
+        stages.append(MapStage("field_corrections", partial(corrections_stage, maps=load_correction_maps(corrections))))
+    stages += [
+        StreamStage("deduplicate", deduplicate_stage),
+        StreamStage("validate", validation_stage(issues)),
+    ]
+    return stages
+
+
+# ---------------------------
+# ⚙️ Ejecución
+# ---------------------------
+# Tiempos por etapa: las map miden cada bloque (con pool, suma de los procesos);
+# las de flujo, su tiempo propio = tiempo inclusivo - tiempo de su entrada.
+_worker_stages: List[MapStage] = []
+
+def _init_worker(stages: List[MapStage]) -> None:
+    # Las funciones (y sus tablas) se envían una vez por proceso, no con cada bloque
+    global _worker_stages
+    _worker_stages = stages
+
+def _apply_maps(stages: List[MapStage], chunk: List[Dict]):
+    # Aplica las etapas en cadena a un bloque; devuelve libros y (entradas, salidas, segundos) por etapa
+    stats = []
+    for stage in stages:
+        start = time.perf_counter()
+        records_in = len(chunk)
+        chunk = [result for result in map(stage.func, chunk) if result is not None]
+        stats.append((records_in, len(chunk), time.perf_counter() - start))
+    return chunk, stats
+
+def _apply_worker_maps(chunk: List[Dict]):
+    return _apply_maps(_worker_stages, chunk)
+
+def _chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _run_maps(records: Iterable[Dict], stages: List[MapStage], report: Dict[str, StageStats],
+              pool: Optional[ProcessPoolExecutor], chunk_size: int, window: int) -> Iterator[Dict]:
+    def collect(result):
+        chunk, stats = result
+        for stage, (records_in, records_out, seconds) in zip(stages, stats):
+            report[stage.name].records_in += records_in
+            report[stage.name].records_out += records_out
+            report[stage.name].seconds += seconds
+        return chunk
+
+    if pool is None:
+        for chunk in _chunks(records, chunk_size):
+            yield from collect(_apply_maps(stages, chunk))
+        return
+
+    # Ventana acotada de bloques en vuelo: memoria constante y orden de salida preservado
+    pending = deque()
+    for chunk in _chunks(records, chunk_size):
+        pending.append(pool.submit(_apply_worker_maps, chunk))
+        if len(pending) >= window:
+            yield from collect(pending.popleft().result())
+    while pending:
+        yield from collect(pending.popleft().result())
+
+def _metered(records: Iterable[Dict], stats: StageStats) -> Iterator[Dict]:
+    # Tiempo inclusivo (esta etapa + las anteriores); el propio se obtiene restando el de la entrada
+    iterator = iter(records)
+    while True:
+        start = time.perf_counter()
+        try:
+            record = next(iterator)
+        except StopIteration:
+            stats.seconds += time.perf_counter() - start
+            return
+        stats.seconds += time.perf_counter() - start
+        stats.records_out += 1
+        yield record
+
+def _counted(records: Iterable[Dict], stats: StageStats) -> Iterator[Dict]:
+    for record in records:
+        stats.records_in += 1
+        yield record
+
+def _own_time(records: Iterable[Dict], stats: StageStats, inclusive: StageStats, upstream: StageStats) -> Iterator[Dict]:
+    # Al agotarse el flujo se fija el tiempo propio de la etapa de flujo
+    for record in records:
+        stats.records_out += 1
+        yield record
+    stats.seconds = max(inclusive.seconds - upstream.seconds, 0.0)
+
+def run_pipeline(input_path, output_path, stages: List, workers: int = 0, chunk_size: int = CHUNK_SIZE) -> Dict:
+    report = {stage.name: StageStats() for stage in stages}
+    read_stats = StageStats()
+    started = time.perf_counter()
+
+    # Segmentos: etapas map consecutivas se aplican juntas sobre cada bloque
+    segments = []
+    for stage in stages:
+        if isinstance(stage, MapStage) and segments and isinstance(segments[-1], list):
+            segments[-1].append(stage)
+        else:
+            segments.append([stage] if isinstance(stage, MapStage) else stage)
+
+    map_stages = [stage for stage in stages if isinstance(stage, MapStage)]
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(map_stages,)) if workers > 0 else None
+    try:
+        stream = _metered(read_records(input_path), read_stats)
+        upstream = read_stats
+        for segment in segments:
+            inclusive = StageStats()
+            if isinstance(segment, list):
+                # Las etapas map miden su propio tiempo dentro de cada bloque
+                stream = _metered(_run_maps(stream, segment, report, pool, chunk_size, 2 * max(workers, 1)), inclusive)
+            else:
+                stats = report[segment.name]
+                stream = _own_time(_metered(segment.func(_counted(stream, stats)), inclusive), stats, inclusive, upstream)
+            upstream = inclusive
+
+        write_start = time.perf_counter()
+        written = write_records(output_path, stream)
+        write_seconds = time.perf_counter() - write_start - upstream.seconds
+        total = time.perf_counter() - started
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "input": str(input_path),
+        "output": str(output_path),
+        "workers": workers,
+        "read": read_stats.records_out,
+        "written": written,
+        "seconds": round(total, 4),
+        "read_seconds": round(read_stats.seconds, 4),
+        "write_seconds": round(write_seconds, 4),
+        "stages": {name: stats.as_dict() for name, stats in report.items()}
+    }
+
+# ---------------------------
+# 🚀 Ejecutar
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Limpieza del dataset en una sola pasada")
+    parser.add_argument("--input", default=DATA_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--workers", type=int, default=0, help="Procesos para las etapas map (0 = en línea)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    issues: List[str] = []
+    result = run_pipeline(args.input, args.output, default_stages(issues), args.workers, args.chunk_size)
+
+    print(f"✅ {result['read']} libros leídos → {result['written']} escritos en {result['output']}")
+    print(f"⏱️  Total: {result['seconds']} s (lectura {result['read_seconds']} s, escritura {result['write_seconds']} s)")
+    for name, stats in result["stages"].items():
+        print(f"  - {name:<18} {stats['in']:>8} → {stats['out']:<8} {stats['seconds']} s")
+    if issues:
+        print(f"\n❗ {len(issues)} problemas de validación:")
+        for issue in issues:
+            print(issue)
@@ -1,47 +1,35 @@
 # utils/eliminar_duplicados_json.py
-import json
 import os
 import shutil
+from book_recommender_api.utils.records import read_records, write_records, flatten_records
 
 BOOKS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "books_openlibrary_enriched.json")
 BACKUP_FILE = BOOKS_FILE.replace(".json", "_backup.json")
 
-def eliminar_duplicados():
-    with open(BOOKS_FILE, "r", encoding="utf-8") as f:
-        libros_raw = json.load(f)
-
-    # Aplanar listas anidadas si las hubiera
-    libros = []
-    for item in libros_raw:
-        if isinstance(item, list):
-            libros.extend(item)
-        elif isinstance(item, dict):
-            libros.append(item)
-
-    libros_unicos = []
+def libros_unicos(libros, stats):
+    # Solo se guardan en memoria las claves (título, autor), no los libros
     vistos = set()
-
     for libro in libros:
-        if not isinstance(libro, dict):
-            continue
+        stats["antes"] += 1
         title = libro.get("title", "").strip().lower()
         author = libro.get("author", "").strip().lower()
         if title and author:
             clave = (title, author)
             if clave not in vistos:
-                libros_unicos.append(libro)
                 vistos.add(clave)
+                yield libro
 
-    print(f"Antes: {len(libros)} libros")
-    print(f"Después: {len(libros_unicos)} libros únicos")
-
+def eliminar_duplicados():
     # Crear backup
     shutil.copy(BOOKS_FILE, BACKUP_FILE)
     print(f"Backup creado: {BACKUP_FILE}")
 
-    # Guardar sin duplicados
-    with open(BOOKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(libros_unicos, f, ensure_ascii=False, indent=2)
+    # Guardar sin duplicados (listas anidadas aplanadas); se lee del backup y se reescribe el original
+    stats = {"antes": 0}
+    despues = write_records(BOOKS_FILE, libros_unicos(flatten_records(read_records(BACKUP_FILE)), stats))
+
+    print(f"Antes: {stats['antes']} libros")
+    print(f"Después: {despues} libros únicos")
 
 if __name__ == "__main__":
     eliminar_duplicados()
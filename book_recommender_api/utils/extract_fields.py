@@ -3,6 +3,7 @@ import unicodedata
 import re
 from pathlib import Path
 from collections import defaultdict
+from book_recommender_api.utils.records import read_records
 
 # ------------------------------
 # 🔧 Funciones de normalización
@@ -23,12 +24,10 @@ def normalize_list(values):
     return [normalize(v) for v in values if normalize(v)]
 
 # ------------------------------
-# 📥 Cargar libros
+# 📥 Libros (se leen uno a uno, .json o .jsonl)
 # ------------------------------
 
 file_path = Path(__file__).resolve().parents[1] / "data" / "books_openlibrary_enriched.json"
-with open(file_path, "r", encoding="utf-8") as f:
-    books = json.load(f)
 
 # ------------------------------
 # 📊 Inicializar contenedores
@@ -47,7 +46,7 @@ fields_list = [
 # 🔍 Recorrer libros y extraer campos
 # ------------------------------
 
-for i, book in enumerate(books):
+for i, book in enumerate(read_records(file_path)):
     for field in fields_list:
         value = book.get(field)
 
@@ -1,39 +1,50 @@
 # ✅ utils/field_loader.py
 
-import json
-import unicodedata
-import re
-from pathlib import Path
 from collections import defaultdict
 import os
 
+import requests
+
+from .records import read_records
+from book_recommender_api.utils.normalize_and_clean_genres import normalize
+
 # 📁 Ruta del archivo limpio (actualizado con géneros válidos)
 
 # ---------------------------
-# 🔧 Normalización
+# 🔧 Normalización (compartida con normalize_and_clean_genres y app/field_options)
 # ---------------------------
-def normalize(text):
-    if not isinstance(text, str):
-        return None
-    text = unicodedata.normalize("NFKD", text).casefold()
-    text = re.sub(r"[\s\-_/]+", " ", text)
-    text = re.sub(r"[^\w\s]", "", text)
-    return text.strip()
-
 def normalize_list(values):
     return [normalize(v) for v in values if normalize(v)]
 
 # ---------------------------
-# 📥 Cargar archivo limpio
+# 🌐 Opciones servidas por la API (/api/field-options)
 # ---------------------------
-DATASET_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/books_openlibrary_cleaned.json"))
-def load_field_options():
-    with open(DATASET_PATH, "r", encoding="utf-8") as f:
-        books = json.load(f)
+FIELD_OPTIONS_URL = "http://127.0.0.1:8001/api/field-options"
+
+# Última respuesta recibida: se revalida con If-None-Match (304 = sin cuerpo, se reutiliza)
+_cached = {"url": None, "etag": None, "options": None}
+
+def fetch_field_options(url=FIELD_OPTIONS_URL, timeout=5):
+    headers = {}
+    if _cached["url"] == url and _cached["etag"]:
+        headers["If-None-Match"] = _cached["etag"]
 
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and _cached["options"] is not None:
+        return _cached["options"]
+    response.raise_for_status()
+
+    _cached.update(url=url, etag=response.headers.get("ETag"), options=response.json())
+    return _cached["options"]
+
+# ---------------------------
+# 📥 Cargar archivo limpio (si la API no responde)
+# ---------------------------
+DATASET_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/books_openlibrary_cleaned.json"))
+def load_local_field_options(path=DATASET_PATH):
     fields = defaultdict(set)
 
-    for book in books:
+    for book in read_records(path):
         for key in ["genres", "themes", "tone", "style", "emotion_tags", "age_range", "language"]:
             value = book.get(key)
             if isinstance(value, list):
@@ -44,3 +55,9 @@ def load_field_options():
                     fields[key].add(norm)
 
     return {k: sorted(v) for k, v in fields.items()}
+
+def load_field_options(url=FIELD_OPTIONS_URL):
+    try:
+        return fetch_field_options(url)
+    except requests.RequestException:
+        return load_local_field_options()
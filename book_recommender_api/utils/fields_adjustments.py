@@ -4,6 +4,7 @@ import re
 from pathlib import Path
 from collections import defaultdict
 from difflib import get_close_matches
+from book_recommender_api.utils.records import read_records
 
 # ------------------------------
 # 🔧 Utilidades de Normalización
@@ -24,12 +25,10 @@ def normalize_list(values):
     return [normalize(v) for v in values if normalize(v)]
 
 # ------------------------------
-# 📥 Cargar archivo JSON de libros
+# 📥 Archivo de libros (se lee uno a uno, .json o .jsonl)
 # ------------------------------
 
 file_path = Path(__file__).resolve().parents[1] / "data" / "books_openlibrary_enriched.json"
-with open(file_path, "r", encoding="utf-8") as f:
-    books = json.load(f)
 
 # ------------------------------
 # 📊 Inicializar campos únicos y anomalías
@@ -46,7 +45,7 @@ fields_list = [
 # 🔍 Analizar y normalizar campos
 # ------------------------------
 
-for i, book in enumerate(books):
+for i, book in enumerate(read_records(file_path)):
     for field in fields_list:
         value = book.get(field)
         
@@ -1,33 +1,34 @@
 # import_books.py
-import json
+import asyncio
 import os
-from dotenv import load_dotenv
-from book_recommender_api.app.database import get_books_collection
-
-# Cargar variables de entorno
-load_dotenv()
-
-# Obtener colección
-books_col = get_books_collection()
+from book_recommender_api.app.database import DB_NAME, get_async_client
+from book_recommender_api.app.catalog import CATALOG_SNAPSHOT_DIR
+from book_recommender_api.app.repository import replace_books
+from book_recommender_api.app.snapshot import build_snapshot_from_db
+from book_recommender_api.utils.records import read_records
 
 # ✅ NUEVA ruta al archivo enriquecido
 BOOKS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "books_openlibrary_enriched.json")
 
-def import_books():
-    # Leer archivo
-    with open(BOOKS_FILE, "r", encoding="utf-8") as f:
-        books = json.load(f)
+async def import_books(db=None, path: str = BOOKS_FILE):
+    # Cliente compartido (las variables de entorno las carga database.py)
+    db = db if db is not None else get_async_client()[DB_NAME]
 
-    # Validar
-    if not isinstance(books, list):
-        raise ValueError("El archivo JSON debe contener una lista de libros.")
+    # Leer archivo libro a libro (.json heredado o .jsonl); un .json que no sea una lista se rechaza
+    books = read_records(path)
 
-    # Limpiar colección anterior
-    books_col.delete_many({})
+    # Cargar por lotes en la colección auxiliar y sustituir "books" de forma atómica:
+    # las recomendaciones siguen sirviendo el catálogo anterior durante toda la importación
+    result = await replace_books(db, books)
+    print(f"✅ {result['count']} libros importados correctamente (versión {result['version']}).")
+    for index in result["indexes"]:
+        print(f"📇 Índice creado: {index}")
 
-    # Insertar libros
-    result = books_col.insert_many(books)
-    print(f"✅ {len(result.inserted_ids)} libros importados correctamente.")
+    # Con snapshots compartidos, los workers cambian de mapa al publicarse el nuevo CURRENT
+    if CATALOG_SNAPSHOT_DIR:
+        manifest = await build_snapshot_from_db(db, CATALOG_SNAPSHOT_DIR)
+        print(f"📦 Snapshot {manifest['version']} publicado en {CATALOG_SNAPSHOT_DIR}")
+    return result
 
 if __name__ == "__main__":
-    import_books()
+    asyncio.run(import_books())
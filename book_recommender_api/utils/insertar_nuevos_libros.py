@@ -1,6 +1,7 @@
-import json
 import os
 import shutil
+from itertools import chain
+from book_recommender_api.utils.records import read_records, write_records, flatten_records
 
 # 📁 Ruta al archivo de libros
 FILE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "books_openlibrary_enriched.json")
@@ -143,22 +144,10 @@ nuevos_libros = [
 # ✅ Validar estructura de entrada
 validar_formato(nuevos_libros)
 
-# 🔹 Cargar archivo actual
-with open(FILE_PATH, "r", encoding="utf-8") as f:
-    libros_existentes = json.load(f)
-
-# 🔁 Aplanar si hay listas anidadas en el archivo (prevención)
-libros_existentes_flat = []
-for item in libros_existentes:
-    if isinstance(item, list):
-        libros_existentes_flat.extend(item)
-    elif isinstance(item, dict):
-        libros_existentes_flat.append(item)
-
-# 🧠 Crear conjunto de claves únicas existentes
+# 🧠 Crear conjunto de claves únicas existentes (primera pasada en streaming, aplanando listas anidadas)
 claves_existentes = set(
     (libro.get("title", "").strip().lower(), libro.get("author", "").strip().lower())
-    for libro in libros_existentes_flat if isinstance(libro, dict)
+    for libro in flatten_records(read_records(FILE_PATH))
 )
 
 # 🔎 Filtrar nuevos libros que no estén ya presentes
@@ -173,12 +162,9 @@ for libro in nuevos_libros:
 shutil.copy(FILE_PATH, BACKUP_FILE)
 print(f"🛡️  Backup creado: {BACKUP_FILE}")
 
-# ➕ Añadir los libros filtrados
-libros_final = libros_existentes_flat + nuevos_libros_filtrados
-
-# 💾 Guardar el archivo actualizado
-with open(FILE_PATH, "w", encoding="utf-8") as f:
-    json.dump(libros_final, f, ensure_ascii=False, indent=4)
+# ➕ Añadir los libros filtrados tras los existentes (leídos del backup) y 💾 guardar
+libros_final = chain(flatten_records(read_records(BACKUP_FILE)), nuevos_libros_filtrados)
+total = write_records(FILE_PATH, libros_final, indent=4)
 
 print(f"✅ {len(nuevos_libros_filtrados)} libros nuevos añadidos.")
-print(f"📚 Total actual: {len(libros_final)} libros.")
+print(f"📚 Total actual: {total} libros.")
@@ -1,5 +1,6 @@
-import json
 import os
+from itertools import chain
+from book_recommender_api.utils.records import read_records, write_records
 
 # Ruta del directorio donde están los archivos
 base_path = "./"
@@ -16,18 +17,12 @@ input_files = [
     "books_block_7.json"
 ]
 
-# Lista donde se irán acumulando todos los libros
-all_books = []
-
-# Leer y agregar cada archivo
-for file_name in input_files:
-    file_path = os.path.join(base_path, file_name)
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        all_books.extend(data)
+# Leer cada archivo en orden y volcar sus libros directamente al unificado
+all_books = chain.from_iterable(
+    read_records(os.path.join(base_path, file_name)) for file_name in input_files
+)
 
 # Guardar el archivo unificado
-with open(os.path.join(base_path, output_file), "w", encoding="utf-8") as f_out:
-    json.dump(all_books, f_out, ensure_ascii=False, indent=2)
+write_records(os.path.join(base_path, output_file), all_books)
 
 print(f"✅ Todos los libros se han unido correctamente en '{output_file}'")
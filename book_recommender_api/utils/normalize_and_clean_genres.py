@@ -1,9 +1,8 @@
 # ✅ utils/normalize_and_clean_genres.py
-import json
-import os
 import re
 import unicodedata
 from pathlib import Path
+from book_recommender_api.utils.records import read_records, write_records
 
 # ---------------------------
 # 📍 Rutas
@@ -53,29 +52,36 @@ def extract_valid_genres(md_text):
 # ---------------------------
 # 🧹 Limpieza del dataset
 # ---------------------------
-def clean_dataset():
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        books = json.load(f)
+def clean_book_genres(book, valid_genres):
+    # Deja solo los géneros de la taxonomía (normalizados); True si el libro cambió
+    raw_genres = book.get("genres", [])
+    if isinstance(raw_genres, str):
+        raw_genres = [raw_genres]
 
-    with open(TAXONOMY_PATH, "r", encoding="utf-8") as f:
-        taxonomy = f.read()
+    cleaned = [normalize(g) for g in raw_genres if normalize(g) in valid_genres]
 
-    valid_genres = extract_valid_genres(taxonomy)
-    total_modified = 0
+    if cleaned != raw_genres:
+        book["genres"] = cleaned
+        return True
+    return False
 
-    for book in books:
-        raw_genres = book.get("genres", [])
-        if isinstance(raw_genres, str):
-            raw_genres = [raw_genres]
+def load_valid_genres(path=TAXONOMY_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return extract_valid_genres(f.read())
 
-        cleaned = [normalize(g) for g in raw_genres if normalize(g) in valid_genres]
+def clean_books(books, valid_genres, stats):
+    for book in books:
+        if clean_book_genres(book, valid_genres):
+            stats["modified"] += 1
+        yield book
 
-        if cleaned != raw_genres:
-            book["genres"] = cleaned
-            total_modified += 1
+def clean_dataset():
+    valid_genres = load_valid_genres()
+    stats = {"modified": 0}
 
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(books, f, indent=2, ensure_ascii=False)
+    # Lectura, limpieza y escritura libro a libro
+    write_records(OUTPUT_PATH, clean_books(read_records(DATA_PATH), valid_genres, stats))
+    total_modified = stats["modified"]
 
     print("✅ Dataset limpiado y normalizado correctamente.")
     print(f"📁 Archivo guardado: {OUTPUT_PATH}")
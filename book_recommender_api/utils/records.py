@@ -0,0 +1,135 @@
+# ✅ utils/records.py — Lectura y escritura de libros registro a registro (memoria constante)
+#
+# Formato canónico en disco: JSON Lines (.jsonl, un libro por línea).
+# Los .json heredados (un array con todos los libros) se leen de forma incremental
+# con JSONDecoder.raw_decode, sin cargar nunca el array completo en memoria.
+import json
+import os
+import re
+import sys
+import textwrap
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Union
+
+CHUNK_SIZE = 1 << 16  # Caracteres leídos por bloque del array heredado
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+PathLike = Union[str, Path]
+
+_decoder = json.JSONDecoder()
+
+
+# ---------------------------
+# 📥 Lectura
+# ---------------------------
+def _skip(buffer: str, pos: int) -> int:
+    return WHITESPACE.match(buffer, pos).end()
+
+def _iter_array(f, chunk_size: int) -> Iterator:
+    buffer = f.read(chunk_size)
+    pos = _skip(buffer, 0)
+    if buffer[pos:pos + 1] != "[":
+        raise ValueError("El archivo JSON debe contener una lista de libros.")
+    pos += 1
+    eof = False
+    expecting_value = True
+
+    while True:
+        pos = _skip(buffer, pos)
+        # Se necesita más texto: el registro actual cruza el final del bloque
+        if pos >= len(buffer) and not eof:
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        char = buffer[pos:pos + 1]
+        if char == "]":
+            return
+        if char == "," and not expecting_value:
+            pos, expecting_value = pos + 1, True
+            continue
+        if not char:
+            raise ValueError("Array JSON incompleto: falta el ']' final.")
+
+        try:
+            record, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = len(buffer)
+        # Un valor que llega justo al final del bloque puede estar truncado (p. ej. un número)
+        if end >= len(buffer) and not eof:
+            chunk = f.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        yield record
+        pos, expecting_value = end, False
+
+def _iter_lines(f) -> Iterator:
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Línea {line_number} no es JSON válido: {e}") from e
+
+def read_records(path: PathLike, chunk_size: int = CHUNK_SIZE) -> Iterator:
+    # El formato se detecta por el contenido: '[' = array heredado, cualquier otra cosa = JSON Lines
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+        if head == "[":
+            yield from _iter_array(f, chunk_size)
+        else:
+            yield from _iter_lines(f)
+
+def flatten_records(records: Iterable) -> Iterator[Dict]:
+    # Algunos volcados antiguos contienen listas anidadas de libros
+    for item in records:
+        if isinstance(item, list):
+            yield from (book for book in item if isinstance(book, dict))
+        elif isinstance(item, dict):
+            yield item
+
+
+# ---------------------------
+# 💾 Escritura
+# ---------------------------
+def write_records(path: PathLike, records: Iterable, indent: int = 2) -> int:
+    # .jsonl → una línea por libro; cualquier otra extensión → array JSON (con sangría, como antes).
+    # Se escribe en un temporal y se sustituye al final: se puede reescribir el mismo archivo que se lee.
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    count = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            if path.suffix == ".jsonl":
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+            else:
+                f.write("[")
+                for record in records:
+                    text = json.dumps(record, ensure_ascii=False, indent=indent)
+                    f.write((",\n" if count else "\n") + textwrap.indent(text, " " * (indent or 0)))
+                    count += 1
+                f.write("\n]\n" if count else "]\n")
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return count
+
+
+# ---------------------------
+# 🚀 Conversión: python -m book_recommender_api.utils.records origen.json destino.jsonl
+# ---------------------------
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Uso: python -m book_recommender_api.utils.records <origen> <destino>")
+    total = write_records(sys.argv[2], flatten_records(read_records(sys.argv[1])))
+    print(f"✅ {total} libros escritos en {sys.argv[2]}")
@@ -1,5 +1,5 @@
-import json
 import os
+from book_recommender_api.utils.records import read_records
 
 # Ruta al archivo
 CURRENT_DIR = os.path.dirname(__file__)
@@ -12,41 +12,49 @@ REQUIRED_FIELDS = [
     "personality_match", "year", "isbn", "description"
 ]
 
-# Validación
-def validate_books(data):
+# Validación de un libro (titles_seen acumula los títulos ya vistos)
+def book_issues(idx, book, titles_seen):
+    errors = []
+    book_id = f"{idx+1}: {book.get('title', '[NO TITLE]')}"
+
+    # Verificar campos faltantes
+    for field in REQUIRED_FIELDS:
+        if field not in book:
+            errors.append(f"❌ {book_id} → falta el campo '{field}'")
+
+    # Verificar duplicados
+    title = book.get("title", "").strip().lower()
+    if title in titles_seen:
+        errors.append(f"⚠️  Duplicado detectado: {book_id}")
+    else:
+        titles_seen.add(title)
+
+    return errors
+
+# Validación (acepta cualquier iterable: los libros se leen uno a uno)
+def validate_books(data, stats=None):
     titles_seen = set()
     errors = []
     for idx, book in enumerate(data):
-        book_id = f"{idx+1}: {book.get('title', '[NO TITLE]')}"
-        
-        # Verificar campos faltantes
-        for field in REQUIRED_FIELDS:
-            if field not in book:
-                errors.append(f"❌ {book_id} → falta el campo '{field}'")
-
-        # Verificar duplicados
-        title = book.get("title", "").strip().lower()
-        if title in titles_seen:
-            errors.append(f"⚠️  Duplicado detectado: {book_id}")
-        else:
-            titles_seen.add(title)
+        if stats is not None:
+            stats["total"] = idx + 1
+        errors.extend(book_issues(idx, book, titles_seen))
 
     return errors
 
 # Carga y ejecución
-try:
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        books = json.load(f)
-        print(f"📚 Libros cargados: {len(books)}")
-
-    issues = validate_books(books)
-
-    if issues:
-        print("\n❗ Problemas encontrados:")
-        for issue in issues:
-            print(issue)
-    else:
-        print("✅ Todos los libros están correctamente estructurados y sin duplicados.")
+if __name__ == "__main__":
+    try:
+        stats = {"total": 0}
+        issues = validate_books(read_records(DATA_PATH), stats)
+        print(f"📚 Libros cargados: {stats['total']}")
+
+        if issues:
+            print("\n❗ Problemas encontrados:")
+            for issue in issues:
+                print(issue)
+        else:
+            print("✅ Todos los libros están correctamente estructurados y sin duplicados.")
 
-except Exception as e:
-    print(f"❌ Error al procesar el archivo: {e}")
+    except Exception as e:
+        print(f"❌ Error al procesar el archivo: {e}")